@@ -0,0 +1,167 @@
+# app/admission.py
+"""
+Admission control for the ticket endpoints.
+
+At most max_inflight tickets run at once. Up to max_queue more wait, first
+come first served, for at most max_wait_seconds. Anything beyond that is
+rejected with Overloaded, which the server turns into a 429 with
+Retry-After. A ticket is rejected at once, without queueing, when the queue
+is full or when the wait it would face (queue position times the average
+service time, divided over the slots) already exceeds max_wait_seconds.
+
+Under a burst, admitted tickets keep their normal latency plus a bounded
+queueing delay. Without a limit, every ticket would slow down
+until upstream clients time out and retry, which adds even more load.
+
+Retry-After is the time the current queue needs to drain, estimated from
+a moving average of recent service times.
+
+Runs on the event loop: acquire and release must be called from it.
+Subclasses choose which waiter gets a freed slot (see app/scheduler.py);
+this class serves them in arrival order.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_inflight: int, max_queue: int, max_wait_seconds: float, ewma_alpha: float = 0.2):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self.ewma_alpha = ewma_alpha
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Seconds per admitted ticket, smoothed
+        self.service_seconds = 0.0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_wait = 0
+        self.shed_timeout = 0
+        self.queue_seconds_total = 0.0
+
+    # === Queue policy (app/scheduler.py overrides these) ===
+
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _queue_full(self, cls: Optional[str]) -> bool:
+        return len(self._waiters) >= self.max_queue
+
+    def _enqueue(self, waiter: asyncio.Future, cls: Optional[str]):
+        self._waiters.append(waiter)
+
+    def _dequeue(self) -> Optional[asyncio.Future]:
+        """The waiter to hand the next free slot to: the oldest one still waiting."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                return waiter
+        return None
+
+    def _discard(self, waiter: asyncio.Future, cls: Optional[str]):
+        self._waiters.remove(waiter)
+
+    def _record(self, cls: Optional[str], outcome: str, waited: float):
+        """Per-class accounting hook: outcome is "admitted" or the reason a ticket was shed."""
+
+    # === Admission ===
+
+    def expected_wait(self, cls: Optional[str] = None) -> float:
+        """Seconds a ticket joining the queue now would wait for a slot."""
+        return (self.queued() + 1) * self.service_seconds / self.max_inflight
+
+    def retry_after(self, cls: Optional[str] = None) -> int:
+        """Whole seconds until the current queue should have drained (at least 1)."""
+        return max(1, math.ceil(self.expected_wait(cls)))
+
+    def _shed(self, cls: Optional[str], reason: str, waited: float = 0.0) -> Overloaded:
+        self._record(cls, reason, waited)
+        return Overloaded(reason, self.retry_after(cls))
+
+    async def acquire(self, cls: Optional[str] = None) -> float:
+        """Wait for a slot; returns the seconds spent queued. Raises Overloaded instead of queueing past the limits."""
+        if self.inflight < self.max_inflight and not self.queued():
+            self.inflight += 1
+            self.admitted += 1
+            self._record(cls, "admitted", 0.0)
+            return 0.0
+        if self._queue_full(cls):
+            self.shed_queue_full += 1
+            raise self._shed(cls, "queue full")
+        if self.expected_wait(cls) > self.max_wait_seconds:
+            self.shed_wait += 1
+            raise self._shed(cls, "queue delay")
+        waiter = asyncio.get_running_loop().create_future()
+        self._enqueue(waiter, cls)
+        start = time.perf_counter()
+        try:
+            # shield: a timeout must not cancel a slot handed over at the same moment
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._discard(waiter, cls)
+                self.shed_timeout += 1
+                raise self._shed(cls, "queue timeout", time.perf_counter() - start)
+        except asyncio.CancelledError:
+            # The client went away while queued; pass on a slot it was already given
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._discard(waiter, cls)
+            raise
+        waited = time.perf_counter() - start
+        self.queue_seconds_total += waited
+        self.admitted += 1
+        self._record(cls, "admitted", waited)
+        return waited
+
+    def release(self):
+        # Hand the slot straight to the next waiter, so a newcomer cannot jump the queue
+        waiter = self._dequeue()
+        if waiter is not None:
+            waiter.set_result(None)
+        else:
+            self.inflight -= 1
+
+    @asynccontextmanager
+    async def slot(self, cls: Optional[str] = None):
+        """Hold an admission slot for the block; raises Overloaded when shedding."""
+        await self.acquire(cls)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.service_seconds:
+                self.service_seconds += self.ewma_alpha * (elapsed - self.service_seconds)
+            else:
+                self.service_seconds = elapsed
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued(),
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_wait": self.shed_wait,
+            "shed_timeout": self.shed_timeout,
+            "queue_seconds_total": round(self.queue_seconds_total, 6),
+            "service_seconds_ewma": round(self.service_seconds, 6),
+        }
@@ -0,0 +1,102 @@
+# app/bm25.py
+"""
+Inverted index with BM25 ranking for the retrieve node.
+
+The index is built once per corpus. Each posting stores the precomputed BM25
+impact of a term in a document, so a query only walks the posting lists of
+its own terms and sums impacts; top-k selection goes through a heap.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app import config
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Function words that otherwise dominate BM25 on short KB articles
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how i in is it its me my "
+    "of on or our so that the this to was we what when why will with you your".split()
+)
+
+
+def _normalize(token: str) -> str:
+    # Cheap plural folding so "errors" matches "error" and "invoices" matches "invoice"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and fold simple plurals."""
+    return [_normalize(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def query_terms(query: str) -> List[str]:
+    """Unique query terms in first-seen order."""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def top_k(scores: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+    """Heap-select the k best (doc_id, score) pairs; ties keep corpus order."""
+    return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+class BM25Index:
+    """
+    Immutable BM25 index over a list of documents.
+
+    postings maps term -> list of (doc_id, impact) where impact is the full
+    BM25 contribution of that term to that document.
+    """
+
+    def __init__(self, docs: Sequence[str], k1: float = None, b: float = None):
+        self._index([Counter(tokenize(doc)) for doc in docs], k1, b)
+
+    @classmethod
+    def from_term_counts(cls, term_freqs: Sequence[Dict[str, int]], k1: float = None, b: float = None) -> "BM25Index":
+        """Index documents already tokenized into {term: count} (e.g. cached by scripts/ingest.py)."""
+        index = cls.__new__(cls)
+        index._index(term_freqs, k1, b)
+        return index
+
+    def _index(self, term_freqs: Sequence[Dict[str, int]], k1: float, b: float):
+        self.k1 = config.BM25_K1 if k1 is None else k1
+        self.b = config.BM25_B if b is None else b
+        self.size = len(term_freqs)
+
+        doc_lens = [sum(tf.values()) for tf in term_freqs]
+
+        avgdl = (sum(doc_lens) / self.size) if self.size else 0.0
+        doc_freq: Counter = Counter()
+        for tf in term_freqs:
+            doc_freq.update(tf.keys())
+
+        idf = {
+            term: math.log(1.0 + (self.size - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+        k1, b = self.k1, self.b
+        k1_plus_1 = k1 + 1.0
+        postings: Dict[str, List[Tuple[int, float]]] = {term: [] for term in doc_freq}
+        self.postings = postings
+        for doc_id, tf in enumerate(term_freqs):
+            norm = k1 * (1.0 - b + b * (doc_lens[doc_id] / avgdl if avgdl else 0.0))
+            for term, freq in tf.items():
+                postings[term].append((doc_id, idf[term] * freq * k1_plus_1 / (freq + norm)))
+
+    def score_terms(self, terms: Iterable[str]) -> Dict[int, float]:
+        """Accumulate BM25 scores for already-tokenized terms."""
+        scores: Dict[int, float] = {}
+        for term in terms:
+            for doc_id, impact in self.postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + impact
+        return scores
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (doc_id, score) pairs, best first."""
+        return top_k(self.score_terms(query_terms(query)), k)
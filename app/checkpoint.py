@@ -0,0 +1,508 @@
+# app/checkpoint.py
+"""
+Durable checkpoints for ticket runs (GRAPH_EXECUTOR=langgraph).
+
+SQLiteCheckpointSaver is a LangGraph checkpointer backed by one SQLite file
+in WAL mode, so several worker processes can share it. A LangGraph checkpoint
+carries the value of every state channel. This saver writes only the
+channels that changed in each step (LangGraph passes these as new_versions).
+Unchanged fields such as the description or the retrieved context are
+stored once per run, however many review/refine passes follow. Every
+`keep` steps, checkpoints older than the latest `keep` are compacted away,
+together with the channel values and pending writes that only they used.
+
+ResumableGraph runs tickets on a graph compiled with the saver. Every run
+gets its own thread: the ticket's result-cache key (its ticket_id plus a
+hash of the subject and description), the worker's pid and a random suffix.
+Identical tickets running at the same time therefore never share
+checkpoints. A ticket whose earlier run was interrupted (the worker died, or
+a node raised) resumes after its last completed node instead of starting
+again from classify. The new run claims the interrupted thread by renaming
+it in one transaction, so only one run can pick it up. A thread still owned
+by a running run, in this process or in a live worker, is left alone. The
+thread is deleted when the run finishes, since the result cache answers
+finished tickets. The database therefore only holds runs that are in flight
+or were interrupted. Threads abandoned for longer than the TTL are pruned.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from app.result_cache import ticket_cache_key
+from app.state import GraphState
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    checkpoint_type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    updated_at REAL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT,
+    type TEXT,
+    value BLOB,
+    task_path TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_updated ON checkpoints (updated_at);
+"""
+
+
+def _thread_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    def __init__(self, path: str, keep: int = 2, busy_timeout_ms: int = 5000, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep = max(1, keep)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        # Steps since the last compaction, per (thread_id, checkpoint_ns)
+        self._puts: Dict[tuple, int] = {}
+        self._puts_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread: LangGraph writes checkpoints from its background threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # === Reads ===
+
+    def _tuple(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, row: Sequence[Any]) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        versions = checkpoint.get("channel_versions", {})
+        values: Dict[str, Any] = {}
+        if versions:
+            # Each channel's value lives with the step that last changed it
+            blobs = conn.execute(
+                "SELECT channel, version, type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND channel IN ({', '.join('?' * len(versions))})",
+                [thread_id, checkpoint_ns, *versions],
+            )
+            for channel, version, value_type, value in blobs:
+                if versions.get(channel) == version and value_type != "empty":
+                    values[channel] = self.serde.loads_typed((value_type, value))
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config=_thread_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=_thread_config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+        )
+
+    def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        conn = self._conn()
+        columns = "checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata"
+        if checkpoint_id:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        return self._tuple(conn, thread_id, checkpoint_ns, row) if row is not None else None
+
+    def list(self, config: Optional[Dict[str, Any]], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """Checkpoints newest first. Compaction keeps only each thread's latest few."""
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, "
+            f"metadata FROM checkpoints WHERE {' AND '.join(clauses) or '1'} ORDER BY checkpoint_id DESC",
+            params,
+        ).fetchall()
+        returned = 0
+        for thread_id, checkpoint_ns, *row in rows:
+            item = self._tuple(conn, thread_id, checkpoint_ns, row)
+            if filter and any(item.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            yield item
+            returned += 1
+            if limit is not None and returned >= limit:
+                return
+
+    # === Writes ===
+
+    def put(self, config: Dict[str, Any], checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> Dict[str, Any]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        saved = dict(checkpoint)
+        values = saved.pop("channel_values")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(saved)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        # Only the channels this step changed; the rest are already stored under their current version
+        blobs = [
+            (thread_id, checkpoint_ns, channel, version,
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")))
+            for channel, version in new_versions.items()
+        ]
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 checkpoint_type, checkpoint_blob, metadata_type, metadata_blob, time.time()),
+            )
+            if self._count_put(thread_id, checkpoint_ns):
+                self._compact(conn, thread_id, checkpoint_ns)
+        return _thread_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(self, config: Dict[str, Any], writes: Sequence[tuple], task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        conn = self._conn()
+        with conn:
+            # Special channels (errors, interrupts) have fixed negative indexes and replace earlier writes;
+            # regular writes keep the first copy, as LangGraph may save a task's writes twice
+            for verb, special in (("INSERT OR REPLACE", True), ("INSERT OR IGNORE", False)):
+                batch = [row for row in rows if (row[4] < 0) == special]
+                if batch:
+                    conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        # Zero-padded so versions of one channel sort as strings (compaction relies on it)
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # === Compaction ===
+
+    def _count_put(self, thread_id: str, checkpoint_ns: str) -> bool:
+        """True every `keep` puts to a thread: a thread holds between keep and 2 * keep checkpoints."""
+        key = (thread_id, checkpoint_ns)
+        with self._puts_lock:
+            n = self._puts.get(key, 0) + 1
+            self._puts[key] = n % self.keep
+        return n >= self.keep
+
+    def _compact(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str):
+        """Drop checkpoints older than the latest `keep`, with the writes and channel values only they used."""
+        oldest = conn.execute(
+            "SELECT checkpoint_id, checkpoint_type, checkpoint FROM checkpoints WHERE thread_id = ? "
+            "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.keep - 1),
+        ).fetchone()
+        if oldest is None:
+            return
+        checkpoint_id, checkpoint_type, checkpoint_blob = oldest
+        params = (thread_id, checkpoint_ns, checkpoint_id)
+        conn.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", params)
+        conn.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", params)
+        # Versions only grow, so a value older than the oldest kept checkpoint's version is unreachable
+        versions = self.serde.loads_typed((checkpoint_type, checkpoint_blob)).get("channel_versions", {})
+        conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version < ?",
+            [(thread_id, checkpoint_ns, channel, version) for channel, version in versions.items()],
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        with self._puts_lock:
+            for key in [key for key in self._puts if key[0] == thread_id]:
+                del self._puts[key]
+
+    def threads(self, prefix: str) -> List[str]:
+        """Thread ids with checkpoints that start with `prefix`."""
+        return [row[0] for row in self._conn().execute(
+            "SELECT DISTINCT thread_id FROM checkpoints WHERE substr(thread_id, 1, ?) = ?", (len(prefix), prefix))]
+
+    def rename_thread(self, thread_id: str, new_thread_id: str) -> bool:
+        """Move a thread's checkpoints to a new id; False if another caller moved or deleted it first."""
+        conn = self._conn()
+        with conn:
+            moved = conn.execute("UPDATE checkpoints SET thread_id = ? WHERE thread_id = ?",
+                                 (new_thread_id, thread_id)).rowcount
+            if moved:
+                for table in ("blobs", "writes"):
+                    conn.execute(f"UPDATE {table} SET thread_id = ? WHERE thread_id = ?", (new_thread_id, thread_id))
+        with self._puts_lock:
+            for key in [key for key in self._puts if key[0] == thread_id]:
+                del self._puts[key]
+        return bool(moved)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete threads whose last checkpoint is older than max_age_seconds. Returns how many."""
+        cutoff = time.time() - max_age_seconds
+        threads = [row[0] for row in self._conn().execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(updated_at) < ?", (cutoff,))]
+        for thread_id in threads:
+            self.delete_thread(thread_id)
+        return len(threads)
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        stats = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                 for table in ("checkpoints", "blobs", "writes")}
+        stats["threads"] = conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+        return stats
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_FIELDS = tuple(f.name for f in fields(GraphState))
+
+
+def _get(state: Any, key: str, default: Any = None) -> Any:
+    if isinstance(state, dict):
+        return state.get(key, default)
+    return getattr(state, key, default)
+
+
+def ticket_thread_id(input: Any) -> str:
+    """The prefix of every checkpoint thread of a ticket: the same key the result cache uses."""
+    return ticket_cache_key(_get(input, "ticket_id"), _get(input, "subject"),
+                            _get(input, "description") or _get(input, "ticket_text"))
+
+
+def run_thread_id(ticket_key: str) -> str:
+    """A fresh thread for one run of a ticket: ticket key, owning pid, random suffix."""
+    return f"{ticket_key}:{os.getpid()}:{uuid.uuid4().hex}"
+
+
+# Threads of runs executing in this process; anything else of ours with checkpoints was interrupted
+_active: Set[str] = set()
+_active_lock = threading.Lock()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _claimable(thread_id: str) -> bool:
+    """Whether a thread belongs to no running run: ours and not active, or its worker is gone."""
+    try:
+        pid = int(thread_id.rsplit(":", 2)[-2])
+    except (IndexError, ValueError):
+        return True
+    if pid == os.getpid():
+        return thread_id not in _active
+    return not _pid_alive(pid)
+
+
+def _input_values(input: Any) -> Dict[str, Any]:
+    # Checkpoints store the graph input; a plain dict deserializes without registering GraphState
+    if isinstance(input, GraphState):
+        return {name: getattr(input, name) for name in _FIELDS}
+    return dict(input or {})
+
+
+class ResumableGraph:
+    """
+    A graph compiled with a checkpointer, run one thread per ticket run. Offers
+    the compiled-graph API the server uses: invoke, batch and stream with
+    stream_mode="updates".
+    """
+
+    def __init__(self, graph: Any, saver: SQLiteCheckpointSaver, ttl_seconds: float = 86400.0,
+                 durability: Optional[str] = None):
+        self.graph = graph
+        self.saver = saver
+        self.ttl_seconds = ttl_seconds
+        self.durability = durability
+        self.resumed = 0
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    def _claim(self, ticket_key: str, thread_id: str) -> bool:
+        """Take over an interrupted run of the ticket under `thread_id`, if there is one."""
+        for old in self.saver.threads(ticket_key + ":"):
+            if old != thread_id and _claimable(old) and self.saver.rename_thread(old, thread_id):
+                return True
+        return False
+
+    def _start(self, input: Any, config: Optional[Dict[str, Any]]) -> Tuple[Any, Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        The input to run (None to resume an interrupted run, else a fresh
+        start), the state already checkpointed when resuming, and the run's
+        config with its thread_id. The thread is marked active until _finish.
+        """
+        self._maybe_prune()
+        thread_id = run_thread_id(ticket_thread_id(input))
+        config = dict(config or {})
+        config["configurable"] = dict(config.get("configurable") or {}, thread_id=thread_id)
+        with _active_lock:
+            _active.add(thread_id)
+        try:
+            if self._claim(ticket_thread_id(input), thread_id):
+                snapshot = self.graph.get_state(config)
+                if snapshot.next:
+                    self.resumed += 1
+                    return None, dict(snapshot.values), config
+                # A finished run whose thread was not cleaned up (the worker died right after it)
+                self.saver.delete_thread(thread_id)
+        except BaseException:
+            self._finish(config)
+            raise
+        return _input_values(input), None, config
+
+    def _finish(self, config: Dict[str, Any], completed: bool = False):
+        """Release the run's thread; a completed run's checkpoints are deleted, an interrupted one's kept."""
+        thread_id = config["configurable"]["thread_id"]
+        if completed:
+            self.saver.delete_thread(thread_id)
+        with _active_lock:
+            _active.discard(thread_id)
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        if now - self._last_prune < min(self.ttl_seconds, 600.0) or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = now
+            self.saver.prune(self.ttl_seconds)
+        finally:
+            self._prune_lock.release()
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        start, _, config = self._start(input, config)
+        completed = False
+        try:
+            result = self.graph.invoke(start, config, durability=self.durability, **kwargs)
+            completed = True
+        finally:
+            self._finish(config, completed)
+        return result
+
+    def stream(self, input: Any, config: Optional[Dict[str, Any]] = None, stream_mode: str = "updates", **kwargs):
+        """
+        Yields {node: update} after each node. A resumed run first yields
+        {"resume": state} with everything the interrupted run had computed.
+        """
+        if stream_mode != "updates":
+            raise ValueError(f"ResumableGraph only streams updates, not {stream_mode!r}")
+        start, restored, config = self._start(input, config)
+        # A client that disconnects leaves the thread in place, so its retry resumes
+        completed = False
+        try:
+            if restored is not None:
+                yield {"resume": restored}
+            yield from self.graph.stream(start, config, stream_mode="updates", durability=self.durability, **kwargs)
+            completed = True
+        finally:
+            self._finish(config, completed)
+
+    def batch(self, inputs: List[Any], config: Any = None, return_exceptions: bool = False, **kwargs) -> List[Any]:
+        """
+        Runs tickets concurrently, each on its own thread, at most
+        max_concurrency (from the first config, as in Runnable.batch) at a
+        time. Nodes waiting on a model backend release the GIL, so runs overlap.
+        """
+        configs = config if isinstance(config, list) else [config] * len(inputs)
+        if not inputs:
+            return []
+
+        def run(input: Any, run_config: Any) -> Any:
+            try:
+                return self.invoke(input, run_config, **kwargs)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        max_concurrency = (configs[0] or {}).get("max_concurrency")
+        if len(inputs) == 1 or max_concurrency == 1:
+            return [run(input, run_config) for input, run_config in zip(inputs, configs)]
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="checkpoint-batch") as pool:
+            return list(pool.map(run, inputs, configs))
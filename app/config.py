@@ -0,0 +1,153 @@
+# app/config.py
+"""
+Runtime settings, read once from the environment.
+
+Every value can be overridden with an environment variable of the same name
+(or a .env file loaded by the process manager).
+"""
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# === Retrieval ===
+# How often (seconds) the on-disk corpus is checked for added/changed/deleted files
+CORPUS_REFRESH_SECONDS = _env_float("CORPUS_REFRESH_SECONDS", 5.0)
+# "bm25" (inverted index), "tfidf" (sparse TF-IDF matrix) or "hashing" (dense hashed embedding)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "bm25").lower()
+RETRIEVAL_TOP_K = _env_int("RETRIEVAL_TOP_K", 5)
+BM25_K1 = _env_float("BM25_K1", 1.5)
+BM25_B = _env_float("BM25_B", 0.75)
+HASHING_DIM = _env_int("HASHING_DIM", 512)
+# Cached BM25 scores of recent ticket queries; a refine pass only scores its feedback terms
+RETRIEVAL_SCORE_CACHE_SIZE = _env_int("RETRIEVAL_SCORE_CACHE_SIZE", 1024)
+# Rendered context blocks (retrieved texts joined) reused by drafts over the same documents
+CONTEXT_BLOCK_CACHE_SIZE = _env_int("CONTEXT_BLOCK_CACHE_SIZE", 64)
+# Retrieved context a draft includes, best-ranked documents first; the last one that fits is cut at a word
+# boundary. CONTEXT_BUDGET_TOKENS (~4 characters each), when set, replaces the character budget (0 = unbounded)
+CONTEXT_BUDGET_CHARS = _env_int("CONTEXT_BUDGET_CHARS", 1500)
+CONTEXT_BUDGET_TOKENS = _env_int("CONTEXT_BUDGET_TOKENS", 0)
+# Read-only BM25 snapshot that serving workers mmap instead of indexing the corpus themselves
+# (written by `python -m app.serve`; empty = each process builds its own index)
+KB_INDEX_PATH = os.getenv("KB_INDEX_PATH", "")
+
+# === Graph state ===
+# Recent drafts / review feedback kept per ticket for the escalation log (oldest dropped first; 0 = unbounded)
+STATE_HISTORY_LIMIT = _env_int("STATE_HISTORY_LIMIT", 3)
+
+# === Serving ===
+# "langgraph" (compiled StateGraph) or "fast" (app/fastpath.py: same nodes and routes, direct dispatch)
+GRAPH_EXECUTOR = os.getenv("GRAPH_EXECUTOR", "langgraph").lower()
+# Record per-node latency/count/error metrics for /metrics
+METRICS_ENABLED = _env_int("METRICS_ENABLED", 1) == 1
+# Worker threads that run graph.invoke off the event loop (max tickets in flight per process)
+GRAPH_MAX_CONCURRENCY = _env_int("GRAPH_MAX_CONCURRENCY", 8)
+GRAPH_RECURSION_LIMIT = _env_int("GRAPH_RECURSION_LIMIT", 50)
+# Worker processes started by `python -m app.serve` (0 = one per CPU core)
+SERVE_WORKERS = _env_int("SERVE_WORKERS", 0)
+# Preload corpora and indexes and run one synthetic ticket at startup; /health returns 503 until done
+WARMUP_ENABLED = _env_int("WARMUP_ENABLED", 1) == 1
+# Admission control for the ticket endpoints (each ticket of a batch is admitted on its own): tickets
+# running at once, tickets waiting for a slot, and how long one may wait (also the estimated wait above
+# which it is not queued). Beyond that the server answers 429 with Retry-After
+ADMISSION_ENABLED = _env_int("ADMISSION_ENABLED", 1) == 1
+ADMISSION_MAX_INFLIGHT = _env_int("ADMISSION_MAX_INFLIGHT", GRAPH_MAX_CONCURRENCY)
+ADMISSION_MAX_QUEUE = _env_int("ADMISSION_MAX_QUEUE", 2 * GRAPH_MAX_CONCURRENCY)
+ADMISSION_MAX_WAIT_SECONDS = _env_float("ADMISSION_MAX_WAIT_SECONDS", 0.25)
+# Queued tickets are served by priority class (urgent, high, normal, low; see app/scheduler.py) and
+# compete one class higher for every SCHEDULER_AGING_SECONDS they have waited
+SCHEDULER_AGING_SECONDS = _env_float("SCHEDULER_AGING_SECONDS", 0.1)
+# At most ADMISSION_MAX_QUEUE tickets wait across all classes; this fraction of it is reserved per class
+# by weight, so a flood of one class cannot fill the queue for the others
+SCHEDULER_QUEUE_RESERVED_FRACTION = _env_float("SCHEDULER_QUEUE_RESERVED_FRACTION", 0.5)
+# Tickets accepted per /api/process_tickets call, and how many of one call's tickets run at once
+BATCH_MAX_TICKETS = _env_int("BATCH_MAX_TICKETS", 500)
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 8)
+# Idempotent result cache for resubmitted tickets (same ticket_id + normalized subject/description)
+RESULT_CACHE_ENABLED = _env_int("RESULT_CACHE_ENABLED", 1) == 1
+RESULT_CACHE_SIZE = _env_int("RESULT_CACHE_SIZE", 10000)
+RESULT_CACHE_TTL_SECONDS = _env_float("RESULT_CACHE_TTL_SECONDS", 3600.0)
+# SQLite file that keeps cached results across restarts (empty = in-memory only)
+RESULT_CACHE_DB = os.getenv("RESULT_CACHE_DB", "")
+
+# === Model backend ===
+# Backend classify, draft and review send their prompts to (app/llm.py): "stub" (deterministic, in process),
+# "http" (POST to LLM_URL) or empty to keep the keyword heuristics
+LLM_BACKEND = os.getenv("LLM_BACKEND", "").lower()
+LLM_URL = os.getenv("LLM_URL", "http://127.0.0.1:8090/v1/complete")
+LLM_MODEL = os.getenv("LLM_MODEL", "stub-1")
+LLM_MAX_TOKENS = _env_int("LLM_MAX_TOKENS", 512)
+LLM_TIMEOUT_SECONDS = _env_float("LLM_TIMEOUT_SECONDS", 30.0)
+# Prompts from concurrent tickets share one call: a batch is sent LLM_BATCH_LINGER_MS after its first
+# prompt arrived, or as soon as LLM_BATCH_MAX_SIZE prompts are waiting. LLM_BATCH_CONCURRENCY batches run at once
+LLM_BATCH_MAX_SIZE = _env_int("LLM_BATCH_MAX_SIZE", GRAPH_MAX_CONCURRENCY)
+LLM_BATCH_LINGER_MS = _env_float("LLM_BATCH_LINGER_MS", 5.0)
+LLM_BATCH_CONCURRENCY = _env_int("LLM_BATCH_CONCURRENCY", 4)
+# How long a caller waits for its completion, including any wait for a busy call slot, before it gets a TimeoutError
+LLM_RESULT_TIMEOUT_SECONDS = _env_float("LLM_RESULT_TIMEOUT_SECONDS", 2 * LLM_TIMEOUT_SECONDS)
+# Simulated latency per call of the stub backend and `python -m app.llm`
+LLM_STUB_LATENCY_MS = _env_float("LLM_STUB_LATENCY_MS", 0.0)
+# Prompt/response cache (app/llm_cache.py): LLM_CACHE_SIZE entries in memory, and LLM_CACHE_DB on disk
+# (empty = memory only) holding up to LLM_CACHE_MAX_BYTES of responses, least recently used evicted first
+LLM_CACHE_ENABLED = _env_int("LLM_CACHE_ENABLED", 1) == 1
+LLM_CACHE_SIZE = _env_int("LLM_CACHE_SIZE", 4096)
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "data/llm_cache.sqlite")
+LLM_CACHE_MAX_BYTES = _env_int("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+LLM_CACHE_TTL_SECONDS = _env_float("LLM_CACHE_TTL_SECONDS", 7 * 86400.0)
+
+# === Checkpoints ===
+# Checkpoint each ticket run to CHECKPOINT_DB so an interrupted ticket resumes at its last completed node
+# when resubmitted (GRAPH_EXECUTOR=langgraph only; see app/checkpoint.py)
+CHECKPOINT_ENABLED = _env_int("CHECKPOINT_ENABLED", 1) == 1
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "data/checkpoints.sqlite")
+# Checkpoints kept per run; older ones are compacted away every CHECKPOINT_KEEP steps
+CHECKPOINT_KEEP = _env_int("CHECKPOINT_KEEP", 2)
+# Interrupted runs not resumed within this many seconds are deleted
+CHECKPOINT_TTL_SECONDS = _env_float("CHECKPOINT_TTL_SECONDS", 86400.0)
+# LangGraph durability: "async" (write each checkpoint while the next node runs), "sync" or "exit"
+CHECKPOINT_DURABILITY = os.getenv("CHECKPOINT_DURABILITY", "async").lower()
+
+# === Escalations ===
+# "sqlite" (indexed store behind /escalations, see app/escalation_store.py) or "csv" (append-only ESCALATION_FILE)
+ESCALATION_BACKEND = os.getenv("ESCALATION_BACKEND", "sqlite").lower()
+ESCALATION_DB = os.getenv("ESCALATION_DB", "data/escalations.sqlite")
+ESCALATION_FILE = os.getenv("ESCALATION_FILE", "data/escalations.csv")
+# Largest page /escalations returns
+ESCALATION_PAGE_MAX = _env_int("ESCALATION_PAGE_MAX", 500)
+# Write escalations from a background thread (0 = write synchronously on the request path)
+ESCALATION_ASYNC = _env_int("ESCALATION_ASYNC", 1) == 1
+ESCALATION_BATCH_SIZE = _env_int("ESCALATION_BATCH_SIZE", 100)
+ESCALATION_FLUSH_SECONDS = _env_float("ESCALATION_FLUSH_SECONDS", 1.0)
+# Unwritten rows kept for retry while writes fail (oldest dropped beyond this; 0 = unbounded)
+ESCALATION_MAX_PENDING = _env_int("ESCALATION_MAX_PENDING", 100000)
+# Rotate the CSV when it reaches this size (0 disables) or when the day changes
+ESCALATION_MAX_BYTES = _env_int("ESCALATION_MAX_BYTES", 50 * 1024 * 1024)
+ESCALATION_ROTATE_DAILY = _env_int("ESCALATION_ROTATE_DAILY", 1) == 1
+
+# === Logging ===
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (one JSON object per line) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Empty disables the file handler
+LOG_FILE = os.getenv("LOG_FILE", "support_agent.log")
+LOG_MAX_BYTES = _env_int("LOG_MAX_BYTES", 10 * 1024 * 1024)
+LOG_BACKUP_COUNT = _env_int("LOG_BACKUP_COUNT", 5)
+# 1 = each process writes LOG_FILE with its pid inserted (agent.log -> agent.<pid>.log);
+# app.serve turns it on for multiple workers, since rotation is not safe across processes
+LOG_FILE_PER_PROCESS = _env_int("LOG_FILE_PER_PROCESS", 0) == 1
+# Records waiting for the writer thread; beyond this, new records are dropped rather than blocking
+LOG_QUEUE_SIZE = _env_int("LOG_QUEUE_SIZE", 10000)
+# Fraction of INFO/DEBUG records kept (warnings and errors are always kept)
+LOG_INFO_SAMPLE_RATE = _env_float("LOG_INFO_SAMPLE_RATE", 1.0)
@@ -0,0 +1,244 @@
+# app/escalation_store.py
+"""
+Indexed SQLite store for escalation records (ESCALATION_BACKEND=sqlite).
+
+The background EscalationWriter inserts rows in batches, one transaction per
+batch. The database runs in WAL mode, so /escalations queries and exports can
+read while a writer commits, and several worker processes can share one file
+(busy_timeout handles write contention).
+
+Indexes cover the questions support leads ask: escalations per category over
+a time range, everything in a time range, and the history of one ticket.
+Pages are keyset-paginated on the row id (newest first), so a deep page costs
+the same as the first one. Exports stream rows with fetchmany and never load
+the table into memory.
+"""
+import csv
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Column order of an escalation record, as submitted by the escalate node
+ESCALATION_FIELDS = [
+    "ticket_id",
+    "subject",
+    "description",
+    "category",
+    "context",
+    "all_drafts",
+    "all_feedback",
+    "retries",
+    "timestamp",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS escalations (
+    id INTEGER PRIMARY KEY,
+    ticket_id TEXT,
+    subject TEXT,
+    description TEXT,
+    category TEXT,
+    context TEXT,
+    all_drafts TEXT,
+    all_feedback TEXT,
+    retries INTEGER,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_escalations_category_ts ON escalations (category, timestamp);
+CREATE INDEX IF NOT EXISTS idx_escalations_ts ON escalations (timestamp);
+CREATE INDEX IF NOT EXISTS idx_escalations_ticket ON escalations (ticket_id);
+CREATE TABLE IF NOT EXISTS imported_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    rows INTEGER
+);
+"""
+
+_INSERT = f"INSERT INTO escalations ({', '.join(ESCALATION_FIELDS)}) VALUES ({', '.join('?' * len(ESCALATION_FIELDS))})"
+_COLUMNS = "id, " + ", ".join(ESCALATION_FIELDS)
+EXPORT_BATCH_SIZE = 500
+
+
+def _filters(category: Optional[str], ticket_id: Optional[str], since: Optional[str],
+             until: Optional[str]) -> Tuple[str, List[Any]]:
+    clauses, params = [], []
+    if category:
+        clauses.append("category = ?")
+        params.append(category)
+    if ticket_id:
+        clauses.append("ticket_id = ?")
+        params.append(ticket_id)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    return " AND ".join(clauses) or "1", params
+
+
+def record(row: Sequence[Any]) -> Dict[str, Any]:
+    """An (id, *ESCALATION_FIELDS) row as a dict, with drafts and feedback decoded."""
+    item = dict(zip(["id"] + ESCALATION_FIELDS, row))
+    for key in ("all_drafts", "all_feedback"):
+        try:
+            item[key] = json.loads(item[key]) if item[key] else []
+        except ValueError:
+            item[key] = [item[key]]
+    return item
+
+
+class EscalationStore:
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread: the writer thread and each request thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+        return conn
+
+    def insert_many(self, rows: Sequence[Sequence[Any]]):
+        conn = self._conn()
+        with conn:
+            conn.executemany(_INSERT, rows)
+
+    def query(self, category: Optional[str] = None, ticket_id: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, limit: int = 50, before_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        One page of escalations, newest first. Pass the returned next_cursor as
+        before_id to get the following page; it is None on the last page.
+        """
+        where, params = _filters(category, ticket_id, since, until)
+        if before_id is not None:
+            where += " AND id < ?"
+            params.append(before_id)
+        rows = self._conn().execute(
+            f"SELECT {_COLUMNS} FROM escalations WHERE {where} ORDER BY id DESC LIMIT ?", params + [limit + 1]
+        ).fetchall()
+        items = [record(row) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count(self, category: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              ticket_id: Optional[str] = None) -> int:
+        where, params = _filters(category, ticket_id, since, until)
+        return self._conn().execute(f"SELECT COUNT(*) FROM escalations WHERE {where}", params).fetchone()[0]
+
+    def counts_by_category(self, since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, int]:
+        where, params = _filters(None, None, since, until)
+        rows = self._conn().execute(
+            f"SELECT category, COUNT(*) FROM escalations WHERE {where} GROUP BY category", params)
+        return {category or "": n for category, n in rows}
+
+    def iter_rows(self, category: Optional[str] = None, ticket_id: Optional[str] = None, since: Optional[str] = None,
+                  until: Optional[str] = None) -> Iterator[Tuple]:
+        """
+        Stream matching (id, *ESCALATION_FIELDS) rows oldest first, EXPORT_BATCH_SIZE
+        at a time. Uses its own connection, since a streaming response may resume
+        the generator on a different thread.
+        """
+        where, params = _filters(category, ticket_id, since, until)
+        conn = self.connect(check_same_thread=False)
+        try:
+            cursor = conn.execute(f"SELECT {_COLUMNS} FROM escalations WHERE {where} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            conn.close()
+
+    # === CSV migration ===
+
+    def import_csv(self, path: str, batch_size: int = 1000) -> int:
+        """
+        Import an escalations CSV. Re-running is safe: an unchanged file is skipped,
+        and a file that has grown since (the CSV is append-only) only imports its new
+        rows. Understands every layout the CSV has had:
+          9 columns  ticket_id + the 8 below (CSV backend after the store was added)
+          8 columns  subject, description, category, context, all_drafts, all_feedback, retries, timestamp
+          6 columns  description, category, context, draft, feedback, retries (earliest rows;
+                     the draft and feedback are plain text, there is no subject or timestamp)
+        Returns the number of rows imported.
+        """
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        conn = self._conn()
+        seen = conn.execute("SELECT size, mtime_ns, rows FROM imported_files WHERE path = ?", (key,)).fetchone()
+        if seen is not None and seen[:2] == (st.st_size, st.st_mtime_ns):
+            return 0
+        # A file that shrank was replaced (e.g. rotated): import it from the start
+        already = seen[2] if seen is not None and st.st_size >= seen[0] else 0
+        skip = already
+        imported = 0
+        with conn, open(path, newline="", encoding="utf-8") as f:
+            batch = []
+            for row in csv.reader(f):
+                converted = _from_csv(row)
+                if converted is None:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                batch.append(converted)
+                if len(batch) >= batch_size:
+                    conn.executemany(_INSERT, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                conn.executemany(_INSERT, batch)
+                imported += len(batch)
+            conn.execute("INSERT OR REPLACE INTO imported_files VALUES (?, ?, ?, ?)",
+                         (key, st.st_size, st.st_mtime_ns, already + imported))
+        return imported
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _retries(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _from_csv(row: List[str]) -> Optional[List[Any]]:
+    """An escalations CSV row in ESCALATION_FIELDS order, or None for headers and blank rows."""
+    if not row or row[0] in ("subject", "ticket_id"):
+        return None
+    if len(row) == 9:
+        ticket_id, subject, description, category, context, drafts, feedback, retries, timestamp = row
+    elif len(row) == 8:
+        ticket_id = None
+        subject, description, category, context, drafts, feedback, retries, timestamp = row
+    elif len(row) == 6:
+        ticket_id, subject, timestamp = None, "", None
+        description, category, context, draft, feedback, retries = row
+        drafts, feedback = json.dumps([draft] if draft else []), json.dumps([feedback] if feedback else [])
+    else:
+        return None
+    return [ticket_id, subject, description, category, context, drafts, feedback, _retries(retries), timestamp or None]
@@ -0,0 +1,290 @@
+# app/escalation_writer.py
+"""
+Background writer for escalation records.
+
+escalate() only puts a row on an in-process queue. A daemon thread drains
+the queue and appends rows in batches, flushing when `batch_size` rows are
+waiting or `flush_seconds` have passed. Pending rows are flushed on close()
+(registered with atexit and called from the server lifespan).
+
+A batch that fails to write (disk full, database locked) is logged and kept.
+It is retried with the next batch, no sooner than `flush_seconds` later.
+Rows are only dropped when more than `max_pending` are waiting, and the
+dropped rows are counted and logged.
+
+With ESCALATION_BACKEND=sqlite (the default) each batch is one transaction
+in the indexed EscalationStore. With "csv", every batch is appended under an
+inter-process file lock, so several workers can share one CSV, and the file
+is rotated by size or calendar day.
+"""
+import atexit
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from app import config
+from app.escalation_store import ESCALATION_FIELDS, EscalationStore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+ESCALATION_HEADER = ESCALATION_FIELDS
+
+logger = logging.getLogger("support-agent")
+
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """Exclusive lock shared by every process appending to the same file."""
+    with open(lock_path, "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _Flush:
+    __slots__ = ("done", "ok")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = True
+
+
+_STOP = object()
+
+
+class EscalationWriter:
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = None,
+        flush_seconds: float = None,
+        max_bytes: int = None,
+        rotate_daily: bool = None,
+        max_pending: int = None,
+    ):
+        self.path = path
+        self.batch_size = config.ESCALATION_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_seconds = config.ESCALATION_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.max_bytes = config.ESCALATION_MAX_BYTES if max_bytes is None else max_bytes
+        self.rotate_daily = config.ESCALATION_ROTATE_DAILY if rotate_daily is None else rotate_daily
+        # Rows kept for retry while writes fail; beyond this the oldest are dropped
+        self.max_pending = config.ESCALATION_MAX_PENDING if max_pending is None else max_pending
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        self.write_failures = 0
+        self.rows_dropped = 0
+        self.rows_pending = 0
+
+    def submit(self, row: Sequence[str]):
+        """Queue one row; never touches the filesystem on the caller's thread."""
+        if self._thread is None:
+            self._start()
+        self._queue.put(row)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every row submitted so far is on disk; False if the write failed or timed out."""
+        if self._thread is None:
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout) and marker.ok
+
+    def close(self, timeout: float = 10.0):
+        """Flush pending rows and stop the background thread."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="escalation-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending: List[Sequence[str]] = []
+        deadline = None
+        # After a failed write, size-triggered writes wait until then
+        retry_at = 0.0
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _STOP or isinstance(item, _Flush):
+                ok = self._write(pending)
+                if isinstance(item, _Flush):
+                    item.ok = ok
+                    item.done.set()
+                if item is _STOP:
+                    if not ok:
+                        logger.error(f"Escalation writer stopped with {len(pending)} rows unwritten")
+                    return
+                if ok:
+                    pending, deadline = [], None
+                else:
+                    retry_at = deadline = time.monotonic() + self.flush_seconds
+                self.rows_pending = len(pending)
+                continue
+
+            pending.append(item)
+            if len(pending) > self.max_pending > 0:
+                dropped = len(pending) - self.max_pending
+                del pending[:dropped]
+                self.rows_dropped += dropped
+                logger.error(f"Escalation writer dropped {dropped} unwritten rows (max_pending {self.max_pending})")
+            self.rows_pending = len(pending)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_seconds
+            if len(pending) >= self.batch_size and time.monotonic() >= retry_at:
+                if self._write(pending):
+                    pending, deadline = [], None
+                else:
+                    retry_at = deadline = time.monotonic() + self.flush_seconds
+                self.rows_pending = len(pending)
+
+    def _write(self, rows: List[Sequence[str]]) -> bool:
+        """Write one batch; on failure the caller keeps the rows and retries later."""
+        if not rows:
+            return True
+        try:
+            self._append(rows)
+        except Exception:
+            # Keep the writer alive; the rows stay queued for the next attempt
+            self.write_failures += 1
+            logger.exception(f"Escalation writer failed to write {len(rows)} rows; will retry")
+            return False
+        self.rows_written += len(rows)
+        self.batches_written += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "write_failures": self.write_failures,
+            "rows_pending": self.rows_pending,
+            "rows_dropped": self.rows_dropped,
+        }
+
+    def _append(self, rows: List[Sequence[str]]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _file_lock(self.path + ".lock"):
+            self._maybe_rotate()
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(ESCALATION_HEADER)
+                writer.writerows(rows)
+
+    def _maybe_rotate(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        too_big = self.max_bytes > 0 and st.st_size >= self.max_bytes
+        stale = self.rotate_daily and datetime.fromtimestamp(st.st_mtime).date() != datetime.now().date()
+        if not (too_big or stale):
+            return
+        root, ext = os.path.splitext(self.path)
+        stamp = datetime.fromtimestamp(st.st_mtime).strftime("%Y%m%d-%H%M%S")
+        target = f"{root}-{stamp}{ext}"
+        n = 1
+        while os.path.exists(target):
+            target = f"{root}-{stamp}-{n}{ext}"
+            n += 1
+        os.replace(self.path, target)
+        self.rotations += 1
+
+
+class SQLiteEscalationWriter(EscalationWriter):
+    """Same queueing and batching; each batch is one transaction in an EscalationStore."""
+
+    def __init__(self, store: EscalationStore, batch_size: int = None, flush_seconds: float = None,
+                 max_pending: int = None):
+        super().__init__(store.path, batch_size, flush_seconds, max_bytes=0, rotate_daily=False,
+                         max_pending=max_pending)
+        self.store = store
+
+    def _append(self, rows: List[Sequence[str]]):
+        self.store.insert_many(rows)
+
+
+_writer: Optional[EscalationWriter] = None
+_store: Optional[EscalationStore] = None
+_writer_lock = threading.Lock()
+
+
+def get_escalation_store() -> Optional[EscalationStore]:
+    """The shared EscalationStore, or None with ESCALATION_BACKEND=csv."""
+    global _store
+    if config.ESCALATION_BACKEND != "sqlite":
+        return None
+    if _store is None:
+        with _writer_lock:
+            if _store is None:
+                _store = EscalationStore(config.ESCALATION_DB)
+    return _store
+
+
+def get_escalation_writer() -> EscalationWriter:
+    global _writer
+    if _writer is None:
+        store = get_escalation_store()
+        with _writer_lock:
+            if _writer is None:
+                _writer = SQLiteEscalationWriter(store) if store is not None else EscalationWriter(config.ESCALATION_FILE)
+                atexit.register(_writer.close)
+    return _writer
+
+
+def escalation_rows_written() -> int:
+    """Rows this process has written so far, without starting a writer."""
+    return _writer.rows_written if _writer is not None else 0
+
+
+def escalation_writer_stats() -> Dict[str, int]:
+    """Counters of this process's writer, without starting one."""
+    if _writer is None:
+        return {"rows_written": 0, "batches_written": 0, "write_failures": 0, "rows_pending": 0, "rows_dropped": 0}
+    return _writer.stats()
+
+
+def shutdown_escalation_writer():
+    if _writer is not None:
+        _writer.close()
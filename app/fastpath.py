@@ -0,0 +1,108 @@
+# app/fastpath.py
+"""
+Direct-dispatch executor for the support graph.
+
+Every node is deterministic Python, so a ticket does not need LangGraph's
+per-step machinery: channel writes and merges, task scheduling, checkpoint
+bookkeeping. FastPipeline runs the nodes and routers declared in app/graph.py
+in a plain loop over one GraphState. It never imports langgraph.graph, so a
+server running GRAPH_EXECUTOR=fast skips that import entirely.
+
+Results match graph.invoke: the same keys, the same values and the same
+GraphRecursionError limit (tests/test_fastpath.py checks this). It offers the
+subset of the compiled-graph API the server uses: invoke, batch, and stream
+with stream_mode="updates".
+
+Nodes must not mutate the state they are given. LangGraph hands each node a
+fresh copy, but here every node sees the same object.
+"""
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from langgraph.constants import END
+
+from app.graph import EDGES, ENTRY_POINT, ROUTES, graph_nodes
+from app.state import GraphState
+
+# LangGraph's default when the config has no recursion_limit
+DEFAULT_RECURSION_LIMIT = 25
+
+_FIELDS = tuple(f.name for f in fields(GraphState))
+_FIELD_SET = frozenset(_FIELDS)
+
+
+def _initial_state(input: Any) -> Tuple[GraphState, Set[str]]:
+    """Fresh state plus the keys LangGraph would report as written by the input."""
+    if isinstance(input, GraphState):
+        return GraphState(**{name: getattr(input, name) for name in _FIELDS}), set(_FIELDS)
+    values = {key: value for key, value in dict(input or {}).items() if key in _FIELD_SET}
+    return GraphState(**values), set(values)
+
+
+class FastPipeline:
+    def __init__(self, instrument: bool = None):
+        self.nodes = dict(graph_nodes(instrument))
+        self.routes = dict(ROUTES)
+        self.edges = dict(EDGES)
+        self.entry = ENTRY_POINT
+
+    def _steps(self, state: GraphState, written: Set[str], config: Optional[Dict[str, Any]]) -> Iterator[Tuple[str, Any]]:
+        limit = (config or {}).get("recursion_limit", DEFAULT_RECURSION_LIMIT)
+        node = self.entry
+        steps = 0
+        while node is not END:
+            # Same budget as LangGraph: n node runs need recursion_limit >= n + 1
+            if steps >= limit - 1:
+                from langgraph.errors import GraphRecursionError
+
+                raise GraphRecursionError(
+                    f"Recursion limit of {limit} reached without hitting a stop condition. "
+                    "You can increase the limit by setting the `recursion_limit` config key."
+                )
+            update = self.nodes[node](state)
+            steps += 1
+            if update:
+                for key, value in update.items():
+                    if key not in _FIELD_SET:
+                        from langgraph.errors import InvalidUpdateError
+
+                        raise InvalidUpdateError(f"Node {node!r} returned unknown state key {key!r}")
+                    setattr(state, key, value)
+                written.update(update)
+            yield node, update
+            route = self.routes.get(node)
+            if route is not None:
+                router, targets = route
+                node = targets[router(state)]
+            else:
+                node = self.edges.get(node, END)
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        state, written = _initial_state(input)
+        for _ in self._steps(state, written, config):
+            pass
+        return {name: getattr(state, name) for name in _FIELDS if name in written}
+
+    def stream(self, input: Any, config: Optional[Dict[str, Any]] = None, stream_mode: str = "updates", **kwargs):
+        """Yields {node: update} after each node, like graph.stream(stream_mode="updates")."""
+        if stream_mode != "updates":
+            raise ValueError(f"FastPipeline only streams updates, not {stream_mode!r}")
+        state, written = _initial_state(input)
+        for node, update in self._steps(state, written, config):
+            yield {node: update}
+
+    def batch(self, inputs: List[Any], config: Any = None, return_exceptions: bool = False, **kwargs) -> List[Any]:
+        """
+        Runs tickets one after another. Threads cannot speed up GIL-bound nodes,
+        so max_concurrency in the config is accepted and ignored.
+        """
+        configs = config if isinstance(config, list) else [config] * len(inputs)
+        outputs: List[Any] = []
+        for input, run_config in zip(inputs, configs):
+            try:
+                outputs.append(self.invoke(input, run_config))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                outputs.append(e)
+        return outputs
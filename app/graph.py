@@ -1,4 +1,9 @@
-from langgraph.graph import StateGraph, END
+import threading
+
+# langgraph.constants is cheap; StateGraph (langgraph.graph) costs ~0.5s and is imported in build_graph
+from langgraph.constants import END
+from app import config
+from app.metrics import instrument_node
 from app.state import GraphState
 from app.nodes.classify import classify
 from app.nodes.retrieve import retrieve
@@ -8,70 +13,115 @@ from app.nodes.refine import refine, MAX_RETRIES
 from app.nodes.escalate import escalate
 
 
-def build_graph():
-    workflow = StateGraph(GraphState)
+# === Topology ===
+# Shared by build_graph (LangGraph) and app/fastpath.py (direct dispatch), so both run the
+# same nodes with the same routing rules.
 
-    # Add nodes
-    workflow.add_node("classify", classify)
-    workflow.add_node("retrieve", retrieve)
-    workflow.add_node("draft", draft)
-    workflow.add_node("review", review)
-    workflow.add_node("refine", refine)
-    workflow.add_node("escalate", escalate)
+def _error_or(next_node: str):
+    def route(s):
+        return "end" if getattr(s, "error", None) else next_node
+    route.__name__ = f"route_to_{next_node}"
+    return route
 
-    # Entry point
-    workflow.set_entry_point("classify")
 
-    # === Conditional edges with error handling ===
-    workflow.add_conditional_edges(
-        "classify",
-        lambda s: "end" if getattr(s, "error", None) else "retrieve",
-        {"retrieve": "retrieve", "end": END}
+def route_after_review(s) -> str:
+    return (
+        "end" if getattr(s, "error", None)
+        else "end" if getattr(s, "review_decision", None) == "approved"
+        else "end" if getattr(s, "review_decision", None) == "rejected" and getattr(s, "sensitive", False)
+        else "refine" if getattr(s, "review_decision", None) == "rejected" and int(getattr(s, "retries", 0)) < MAX_RETRIES
+        else "escalate"
     )
 
-    workflow.add_conditional_edges(
-        "retrieve",
-        lambda s: "end" if getattr(s, "error", None) else "draft",
-        {"draft": "draft", "end": END}
-    )
 
-    workflow.add_conditional_edges(
-        "draft",
-        lambda s: "end" if getattr(s, "error", None) else "review",
-        {"review": "review", "end": END}
+def route_after_refine(s) -> str:
+    return (
+        "end" if getattr(s, "error", None)
+        else "review" if int(getattr(s, "retries", 0)) < MAX_RETRIES
+        else "escalate"
     )
 
-    workflow.add_conditional_edges(
-        "review",
-        lambda s: (
-            "end" if getattr(s, "error", None)
-            else "end" if getattr(s, "review_decision", None) == "approved"
-            else "end" if getattr(s, "review_decision", None) == "rejected" and getattr(s, "sensitive", False)
-            else "refine" if getattr(s, "review_decision", None) == "rejected" and int(getattr(s, "retries", 0)) < MAX_RETRIES
-            else "escalate"
-        ),
-        {"refine": "refine", "escalate": "escalate", "end": END}
-    )
 
-    workflow.add_conditional_edges(
-        "refine",
-        lambda s: (
-            "end" if getattr(s, "error", None)
-            else "review" if int(getattr(s, "retries", 0)) < MAX_RETRIES
-            else "escalate"
-        ),
-        {"review": "review", "escalate": "escalate", "end": END}
-    )
+ENTRY_POINT = "classify"
+
+NODES = (
+    ("classify", classify),
+    ("retrieve", retrieve),
+    ("draft", draft),
+    ("review", review),
+    ("refine", refine),
+    ("escalate", escalate),
+)
+
+# node -> (router, router result -> next node); "end" maps to END
+ROUTES = {
+    "classify": (_error_or("retrieve"), {"retrieve": "retrieve", "end": END}),
+    "retrieve": (_error_or("draft"), {"draft": "draft", "end": END}),
+    "draft": (_error_or("review"), {"review": "review", "end": END}),
+    "review": (route_after_review, {"refine": "refine", "escalate": "escalate", "end": END}),
+    "refine": (route_after_refine, {"review": "review", "escalate": "escalate", "end": END}),
+}
+
+# Unconditional edges
+EDGES = {"escalate": END}
+
+
+def graph_nodes(instrument: bool = None):
+    """(name, fn) for every node, wrapped with the metrics hook when instrumenting."""
+    if instrument is None:
+        instrument = config.METRICS_ENABLED
+    # Per-node latency/count/error metrics (see app/metrics.py)
+    wrap = instrument_node if instrument else (lambda name, fn: fn)
+    return [(name, wrap(name, fn)) for name, fn in NODES]
+
 
-    workflow.add_edge("escalate", END)
+def build_graph(instrument: bool = None, checkpointer=None):
+    """
+    Compile the LangGraph workflow. With a checkpointer (app/checkpoint.py) every
+    run needs a configurable thread_id and can be resumed from its last step.
+    """
+    from langgraph.graph import StateGraph
+
+    workflow = StateGraph(GraphState)
+
+    # Add nodes
+    for name, fn in graph_nodes(instrument):
+        workflow.add_node(name, fn)
+
+    # Entry point
+    workflow.set_entry_point(ENTRY_POINT)
+
+    # === Conditional edges with error handling ===
+    for source, (router, targets) in ROUTES.items():
+        workflow.add_conditional_edges(source, router, targets)
+
+    for source, target in EDGES.items():
+        workflow.add_edge(source, target)
 
     # ✅ Compile workflow with recursion limit
-    graph = workflow.compile()
+    graph = workflow.compile(checkpointer=checkpointer)
     return graph
 
 
-# Export compiled graph as 'app' for LangGraph
-app = build_graph()  # <- Changed from 'graph' to 'app'
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """The process-wide compiled graph, built on first use."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+
+def __getattr__(name: str):
+    # Export compiled graph as 'app' for LangGraph (langgraph.json: app.graph:app), built lazily
+    if name == "app":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -94,7 +144,7 @@ if __name__ == "__main__":
 
     for sample in samples:
         print(f"\n=== Ticket: {sample['subject']} - {sample['description']} ===")
-        result = app.invoke(  # <- Updated from 'graph.invoke' to 'app.invoke'
+        result = get_graph().invoke(
             {
                 "subject": sample['subject'],
                 "description": sample['description'],
@@ -0,0 +1,295 @@
+# app/kb_snapshot.py
+"""
+Read-only, memory-mapped snapshot of the per-category BM25 indexes.
+
+`python -m app.serve` writes the snapshot once in the parent process and
+points the uvicorn workers at it through KB_INDEX_PATH. A worker mmaps the
+file instead of reading the corpus and building its own index. The pages
+are then shared through the OS page cache, and a worker starts without
+indexing anything.
+
+Layout (native byte order; every section starts on an 8-byte boundary):
+
+    header    MAGIC, uint32 format version, uint32 byte-order mark,
+              uint64 metadata offset, uint64 metadata length
+    sections  per category:
+                ids       string table of doc ids, in corpus order
+                texts     string table of doc texts
+                id_order  uint32 doc positions sorted by doc id (lookup by id)
+                terms     string table of index terms, sorted
+                starts    uint64 first posting of each term (len(terms) + 1)
+                docs      uint32 doc position of each posting
+                impacts   float64 BM25 impact of each posting
+    metadata  JSON: build id, k1, b and each category's section offsets
+
+A string table is uint64 offsets (count + 1) followed by the UTF-8 blob.
+Impacts are stored exactly as BM25Index computed them, so rankings match an
+in-process index bit for bit.
+
+KB_INDEX_PATH may also name a directory of one-category snapshots
+(<Category>.bin), as kept up to date by `scripts/ingest.py bulk`; see
+open_snapshot.
+"""
+import array
+import json
+import mmap
+import os
+import struct
+import time
+from collections.abc import Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.bm25 import BM25Index, query_terms, top_k
+
+MAGIC = b"SAKBIDX1"
+FORMAT_VERSION = 1
+_BYTE_ORDER_MARK = 0x01020304
+_HEADER = struct.Struct("=8sIIQQ")
+
+for _typecode, _size in (("I", 4), ("Q", 8), ("d", 8)):
+    assert array.array(_typecode).itemsize == _size, f"array '{_typecode}' is not {_size} bytes on this platform"
+
+
+# === Writing ===
+
+def _align(f):
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+def _write_array(f, typecode: str, values) -> int:
+    _align(f)
+    offset = f.tell()
+    array.array(typecode, values).tofile(f)
+    return offset
+
+
+def _write_strings(f, strings: List[str]) -> Dict[str, int]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    table = {"count": len(encoded), "offsets": _write_array(f, "Q", offsets), "blob": f.tell()}
+    for data in encoded:
+        f.write(data)
+    return table
+
+
+def _write_category(f, ids: List[str], texts: List[str], index: BM25Index) -> Dict[str, Any]:
+    terms = sorted(index.postings)
+    starts = [0]
+    for term in terms:
+        starts.append(starts[-1] + len(index.postings[term]))
+    section = {
+        "size": index.size,
+        "ids": _write_strings(f, ids),
+        "texts": _write_strings(f, texts),
+        "id_order": _write_array(f, "I", sorted(range(len(ids)), key=ids.__getitem__)),
+        "terms": _write_strings(f, terms),
+        "starts": _write_array(f, "Q", starts),
+    }
+    docs, impacts = array.array("I"), array.array("d")
+    for term in terms:
+        term_docs, term_impacts = zip(*index.postings[term])
+        docs.extend(term_docs)
+        impacts.extend(term_impacts)
+    section["docs"] = _write_array(f, "I", docs)
+    section["impacts"] = _write_array(f, "d", impacts)
+    return section
+
+
+def write_snapshot(path: str, categories: Dict[str, Tuple[List[str], List[str], BM25Index]]) -> str:
+    """
+    Write {category: (doc ids, texts, index)} to `path`. The file is written
+    next to `path` and renamed over it, so readers never see a partial snapshot.
+    Returns the build id.
+    """
+    build_id = f"{time.time_ns():x}"
+    k1 = b = None
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        sections = {}
+        for category, (ids, texts, index) in categories.items():
+            sections[category] = _write_category(f, ids, texts, index)
+            k1, b = index.k1, index.b
+        metadata = json.dumps({"build_id": build_id, "k1": k1, "b": b, "categories": sections}).encode("utf-8")
+        _align(f)
+        meta_offset = f.tell()
+        f.write(metadata)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDER_MARK, meta_offset, len(metadata)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return build_id
+
+
+# === Reading ===
+
+class _Strings(Sequence):
+    """A string table read straight from the mapping; strings are decoded on access."""
+
+    def __init__(self, buf: memoryview, table: Dict[str, int]):
+        self._buf = buf
+        self._count = table["count"]
+        self._offsets = buf[table["offsets"]:table["offsets"] + 8 * (self._count + 1)].cast("Q")
+        self._blob = table["blob"]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def raw(self, i: int) -> bytes:
+        return bytes(self._buf[self._blob + self._offsets[i]:self._blob + self._offsets[i + 1]])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("string table index out of range")
+        return self.raw(i).decode("utf-8")
+
+
+class _TextsById:
+    """doc id -> text lookup for resolve_context, by binary search over id_order."""
+
+    def __init__(self, ids: _Strings, texts: _Strings, id_order: memoryview):
+        self._ids = ids
+        self._texts = texts
+        self._order = id_order
+
+    def get(self, doc_id: str, default=None):
+        key = doc_id.encode("utf-8")
+        lo, hi = 0, len(self._order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ids.raw(self._order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._order) and self._ids.raw(self._order[lo]) == key:
+            return self._texts[self._order[lo]]
+        return default
+
+
+class MmapBM25Index:
+    """BM25Index backed by a snapshot section; score_terms and search return the same results."""
+
+    def __init__(self, buf: memoryview, section: Dict[str, Any], k1: float, b: float):
+        self.k1 = k1
+        self.b = b
+        self.size = section["size"]
+        self._terms = _Strings(buf, section["terms"])
+        n_terms = len(self._terms)
+        self._starts = buf[section["starts"]:section["starts"] + 8 * (n_terms + 1)].cast("Q")
+        n_postings = self._starts[n_terms]
+        self._docs = buf[section["docs"]:section["docs"] + 4 * n_postings].cast("I")
+        self._impacts = buf[section["impacts"]:section["impacts"] + 8 * n_postings].cast("d")
+
+    def _span(self, term: str) -> Optional[Tuple[int, int]]:
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self._terms)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._terms.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._terms) and self._terms.raw(lo) == key:
+            return self._starts[lo], self._starts[lo + 1]
+        return None
+
+    def score_terms(self, terms) -> Dict[int, float]:
+        """Accumulate BM25 scores for already-tokenized terms."""
+        scores: Dict[int, float] = {}
+        for term in terms:
+            span = self._span(term)
+            if span is None:
+                continue
+            start, end = span
+            for doc_id, impact in zip(self._docs[start:end], self._impacts[start:end]):
+                scores[doc_id] = scores.get(doc_id, 0.0) + impact
+        return scores
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (doc_id, score) pairs, best first."""
+        return top_k(self.score_terms(query_terms(query)), k)
+
+
+class KBSnapshot:
+    """An open snapshot file. Sections are views into one read-only mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, meta_offset, meta_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} KB snapshot")
+        if byte_order != _BYTE_ORDER_MARK:
+            raise ValueError(f"{path} was written on a machine with a different byte order")
+        metadata = json.loads(self._mmap[meta_offset:meta_offset + meta_length])
+        self.build_id: str = metadata["build_id"]
+        self._k1 = metadata["k1"]
+        self._b = metadata["b"]
+        self._sections: Dict[str, Dict[str, Any]] = metadata["categories"]
+        self._buf = memoryview(self._mmap)
+
+    def __contains__(self, category: str) -> bool:
+        return category in self._sections
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._sections)
+
+    def version(self, category: str) -> str:
+        return self.build_id
+
+    def category(self, category: str) -> Tuple[_Strings, _Strings, MmapBM25Index, _TextsById]:
+        """(doc ids, texts, index, text by doc id) for one category."""
+        section = self._sections[category]
+        ids = _Strings(self._buf, section["ids"])
+        texts = _Strings(self._buf, section["texts"])
+        id_order = self._buf[section["id_order"]:section["id_order"] + 4 * len(ids)].cast("I")
+        index = MmapBM25Index(self._buf, section, self._k1, self._b)
+        return ids, texts, index, _TextsById(ids, texts, id_order)
+
+
+class KBSnapshotDir:
+    """
+    One snapshot file per category (<Category>.bin) in a directory, so a
+    category can be re-indexed without rewriting the others. Categories with
+    no file fall back to the in-process index.
+    """
+
+    SUFFIX = ".bin"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshots: Dict[str, KBSnapshot] = {}
+        for name in sorted(os.listdir(path)):
+            if name.endswith(self.SUFFIX):
+                snapshot = KBSnapshot(os.path.join(path, name))
+                for category in snapshot.categories:
+                    self._snapshots[category] = snapshot
+
+    def __contains__(self, category: str) -> bool:
+        return category in self._snapshots
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._snapshots)
+
+    def version(self, category: str) -> str:
+        return self._snapshots[category].build_id
+
+    def category(self, category: str):
+        return self._snapshots[category].category(category)
+
+
+def open_snapshot(path: str):
+    """KBSnapshot for a snapshot file, KBSnapshotDir for a directory of per-category snapshots."""
+    if os.path.isdir(path):
+        return KBSnapshotDir(path)
+    return KBSnapshot(path)
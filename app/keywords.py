@@ -0,0 +1,113 @@
+# app/keywords.py
+"""
+Keyword matching shared by classify and review.
+
+All category keyword sets and review policy patterns are compiled once into a
+single keyword table. A scan lowercases the text once and returns every hit
+along with the groups (categories / policies) its keyword belongs to.
+Scans of ticket text are memoized, so classify and review share one pass.
+
+Matching keeps the original substring semantics: a keyword matches anywhere
+in the text ("api" matches "rapid", "error" matches "terror"), exactly as the
+per-node `word in text` checks did. The whole table is one compiled regex
+alternation, longest keyword first. After each hit the search resumes one
+character later rather than past the match, so overlapping keywords are all
+reported ("crashack" hits both "crash" and "hack"). At each position the
+longest keyword wins, and its hit carries the groups of every keyword that is
+a prefix of it ("billing" also counts as "bill").
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+# Category order is classification priority
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "Billing": ["invoice", "refund", "payment", "bill", "billing"],
+    "Technical": ["server", "error", "bug", "crash", "latency", "api"],
+    "Security": ["hack", "phish", "breach", "password", "2fa", "unauthorized"],
+}
+
+# Review policy groups
+SENSITIVE = "sensitive"
+FINANCIAL = "financial"
+DEMAND = "demand"
+POLICY_PATTERNS: Dict[str, List[str]] = {
+    SENSITIVE: ["password", "ssn", "credit card"],
+    FINANCIAL: ["refund"],
+    DEMAND: ["demand", "$"],
+}
+
+
+class Hit(NamedTuple):
+    keyword: str
+    groups: Tuple[str, ...]
+    start: int  # offset in the lowercased text
+
+
+class KeywordMatcher:
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self._groups: Dict[str, Tuple[str, ...]] = {}
+        for group, words in groups.items():
+            for word in words:
+                word = word.lower()
+                if group not in self._groups.get(word, ()):
+                    self._groups[word] = self._groups.get(word, ()) + (group,)
+        self._patterns: Dict[Optional[FrozenSet[str]], Tuple[Optional[Pattern], Dict[str, Tuple[str, ...]]]] = {}
+        self._all = self._pattern(None)
+
+    def _pattern(self, only: Optional[FrozenSet[str]]) -> Tuple[Optional[Pattern], Dict[str, Tuple[str, ...]]]:
+        """(one alternation over the keywords, longest first; keyword -> groups incl. its prefixes)."""
+        compiled = self._patterns.get(only)
+        if compiled is None:
+            words = [w for w, g in self._groups.items() if only is None or only.intersection(g)]
+            hit_groups = {
+                word: tuple(dict.fromkeys(g for w in words if word.startswith(w) for g in self._groups[w]))
+                for word in words
+            }
+            ordered = sorted(words, key=lambda w: (-len(w), w))
+            pattern = re.compile("|".join(map(re.escape, ordered))) if ordered else None
+            compiled = self._patterns[only] = (pattern, hit_groups)
+        return compiled
+
+    def scan(self, text: str, groups: Optional[Iterable[str]] = None) -> Tuple[Hit, ...]:
+        """Every keyword hit in `text`, in order; `groups` restricts the scan to those groups."""
+        pattern, hit_groups = self._all if groups is None else self._pattern(frozenset(groups))
+        if pattern is None:
+            return ()
+        low = (text or "").lower()
+        hits = []
+        search = pattern.search
+        m = search(low)
+        while m is not None:
+            keyword = m.group()
+            hits.append(Hit(keyword, hit_groups[keyword], m.start()))
+            m = search(low, m.start() + 1)
+        return tuple(hits)
+
+    def groups(self, text: str, groups: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+        return frozenset(g for hit in self.scan(text, groups) for g in hit.groups)
+
+
+MATCHER = KeywordMatcher({**CATEGORY_KEYWORDS, **POLICY_PATTERNS})
+
+
+@lru_cache(maxsize=4096)
+def scan(text: str) -> Tuple[Hit, ...]:
+    """Memoized MATCHER.scan; a second node asking about the same text pays a dict lookup."""
+    return MATCHER.scan(text)
+
+
+def match_groups(text: str) -> FrozenSet[str]:
+    return frozenset(g for hit in scan(text) for g in hit.groups)
+
+
+def category_for(groups: FrozenSet[str]) -> str:
+    for category in CATEGORY_KEYWORDS:
+        if category in groups:
+            return category
+    return "General"
+
+
+def ticket_match_text(subject: str, description: str) -> str:
+    """The text classify and review both scan, built identically so the scan is shared."""
+    return f"{subject or ''} {description or ''}"
@@ -0,0 +1,393 @@
+# app/llm.py
+"""
+Model backend for classify, draft and review.
+
+With LLM_BACKEND unset the nodes keep their keyword heuristics and nothing
+here runs. With "stub" or "http" they render CLASSIFIER_PROMPT,
+DRAFT_PROMPT and REVIEW_PROMPT (app/prompts.py) and send them through
+get_llm().complete(prompt).
+
+A backend takes a list of prompts and returns one completion per prompt:
+
+- StubBackend answers in process and deterministically: the classifier
+  prompt gets the keyword category, the draft prompt a reply built from the
+  ticket and context, and the review prompt a JSON verdict. An optional
+  fixed delay per call stands in for model latency.
+- HTTPBackend posts {"model", "prompts", "max_tokens"} to LLM_URL and
+  reads {"completions": [...]}. `python -m app.llm` serves that API from a
+  StubBackend, for local testing against a real socket.
+
+Model calls dominate ticket latency, and a batch of prompts costs about as
+much as one. MicroBatcher therefore collects prompts from concurrent
+tickets (nodes run on executor threads) and sends them as one call. It
+waits at most LLM_BATCH_LINGER_MS after the first prompt arrives, or until
+LLM_BATCH_MAX_SIZE prompts are waiting, then splits the completions back to
+each caller. A longer linger or a bigger batch means fewer calls per ticket
+at the price of up to one linger of extra latency. Up to
+LLM_BATCH_CONCURRENCY batches are in flight at once. Identical prompts in
+one batch are sent once.
+
+Nodes call generate(template, **variables) rather than complete(prompt).
+With LLM_CACHE_ENABLED the answer is looked up first in the prompt cache
+(app/llm_cache.py), keyed on the template, the variables and the backend's
+model parameters.
+"""
+import abc
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+from app import config
+from app.llm_cache import PromptCache, prompt_cache_key
+from app.keywords import MATCHER, SENSITIVE, category_for, match_groups
+
+logger = logging.getLogger("support-agent")
+
+CATEGORIES = ("Billing", "Technical", "Security", "General")
+
+# Markers that tell the stub which of the prompts in app/prompts.py it was sent
+_CLASSIFY_MARKER = "Classify the following ticket"
+_DRAFT_MARKER = "draft reply to the customer"
+_REVIEW_MARKER = "You are a reviewer"
+_REFUND_PROMISE = re.compile(r"\b(?:we|i)(?: will|'ll)(?: \w+)? (?:refund|reimburse|issue a refund)", re.IGNORECASE)
+
+
+def _field(prompt: str, name: str, until: Optional[str] = None) -> str:
+    """The text after `name:` in a rendered prompt, up to the `until:` line (or the end)."""
+    start = prompt.find(f"{name}:")
+    if start < 0:
+        return ""
+    start += len(name) + 1
+    end = prompt.find(f"\n{until}:", start) if until else -1
+    return prompt[start:end if end >= 0 else len(prompt)].strip()
+
+
+def stub_completion(prompt: str) -> str:
+    """A deterministic answer to one rendered prompt, in the shape a model is asked for."""
+    if _CLASSIFY_MARKER in prompt:
+        return category_for(match_groups(_field(prompt, "Ticket")))
+    if _REVIEW_MARKER in prompt:
+        draft = prompt[prompt.find("Draft:") + len("Draft:"):prompt.rfind("Return JSON:")].strip()
+        if SENSITIVE in MATCHER.groups(draft, groups=(SENSITIVE,)):
+            return json.dumps({"status": "rejected", "feedback": "Remove any sensitive information from the reply."})
+        if _REFUND_PROMISE.search(draft):
+            return json.dumps({"status": "rejected", "feedback": "Do not promise refunds or financial guarantees."})
+        return json.dumps({"status": "approved", "final_reply": draft})
+    if _DRAFT_MARKER in prompt:
+        ticket = _field(prompt, "Ticket", until="Context")
+        context = _field(prompt, "Context", until="Feedback")
+        return (f"Hello! Thank you for contacting our support team about: '{ticket}'.\n\n"
+                f"Here's some information that may help:\n{context}\n\n"
+                "Please let me know if you need any further assistance.\nBest regards,\nSupport Team")
+    return ""
+
+
+class LLMBackend(abc.ABC):
+    """One model call for a list of prompts; returns one completion per prompt, in order."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def complete(self, prompts: Sequence[str]) -> List[str]:
+        ...
+
+    def params(self) -> Dict[str, Any]:
+        """Everything besides the prompt that shapes a completion (part of the prompt cache key)."""
+        return {"backend": self.name}
+
+    def close(self):
+        pass
+
+
+class StubBackend(LLMBackend):
+    name = "stub"
+
+    def __init__(self, latency_seconds: float = 0.0):
+        # Simulated model latency per call, whatever the batch size
+        self.latency_seconds = latency_seconds
+
+    def complete(self, prompts: Sequence[str]) -> List[str]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [stub_completion(prompt) for prompt in prompts]
+
+
+class HTTPBackend(LLMBackend):
+    name = "http"
+
+    def __init__(self, url: str, model: str, max_tokens: int, timeout_seconds: float):
+        self.url = url
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout_seconds = timeout_seconds
+
+    def complete(self, prompts: Sequence[str]) -> List[str]:
+        body = json.dumps({"model": self.model, "prompts": list(prompts), "max_tokens": self.max_tokens}).encode()
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+            completions = json.loads(response.read())["completions"]
+        if len(completions) != len(prompts):
+            raise ValueError(f"Backend returned {len(completions)} completions for {len(prompts)} prompts")
+        return completions
+
+    def params(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model": self.model, "max_tokens": self.max_tokens}
+
+
+class MicroBatcher:
+    """
+    Thread-safe front of a backend: complete(prompt) blocks until the batch
+    the prompt joined has been answered, or raises TimeoutError after
+    result_timeout seconds (LLM_RESULT_TIMEOUT_SECONDS).
+    """
+
+    def __init__(self, backend: LLMBackend, max_batch_size: int = None, linger_seconds: float = None,
+                 concurrency: int = None, cache: Optional[PromptCache] = None, result_timeout: float = None):
+        self.backend = backend
+        self.cache = cache
+        self._params = backend.params()
+        self.max_batch_size = max(1, config.LLM_BATCH_MAX_SIZE if max_batch_size is None else max_batch_size)
+        self.linger_seconds = config.LLM_BATCH_LINGER_MS / 1000 if linger_seconds is None else linger_seconds
+        self.result_timeout = config.LLM_RESULT_TIMEOUT_SECONDS if result_timeout is None else result_timeout
+        concurrency = max(1, config.LLM_BATCH_CONCURRENCY if concurrency is None else concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="llm")
+        self._slots = threading.Semaphore(concurrency)
+        self._cond = threading.Condition()
+        # (prompt, future, arrival time), oldest first
+        self._pending: List[tuple] = []
+        self._closed = False
+        self.calls = 0
+        self.prompts = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.linger_seconds_total = 0.0
+        self._thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+        self._thread.start()
+
+    def complete(self, prompt: str) -> str:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("LLM batcher is closed")
+            self._pending.append((prompt, future, time.monotonic()))
+            self._cond.notify()
+        try:
+            return future.result(self.result_timeout)
+        except FutureTimeoutError:
+            with self._cond:
+                self.timeouts += 1
+                # Not sent yet: drop it so no batch calls the model for it; if sent, its answer is ignored
+                self._pending = [entry for entry in self._pending if entry[1] is not future]
+            raise TimeoutError(f"No completion from {self.backend.name} within {self.result_timeout}s") from None
+
+    def generate(self, template: str, **variables: Any) -> str:
+        """Render template with variables and complete it, answering from the prompt cache when possible."""
+        if self.cache is None:
+            return self.complete(template.format(**variables))
+        key = prompt_cache_key(template, variables, self._params)
+        completion = self.cache.get(key)
+        if completion is None:
+            completion = self.complete(template.format(**variables))
+            self.cache.put(key, completion)
+        return completion
+
+    def _run(self):
+        while True:
+            # Form the next batch only once a call slot is free: while every slot is busy,
+            # waiting prompts pile up into a bigger batch instead of queueing as small ones
+            self._slots.acquire()
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    self._slots.release()
+                    return
+                # Linger from the first prompt's arrival, so no prompt waits longer than one linger
+                deadline = self._pending[0][2] + self.linger_seconds
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+                self.calls += 1
+                self.prompts += len(batch)
+                self.linger_seconds_total += time.monotonic() - batch[0][2]
+            self._pool.submit(self._call, batch)
+
+    def _call(self, batch: List[tuple]):
+        # Duplicate tickets in flight together send the same prompt; ask once
+        unique = list(dict.fromkeys(prompt for prompt, _, _ in batch))
+        try:
+            completions = list(self.backend.complete(unique))
+            if len(completions) != len(unique):
+                raise ValueError(f"{self.backend.name} returned {len(completions)} completions for {len(unique)} prompts")
+            answers = dict(zip(unique, completions))
+        except Exception as e:
+            with self._cond:
+                self.errors += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for prompt, future, _ in batch:
+            future.set_result(answers[prompt])
+
+    def close(self):
+        """Answer the prompts already waiting, then stop."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        self.backend.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = {
+                "backend": self.backend.name,
+                "calls": self.calls,
+                "prompts": self.prompts,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "pending": len(self._pending),
+                "batch_size_avg": round(self.prompts / self.calls, 3) if self.calls else 0.0,
+                "linger_ms_avg": round(self.linger_seconds_total / self.calls * 1000, 3) if self.calls else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "linger_ms": self.linger_seconds * 1000,
+            }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+
+# === Parsing model output ===
+
+def parse_category(text: str) -> Optional[str]:
+    """The first category named in a classifier completion, or None."""
+    match = re.search(r"\b(" + "|".join(CATEGORIES) + r")\b", text or "", re.IGNORECASE)
+    return match.group(1).capitalize() if match else None
+
+
+def parse_review(text: str) -> Optional[Dict[str, Any]]:
+    """The JSON verdict in a review completion ({"status": ...}), or None when there is none."""
+    start, end = (text or "").find("{"), (text or "").rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        verdict = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(verdict, dict) or verdict.get("status") not in ("approved", "rejected"):
+        return None
+    return verdict
+
+
+# === Process-wide client ===
+
+_llm: Optional[MicroBatcher] = None
+_llm_lock = threading.Lock()
+
+
+def make_backend(name: str = None) -> Optional[LLMBackend]:
+    name = (config.LLM_BACKEND if name is None else name).lower()
+    if name in ("", "none", "heuristic"):
+        return None
+    if name == "stub":
+        return StubBackend(config.LLM_STUB_LATENCY_MS / 1000)
+    if name == "http":
+        return HTTPBackend(config.LLM_URL, config.LLM_MODEL, config.LLM_MAX_TOKENS, config.LLM_TIMEOUT_SECONDS)
+    raise ValueError(f"Unknown LLM_BACKEND {name!r} (expected stub, http or none)")
+
+
+def get_llm() -> Optional[MicroBatcher]:
+    """The shared batcher for LLM_BACKEND, or None when the nodes use their heuristics."""
+    global _llm
+    if _llm is not None or not config.LLM_BACKEND:
+        return _llm
+    with _llm_lock:
+        if _llm is None:
+            backend = make_backend()
+            if backend is not None:
+                logger.info(f"Model backend: {backend.name}")
+                cache = PromptCache(
+                    max_entries=config.LLM_CACHE_SIZE,
+                    ttl_seconds=config.LLM_CACHE_TTL_SECONDS,
+                    db_path=config.LLM_CACHE_DB or None,
+                    max_bytes=config.LLM_CACHE_MAX_BYTES,
+                ) if config.LLM_CACHE_ENABLED else None
+                _llm = MicroBatcher(backend, cache=cache)
+    return _llm
+
+
+def set_llm(llm: Optional[MicroBatcher]) -> Optional[MicroBatcher]:
+    """Swap the shared client (benchmarks, tests); returns the previous one."""
+    global _llm
+    with _llm_lock:
+        previous, _llm = _llm, llm
+    return previous
+
+
+def llm_stats() -> Dict[str, Any]:
+    return dict(_llm.stats(), enabled=True) if _llm is not None else {"enabled": False}
+
+
+def shutdown_llm():
+    llm = set_llm(None)
+    if llm is not None:
+        llm.close()
+
+
+# === Stub server ===
+
+class _StubHandler(BaseHTTPRequestHandler):
+    backend: StubBackend = None
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+            payload = json.dumps({"model": body.get("model"), "completions": self.backend.complete(body["prompts"])})
+            status = 200
+        except (ValueError, KeyError, TypeError) as e:
+            payload, status = json.dumps({"error": str(e)}), 400
+        data = payload.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic stub model server for LLM_BACKEND=http")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=config.LLM_STUB_LATENCY_MS,
+                        help="Simulated model latency per call")
+    args = parser.parse_args()
+    _StubHandler.backend = StubBackend(args.latency_ms / 1000)
+    server = ThreadingHTTPServer((args.host, args.port), _StubHandler)
+    print(f"Stub model server on http://{args.host}:{args.port}/v1/complete")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# app/llm_cache.py
+"""
+Prompt/response cache for model calls.
+
+Entries are content-addressed: the key is a SHA-256 of the prompt template,
+the variables it was rendered with and the model parameters (backend, model,
+max_tokens). Duplicate tickets send the same CLASSIFIER_PROMPT, and drafts
+built from the same template and context send the same REVIEW_PROMPT. Those
+are answered from the cache instead of paying for another model call. Editing
+a template or switching models changes every key, so stale answers are
+never served.
+
+There are two tiers:
+
+- A bounded in-memory LRU (max_entries), checked first.
+- An optional SQLite file, shared by the worker processes on a host and
+  kept across restarts. A disk hit is promoted to memory. The file is held
+  under max_bytes of stored responses: once it grows past that, the least
+  recently used rows are deleted until it is back under 90% of the limit.
+  Memory hits do not write to disk on the read path. Their last-use times
+  are recorded and written in one batch just before eviction, so an entry
+  that stays hot in memory is not evicted from disk as if it were cold.
+
+Every entry expires ttl_seconds after it was written, in both tiers.
+Completions are only cached after a successful call, so errors are never
+cached.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+def prompt_cache_key(template: str, variables: Mapping[str, Any], params: Mapping[str, Any]) -> str:
+    payload = json.dumps([template, variables, params], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Bytes of responses on disk, as last counted plus what this process wrote since
+        self._disk_bytes = 0
+        # key -> last memory hit, not yet written to the disk tier
+        self._touched: Dict[str, float] = {}
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # A crash may lose the last few entries; they are only re-asked of the model
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, expires_at REAL, last_used REAL, size INTEGER, value TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._disk_bytes = self._count_bytes()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.expired = 0
+
+    def _count_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits_memory += 1
+                    if self._db is not None:
+                        self._touched[key] = now
+                        if len(self._touched) >= self.max_entries:
+                            self._flush_touched()
+                    return entry[1]
+                del self._entries[key]
+                self.expired += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                    self._store(key, row[0], row[1])
+                    self.hits_disk += 1
+                    return row[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._store(key, expires_at, value)
+            if self._db is not None:
+                size = len(value.encode("utf-8"))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, expires_at, last_used, size, value) VALUES (?, ?, ?, ?, ?)",
+                    (key, expires_at, now, size, value),
+                )
+                self._disk_bytes += size
+                if self._disk_bytes > self.max_bytes:
+                    self._evict_disk(now)
+
+    def _store(self, key: str, expires_at: float, value: str):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self, now: float):
+        """Drop expired rows, then least recently used ones until the file is under 90% of max_bytes."""
+        self._flush_touched()
+        self.expired += self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        # Other workers write to the same file, so recount rather than trust the running total
+        total = self._count_bytes()
+        target = int(self.max_bytes * 0.9)
+        if total > target:
+            victims, freed = [], 0
+            for key, size in self._db.execute("SELECT key, size FROM llm_cache ORDER BY last_used"):
+                victims.append((key,))
+                freed += size
+                if total - freed <= target:
+                    break
+            self._db.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+            self.disk_evictions += len(victims)
+            total -= freed
+        self._disk_bytes = total
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany("UPDATE llm_cache SET last_used = ? WHERE key = ?",
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._disk_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.hits_memory + self.hits_disk
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "disk_bytes": self._disk_bytes,
+            "max_bytes": self.max_bytes,
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "expired": self.expired,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
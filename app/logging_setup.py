@@ -0,0 +1,168 @@
+# app/logging_setup.py
+"""
+Non-blocking, structured logging for the server.
+
+Log calls on the request path only enqueue the record. The put never
+blocks: when the queue is full the record is dropped and counted. A
+QueueListener thread formats each record as one JSON line and writes it to
+stdout and to a size-rotated file, so disk latency never reaches a request.
+
+Each JSON line carries ts, level, logger and msg, plus any ticket_id, node,
+latency_ms (and other whitelisted) fields passed via `extra=`. Tracebacks
+go in a single "exc" field instead of spanning lines. INFO and DEBUG
+records can be sampled (LOG_INFO_SAMPLE_RATE); warnings and errors are
+always kept.
+
+RotatingFileHandler is not safe across processes: two workers rotating the
+same file lose or interleave records. Under app.serve with several workers
+each process therefore writes its own file, LOG_FILE with the pid inserted
+(LOG_FILE_PER_PROCESS); set LOG_FILE empty to log to stdout only.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from app import config
+
+# Record attributes copied into the JSON line when a log call passes them via extra=
+STRUCTURED_FIELDS = ("ticket_id", "node", "latency_ms", "category", "escalated", "cached", "status", "count")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every WARNING+ record and a `rate` fraction of INFO/DEBUG records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking or erroring when full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (frames must not outlive the call),
+        # but leave JSON formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_atexit_registered = False
+_lock = threading.Lock()
+
+
+def _formatter() -> logging.Formatter:
+    if config.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def log_file_path() -> str:
+    """LOG_FILE, or with LOG_FILE_PER_PROCESS this process's own file next to it."""
+    if not config.LOG_FILE_PER_PROCESS:
+        return config.LOG_FILE
+    root, ext = os.path.splitext(config.LOG_FILE)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+def setup_logging() -> NonBlockingQueueHandler:
+    """Route the root logger through the queue; idempotent, and may be called again after shutdown_logging."""
+    global _listener, _queue_handler, _atexit_registered
+    with _lock:
+        if _queue_handler is not None:
+            return _queue_handler
+        formatter = _formatter()
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if config.LOG_FILE:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file_path(), maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT,
+                encoding="utf-8",
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=config.LOG_QUEUE_SIZE))
+        _queue_handler.addFilter(SamplingFilter(config.LOG_INFO_SAMPLE_RATE))
+        root = logging.getLogger()
+        root.setLevel(config.LOG_LEVEL)
+        root.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        if not _atexit_registered:
+            atexit.register(shutdown_logging)
+            _atexit_registered = True
+        return _queue_handler
+
+
+def shutdown_logging():
+    """Detach the queue from the root logger, drain queued records to the handlers and stop the listener thread."""
+    global _listener, _queue_handler
+    with _lock:
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _queue_handler = None
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def logging_stats() -> dict:
+    handler = _queue_handler
+    if handler is None:
+        return {"queued": 0, "dropped": 0, "sampled_out": 0}
+    sampled_out = sum(getattr(f, "sampled_out", 0) for f in handler.filters)
+    return {"queued": handler.queue.qsize(), "dropped": handler.dropped, "sampled_out": sampled_out}
@@ -0,0 +1,212 @@
+# app/metrics.py
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters and histograms are keyed by a tuple of label values and guarded by
+one lock per metric. instrument_node() wraps a graph node to record latency,
+invocations, errors and refine (retry-loop) passes per node and category.
+On the success path the hook records one histogram observation; invocation
+counts are read from the histogram at render time.
+"""
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+_log = logging.getLogger("support-agent")
+
+# Seconds; nodes are sub-millisecond today, model-backed nodes will be much slower
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: Any, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda kv: tuple(map(str, kv[0])))
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *labels: Any, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: Any):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def count(self, *labels: Any) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(((k, list(v)) for k, v in self._series.items()), key=lambda kv: tuple(map(str, kv[0])))
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = _labels(self.labelnames, labels, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:.9g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class HistogramCount:
+    """Exposes a histogram's per-series observation count as its own counter, at no recording cost."""
+
+    def __init__(self, histogram: Histogram, name: str, help: str):
+        self.histogram, self.name, self.help = histogram, name, help
+
+    def value(self, *labels: Any) -> float:
+        return float(self.histogram.count(*labels))
+
+    def render(self) -> List[str]:
+        h = self.histogram
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with h._lock:
+            items = sorted(((k, int(sum(v[:-1]))) for k, v in h._series.items()), key=lambda kv: tuple(map(str, kv[0])))
+        for labels, count in items:
+            lines.append(f"{self.name}{_labels(h.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], None]] = []
+        # A failing collector leaves its gauges stale; this makes that visible
+        self.collector_errors = self.register(Counter(
+            "support_metrics_collector_errors_total", "Collectors that raised while rendering /metrics",
+            ("collector",)))
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], None]):
+        """fn runs before every render, e.g. to copy external stats into gauges."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception:
+                name = getattr(fn, "__name__", repr(fn))
+                self.collector_errors.inc(name)
+                _log.exception(f"Metrics collector {name} failed", extra={"collector": name})
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_node_log = logging.getLogger("support-agent.nodes")
+
+NODE_LATENCY = REGISTRY.register(Histogram(
+    "support_node_latency_seconds", "Graph node latency", ("node", "category")))
+NODE_CALLS = REGISTRY.register(HistogramCount(
+    NODE_LATENCY, "support_node_invocations_total", "Graph node invocations"))
+NODE_ERRORS = REGISTRY.register(Counter(
+    "support_node_errors_total", "Graph node errors (raised or returned in 'error')", ("node", "category")))
+RETRY_LOOPS = REGISTRY.register(Counter(
+    "support_retry_loops_total", "Refine passes (review rejected and the ticket was retried)", ("category",)))
+
+
+def _field(state: Any, key: str) -> Any:
+    if isinstance(state, dict):
+        return state.get(key)
+    return getattr(state, key, None)
+
+
+def _category(state: Any, result: Any) -> str:
+    if result.__class__ is dict and result.get("category"):
+        return result["category"]
+    return _field(state, "category") or "unknown"
+
+
+def instrument_node(name: str, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Wrap a node so every call records latency, invocation, error and retry-loop metrics."""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        start = perf_counter()
+        try:
+            result = fn(state)
+        except Exception:
+            category = _category(state, None)
+            NODE_ERRORS.inc(name, category)
+            NODE_LATENCY.observe(perf_counter() - start, name, category)
+            raise
+        elapsed = perf_counter() - start
+        category = _category(state, result)
+        NODE_LATENCY.observe(elapsed, name, category)
+        if result.__class__ is dict and "error" in result and result["error"]:
+            NODE_ERRORS.inc(name, category)
+            error = result["error"]
+            _node_log.warning(
+                f"Node returned an error: {error.get('message') if isinstance(error, dict) else error}",
+                extra={"node": name, "category": category, "ticket_id": _field(state, "ticket_id"),
+                       "latency_ms": round(elapsed * 1000, 3)},
+            )
+        if name == "refine":
+            RETRY_LOOPS.inc(category)
+        return result
+
+    return wrapper
@@ -1,6 +1,10 @@
 # app/nodes/classify.py
 from typing import Any, Dict, Optional
 
+from app.keywords import category_for, match_groups, ticket_match_text
+from app.llm import get_llm, parse_category
+from app.prompts import CLASSIFIER_PROMPT
+
 def _get(state: Any, key: str, default=None):
     try:
         return getattr(state, key)
@@ -10,24 +14,21 @@ def _get(state: Any, key: str, default=None):
 def classify(state: Any) -> Dict[str, Any]:
     try:
         # Get both subject and description
-        subject = (_get(state, "subject", "") or "").lower()
-        description = (_get(state, "description", "") or "").lower()
+        subject = _get(state, "subject", "") or ""
+        description = _get(state, "description", "") or ""
         
         # Fallback to ticket_text for backward compatibility
         if not description and _get(state, "ticket_text"):
-            description = (_get(state, "ticket_text", "") or "").lower()
+            description = _get(state, "ticket_text", "") or ""
             
-        # Combine subject and description for classification
-        combined_text = f"{subject} {description}".lower()
-        
-        if any(word in combined_text for word in ["invoice", "refund", "payment", "bill", "billing"]):
-            category = "Billing"
-        elif any(word in combined_text for word in ["server", "error", "bug", "crash", "latency", "api"]):
-            category = "Technical"
-        elif any(word in combined_text for word in ["hack", "phish", "breach", "password", "2fa", "unauthorized"]):
-            category = "Security"
-        else:
-            category = "General"
+        # One keyword pass over subject + description; review reuses the same scan
+        category = category_for(match_groups(ticket_match_text(subject, description)))
+
+        # With a model backend its answer wins; the keyword category stays as the fallback
+        llm = get_llm()
+        if llm is not None:
+            completion = llm.generate(CLASSIFIER_PROMPT, ticket_text=ticket_match_text(subject, description))
+            category = parse_category(completion) or category
 
         # ensure escalated present (propagate existing or false)
         escalated = bool(_get(state, "escalated", False))
@@ -1,6 +1,42 @@
 # app/nodes/draft.py
+import os
+import threading
 from typing import Any, Dict, List
 
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+
+from app.keywords import ticket_match_text
+from app.llm import get_llm
+from app.nodes.retrieve import context_block
+from app.prompts import DRAFT_PROMPT
+from app.state import append_draft, append_history
+
+# Reply templates, one per category (app/templates/replies/<category>.j2, extending base.j2)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "replies")
+DEFAULT_TEMPLATE = "general.j2"
+
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=False,  # plain-text replies
+    trim_blocks=True,
+    undefined=StrictUndefined,
+    auto_reload=False,
+)
+# Compiled once per category on first use
+_templates: Dict[str, Template] = {}
+_templates_lock = threading.Lock()
+
+def reply_template(category: str) -> Template:
+    """The compiled reply template for a category (the general one for unknown categories)."""
+    template = _templates.get(category)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(category)
+            if template is None:
+                template = _env.select_template([f"{category.lower()}.j2", DEFAULT_TEMPLATE])
+                _templates[category] = template
+    return template
+
 def _get(state: Any, key: str, default=None):
     try:
         return getattr(state, key)
@@ -16,7 +52,7 @@ def draft(state: Any) -> Dict[str, Any]:
         if not description and _get(state, "ticket_text"):
             description = _get(state, "ticket_text") or ""
             
-        context = _get(state, "context", []) or []
+        context_ids = _get(state, "context_ids", []) or []
         category = _get(state, "category", "General") or "General"
         escalated = bool(_get(state, "escalated", False))
         retries = int(_get(state, "retries", 0))
@@ -26,39 +62,34 @@ def draft(state: Any) -> Dict[str, Any]:
         all_drafts = _get(state, "all_drafts", []) or []
         all_feedback = _get(state, "all_feedback", []) or []
 
-        ctx_text = "\n".join(context) if context else "No context available."
+        # Fitted to the context budget (best-ranked documents first) and memoized per
+        # document set, so a redraft over the same documents reuses the block
+        ctx_text = context_block(context_ids) or "No context available."
 
+        llm = get_llm()
         # If escalated, draft a short escalation placeholder
         if escalated:
             reply = "This ticket has been escalated to a human agent."
+        elif llm is not None:
+            reply = llm.generate(
+                DRAFT_PROMPT,
+                ticket_text=ticket_match_text(subject, description),
+                context=ctx_text,
+                feedback=review_feedback if retries > 0 and review_feedback else "None",
+            ).strip()
         else:
-            # Create a more personalized response using subject and description
-            reply = f"Hello! Thank you for contacting our support team about: '{subject}'.\n\n"
-            
-            if retries > 0 and review_feedback:
-                # Incorporate reviewer feedback in the new draft
-                reply += f"I've reviewed your issue further: '{description}'.\n\n"
-            else:
-                reply += f"I understand your concern: '{description}'.\n\n"
-            
-            # Add category-specific intro
-            if category == "Billing":
-                reply += "Regarding your billing inquiry, I've found the following information:\n"
-            elif category == "Technical":
-                reply += "Regarding your technical issue, here's what I found that might help:\n"
-            elif category == "Security":
-                reply += "Regarding your security concern, here's some important information:\n"
-            else:
-                reply += "Here's some information that may help:\n"
-                
-            reply += f"{ctx_text}\n\n"
-            reply += "Please let me know if you need any further assistance.\n"
-            reply += "Best regards,\nSupport Team"
+            reply = reply_template(category).render(
+                subject=subject,
+                description=description,
+                # A redraft after a rejection acknowledges the further review
+                revised=retries > 0 and bool(review_feedback),
+                context=ctx_text,
+            )
         
-        # Track all drafts and feedback for logging
-        all_drafts.append(reply)
+        # Track recent drafts and feedback for logging (new capped lists, never mutated in place)
+        all_drafts = append_draft(all_drafts, reply)
         if review_feedback:
-            all_feedback.append(review_feedback)
+            all_feedback = append_history(all_feedback, review_feedback)
 
         return {
             "draft_reply": reply,
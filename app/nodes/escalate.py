@@ -1,11 +1,13 @@
 # app/nodes/escalate.py
 from typing import Any, Dict, List
-import csv
-import os
 import json
 from datetime import datetime
 
-ESCALATION_FILE = "data/escalations.csv"
+from app import config
+from app.escalation_writer import get_escalation_writer
+from app.state import expand_drafts
+
+ESCALATION_FILE = config.ESCALATION_FILE
 
 def _get(state: Any, key: str, default=None):
     try:
@@ -15,60 +17,47 @@ def _get(state: Any, key: str, default=None):
 
 def escalate(state: Any) -> Dict[str, Any]:
     try:
-        os.makedirs("data", exist_ok=True)
-        
         # Get all information for the escalation log
+        ticket_id = _get(state, "ticket_id", None)
         subject = _get(state, "subject", "")
         description = _get(state, "description", "")
         ticket_text = _get(state, "ticket_text", "")
         category = _get(state, "category", "")
-        context = _get(state, "context", []) or []
+        context_ids = _get(state, "context_ids", []) or []
         
         # Get all drafts and feedback for comprehensive logging
-        all_drafts = _get(state, "all_drafts", []) or []
+        all_drafts = expand_drafts(_get(state, "all_drafts", []) or [])
         all_feedback = _get(state, "all_feedback", []) or []
         
         # Fallback to the current draft if all_drafts is empty
         if not all_drafts and _get(state, "draft_reply"):
-            all_drafts.append(_get(state, "draft_reply"))
+            all_drafts = [_get(state, "draft_reply")]
             
         # Fallback to the current feedback if all_feedback is empty
         if not all_feedback and _get(state, "review_feedback"):
-            all_feedback.append(_get(state, "review_feedback"))
+            all_feedback = [_get(state, "review_feedback")]
         
         retries = str(_get(state, "retries", 0))
         timestamp = datetime.now().isoformat()
         
         # Create a detailed escalation record
         row = [
+            ticket_id,
             subject,
             description or ticket_text,
             category,
-            "; ".join(context),
+            "; ".join(context_ids),  # doc ids; the drafts below carry the text that was used
             json.dumps(all_drafts),  # Store all drafts as JSON string
             json.dumps(all_feedback),  # Store all feedback as JSON string
             retries,
             timestamp
         ]
         
-        # Check if the file exists to decide whether to write headers
-        write_header = not os.path.exists(ESCALATION_FILE)
-        
-        # Write to CSV
-        with open(ESCALATION_FILE, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if write_header:
-                writer.writerow([
-                    "subject", 
-                    "description", 
-                    "category", 
-                    "context", 
-                    "all_drafts", 
-                    "all_feedback", 
-                    "retries",
-                    "timestamp"
-                ])
-            writer.writerow(row)
+        # Hand the row to the background writer; it batches rows into the escalation store (or CSV)
+        writer = get_escalation_writer()
+        writer.submit(row)
+        if not config.ESCALATION_ASYNC:
+            writer.flush()
 
         return {"final_reply": "Escalated to human agent", "escalated": True}
     except Exception as e:
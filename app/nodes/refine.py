@@ -2,6 +2,7 @@
 from typing import Any, Dict
 from app.nodes.retrieve import retrieve
 from app.nodes.draft import draft as generate_draft
+from app.state import StateView
 
 MAX_RETRIES = 2
 
@@ -33,9 +34,6 @@ def refine(state: Any) -> Dict[str, Any]:
             }
 
 
-        # Create a refined state that incorporates the feedback
-        refined_state = dict(state) if hasattr(state, "items") else state.__dict__.copy()
-        
         # Preserve existing drafts and feedback for logging
         all_drafts = _get(state, "all_drafts", []) or []
         all_feedback = _get(state, "all_feedback", []) or []
@@ -43,15 +41,14 @@ def refine(state: Any) -> Dict[str, Any]:
         # Apply feedback to improve context retrieval
         # Note: The retrieve node will now use this feedback to prioritize better documents
         
-        # Run retrieval with the enhanced state (now with feedback)
-        retrieve_update = retrieve(refined_state)  # returns {"context": ...}
-        
-        # Create a new pseudo state with the updated context
-        pseudo_state = refined_state.copy()
-        pseudo_state.update(retrieve_update)
+        # Run retrieval as the retry: with the review feedback in the query. The first
+        # pass's scores are cached, so only the feedback terms are scored
+        retry_state = StateView(state, {"retries": new_retries})
+        retrieve_update = retrieve(retry_state)  # returns {"context_ids": ...}
         
-        # Generate new draft with the refined context
-        draft_update = generate_draft(pseudo_state)  # returns {"draft_reply": ...}
+        # Generate new draft with the refined context; the view layers the update
+        # over the state instead of copying it
+        draft_update = generate_draft(StateView(retry_state, retrieve_update))  # returns {"draft_reply": ...}
 
         # Merge all updates
         merged = {
@@ -62,6 +59,8 @@ def refine(state: Any) -> Dict[str, Any]:
         }
         merged.update(retrieve_update)
         merged.update(draft_update)
+        # retrieve/draft echo the pre-refine retry count; keep the incremented one
+        merged["retries"] = new_retries
         
         return merged
     except Exception as e:
@@ -1,7 +1,16 @@
 # app/nodes/retrieve.py
-from typing import Any, Dict, List
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
-# Expanded knowledge base with more specific documents
+from app import config
+from app.bm25 import BM25Index, query_terms, top_k
+from app.kb_snapshot import KBSnapshot, MmapBM25Index, open_snapshot, write_snapshot
+from app.retrievers import CATEGORY_TO_FOLDER, load_corpus
+
+# Fallback knowledge base, used when a category has no documents on disk
 MOCK_KB = {
     "Billing": [
         "Billing guide: invoices and refunds.",
@@ -37,7 +46,7 @@ def _get(state: Any, key: str, default=None):
         return state.get(key, default)
 
 def _filter_docs_by_query(docs: List[str], query: str) -> List[str]:
-    """Filter documents based on relevance to query"""
+    """Filter documents based on relevance to query (linear scan, kept as the benchmark baseline)"""
     if not query:
         return docs
     
@@ -52,6 +61,282 @@ def _filter_docs_by_query(docs: List[str], query: str) -> List[str]:
     # Return docs sorted by relevance score, highest first
     return [doc for doc, score in sorted(scored_docs, key=lambda x: x[1], reverse=True)]
 
+def _build_index(docs: List[str], mode: str):
+    """Index for the configured RETRIEVAL_MODE; every index exposes search(query, k)."""
+    if mode == "bm25":
+        return BM25Index(docs)
+    # NumPy is only needed for the vectorized modes
+    from app.vector_index import HashingIndex, TfidfIndex
+    if mode == "tfidf":
+        return TfidfIndex(docs)
+    if mode == "hashing":
+        return HashingIndex(docs)
+    raise ValueError(f"Unknown RETRIEVAL_MODE: {mode}")
+
+# One index per category, rebuilt when the corpus version or retrieval mode changes:
+# (version, doc ids, texts, index, text by doc id)
+_INDEXES: Dict[str, Tuple[Any, List[str], List[str], Any, Dict[str, str]]] = {}
+_INDEX_LOCK = threading.Lock()
+
+_FOLDER_TO_CATEGORY = {folder: category for category, folder in CATEGORY_TO_FOLDER.items()}
+
+def _category_docs(category: str) -> Tuple[Any, List[str], List[str]]:
+    """(corpus version, doc ids, texts) for a category from the on-disk corpus, falling back to MOCK_KB."""
+    version, documents = load_corpus(category)
+    if documents:
+        return version, [doc.doc_id for doc in documents], [doc.text for doc in documents]
+    texts = MOCK_KB.get(category, [])
+    return "mock", [f"mock:{category}:{i}" for i in range(len(texts))], texts
+
+# Read-only BM25 snapshot shared by serving workers (KB_INDEX_PATH, see app/serve.py and
+# scripts/ingest.py);
+# opened on first use. False once opening it has failed.
+_SNAPSHOT: Any = None
+
+def _snapshot() -> Optional[KBSnapshot]:
+    global _SNAPSHOT
+    if not config.KB_INDEX_PATH or config.RETRIEVAL_MODE != "bm25":
+        return None
+    if _SNAPSHOT is None:
+        with _INDEX_LOCK:
+            if _SNAPSHOT is None:
+                try:
+                    _SNAPSHOT = open_snapshot(config.KB_INDEX_PATH)
+                except (OSError, ValueError) as e:
+                    logging.getLogger("support-agent").warning(
+                        f"KB snapshot unavailable, indexing the corpus in-process: {e}")
+                    _SNAPSHOT = False
+    return _SNAPSHOT or None
+
+def _category_entry(category: str) -> Tuple[Any, List[str], List[str], Any, Dict[str, str]]:
+    """Cached index entry for a category: from the KB snapshot if one is configured, else built from the corpus."""
+    snapshot = _snapshot()
+    if snapshot is not None and category in snapshot:
+        # The snapshot is fixed at build time; corpus changes need a rebuild (app/serve.py)
+        version = ("snapshot", snapshot.version(category))
+        cached = _INDEXES.get(category)
+        if cached is None or cached[0] != version:
+            with _INDEX_LOCK:
+                cached = _INDEXES.get(category)
+                if cached is None or cached[0] != version:
+                    cached = _INDEXES[category] = (version, *snapshot.category(category))
+        return cached
+
+    version, documents = load_corpus(category)
+    if not documents:
+        version = "mock"
+    version = (version, config.RETRIEVAL_MODE)
+    cached = _INDEXES.get(category)
+    if cached is None or cached[0] != version:
+        with _INDEX_LOCK:
+            cached = _INDEXES.get(category)
+            if cached is None or cached[0] != version:
+                _, ids, texts = _category_docs(category)
+                cached = (version, ids, texts, _build_index(texts, config.RETRIEVAL_MODE), dict(zip(ids, texts)))
+                _INDEXES[category] = cached
+    return cached
+
+def build_snapshot(path: str) -> str:
+    """Index every category's current corpus with BM25 and write it as a KB snapshot; returns the build id."""
+    categories = {}
+    for category in CATEGORY_TO_FOLDER:
+        _, ids, texts = _category_docs(category)
+        categories[category] = (ids, texts, BM25Index(texts))
+    return write_snapshot(path, categories)
+
+def _category_of(doc_id: str) -> Optional[str]:
+    if doc_id.startswith("mock:"):
+        return doc_id.split(":", 2)[1]
+    return _FOLDER_TO_CATEGORY.get(doc_id.split("/", 1)[0])
+
+def _doc_text(doc_id: str) -> Optional[str]:
+    category = _category_of(doc_id)
+    if category is None:
+        return None
+    return _category_entry(category)[4].get(doc_id)
+
+def resolve_context(context_ids: Iterable[str]) -> List[str]:
+    """
+    Texts for retrieved doc ids, in order, from the cached corpus.
+    The state carries only ids; ids whose document has since been removed are skipped.
+    """
+    texts = []
+    for doc_id in context_ids or ():
+        text = _doc_text(doc_id)
+        if text is not None:
+            texts.append(text)
+    return texts
+
+# Small LRUs shared by all tickets: BM25 scores of each ticket's base query and of each
+# feedback term set (so a refine pass does not re-score the corpus) and rendered context
+# blocks (so a redraft over the same documents does not re-join them)
+_SCORES: "OrderedDict[Tuple, Tuple[FrozenSet[str], Dict[int, float], List[Tuple[int, float]]]]" = OrderedDict()
+_FEEDBACK: "OrderedDict[Tuple, Tuple[Dict[int, float], List[Tuple[int, float]]]]" = OrderedDict()
+_BLOCKS: "OrderedDict[Tuple, str]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+def _lru_get(cache: OrderedDict, key: Tuple):
+    with _CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+def _lru_put(cache: OrderedDict, key: Tuple, value: Any, maxsize: int):
+    with _CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
+
+# A cut snippet shorter than this is dropped rather than kept as a fragment
+_MIN_SNIPPET_CHARS = 40
+_ELLIPSIS = "…"
+
+def context_budget() -> int:
+    """Characters of context a draft may include (0 = unbounded); a token budget counts ~4 characters per token."""
+    if config.CONTEXT_BUDGET_TOKENS > 0:
+        return config.CONTEXT_BUDGET_TOKENS * 4
+    return max(0, config.CONTEXT_BUDGET_CHARS)
+
+def fit_context(texts: List[str], budget: int) -> List[str]:
+    """
+    The leading texts (best ranked first) that fit in budget characters, newlines
+    between them included. The first text that does not fit is cut at a word boundary
+    and marked with an ellipsis, if a useful part of it fits; everything after it is dropped.
+    """
+    if budget <= 0:
+        return list(texts)
+    fitted, used = [], 0
+    for text in texts:
+        room = budget - used - (1 if fitted else 0)
+        if len(text) <= room:
+            fitted.append(text)
+            used += len(text) + (1 if len(fitted) > 1 else 0)
+            continue
+        if room >= _MIN_SNIPPET_CHARS:
+            cut = text[:room - len(_ELLIPSIS) + 1]
+            space = cut.rfind(" ")
+            cut = cut[:space] if space > 0 else cut[:-1]
+            fitted.append(cut.rstrip(" ,;:.-") + _ELLIPSIS)
+        break
+    return fitted
+
+def context_block(context_ids: Iterable[str], budget: Optional[int] = None) -> str:
+    """
+    Retrieved texts joined one per line and fitted to the context budget,
+    memoized per (doc ids, corpus versions, budget).
+    """
+    ids = tuple(context_ids or ())
+    budget = context_budget() if budget is None else budget
+    versions = tuple(_category_entry(c)[0] for c in dict.fromkeys(map(_category_of, ids)) if c)
+    key = (ids, versions, budget)
+    block = _lru_get(_BLOCKS, key)
+    if block is None:
+        block = "\n".join(fit_context(resolve_context(ids), budget))
+        _lru_put(_BLOCKS, key, block, config.CONTEXT_BLOCK_CACHE_SIZE)
+    return block
+
+# Base-query results cached per ticket: k * _CANDIDATE_FACTOR best docs, the sorted list the
+# refine merge walks before it has to fall back to the full score table
+_CANDIDATE_FACTOR = 4
+
+def _base_scores(category: str, version: Any, index: BM25Index, query: str, k: int):
+    """(query terms, scores, best k * _CANDIDATE_FACTOR docs), cached per ticket query."""
+    key = (category, version, query, k)
+    cached = _lru_get(_SCORES, key)
+    if cached is None:
+        terms = query_terms(query)
+        scores = index.score_terms(terms)
+        cached = (frozenset(terms), scores, top_k(scores, k * _CANDIDATE_FACTOR))
+        _lru_put(_SCORES, key, cached, config.RETRIEVAL_SCORE_CACHE_SIZE)
+    return cached
+
+def _feedback_scores(category: str, version: Any, index: BM25Index, terms: Tuple[str, ...]):
+    """
+    (scores, docs sorted best first) for a set of feedback terms. Review emits a handful
+    of fixed feedback strings, so these are shared by every ticket that gets the same one.
+    """
+    key = (category, version, terms)
+    cached = _lru_get(_FEEDBACK, key)
+    if cached is None:
+        scores = index.score_terms(terms)
+        cached = (scores, sorted(scores.items(), key=lambda item: (-item[1], item[0])))
+        _lru_put(_FEEDBACK, key, cached, config.RETRIEVAL_SCORE_CACHE_SIZE)
+    return cached
+
+def _merge_top_k(base: Dict[int, float], base_ranked: List[Tuple[int, float]], base_complete: bool,
+                 extra: Dict[int, float], extra_ranked: List[Tuple[int, float]], k: int) -> Optional[List[Tuple[int, float]]]:
+    """
+    Exact top-k of base + extra scores by walking both best-first lists in step (Fagin's
+    threshold algorithm). Stops once the k-th best seen beats the best total any unseen
+    doc could still reach. None when base_ranked runs out before that is decided.
+    """
+    totals: Dict[int, float] = {}
+    heap: List[Tuple[float, int, int]] = []  # current best k as (score, -doc_id, doc_id), worst first
+    floor = 0.0 if base_complete else base_ranked[-1][1]  # bound for docs past base_ranked
+    for depth in range(max(len(base_ranked), len(extra_ranked))):
+        for ranked in (base_ranked, extra_ranked):
+            if depth < len(ranked):
+                doc_id = ranked[depth][0]
+                if doc_id not in totals:
+                    total = totals[doc_id] = base.get(doc_id, 0.0) + extra.get(doc_id, 0.0)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (total, -doc_id, doc_id))
+                    elif (total, -doc_id) > heap[0][:2]:
+                        heapq.heapreplace(heap, (total, -doc_id, doc_id))
+        threshold = (
+            (base_ranked[depth][1] if depth < len(base_ranked) else floor)
+            + (extra_ranked[depth][1] if depth < len(extra_ranked) else 0.0)
+        )
+        if len(heap) == k and heap[0][0] > threshold:
+            break
+    else:
+        if not (base_complete or (len(heap) == k and heap[0][0] > floor)):
+            return None
+    return [(doc_id, score) for score, _, doc_id in sorted(heap, reverse=True)]
+
+def _bm25_top_k(category: str, version: Any, index: BM25Index, query: str, feedback: str, k: int) -> List[Tuple[int, float]]:
+    """
+    Top-k for `query` plus `feedback`. BM25 is a sum over unique query terms, so a refine
+    pass combines the ticket's cached query scores with the (shared, cached) scores of
+    the feedback terms the query doesn't already have, instead of re-scoring the corpus.
+    """
+    base_terms, scores, ranked = _base_scores(category, version, index, query, k)
+    new_terms = tuple(sorted(t for t in query_terms(feedback) if t not in base_terms)) if feedback else ()
+    if not new_terms:
+        return ranked[:k]
+    extra, extra_ranked = _feedback_scores(category, version, index, new_terms)
+    best = _merge_top_k(scores, ranked, len(ranked) == len(scores), extra, extra_ranked, k)
+    if best is not None:
+        return best
+    merged = dict(scores)
+    for doc_id, score in extra.items():
+        merged[doc_id] = merged.get(doc_id, 0.0) + score
+    return top_k(merged, k)
+
+def _rank_docs(category: str, query: str, k: int, feedback: str = "") -> Tuple[List[str], List[str]]:
+    """
+    Index top-k for `query` plus reviewer `feedback` as (doc ids, texts); when fewer
+    than k docs match, pad with the rest in corpus order.
+    """
+    version, ids, docs, index, _ = _category_entry(category)
+    if not docs:
+        return [], []
+    if isinstance(index, (BM25Index, MmapBM25Index)):
+        hits = _bm25_top_k(category, version, index, query, feedback, k)
+    else:
+        hits = index.search(f"{query} {feedback}" if feedback else query, k)
+    positions = [doc_id for doc_id, _ in hits]
+    if len(positions) < k:
+        seen = set(positions)
+        for pos in range(len(docs)):
+            if len(positions) >= k:
+                break
+            if pos not in seen:
+                positions.append(pos)
+    return [ids[pos] for pos in positions], [docs[pos] for pos in positions]
+
 def retrieve(state: Any) -> Dict[str, Any]:
     try:
         category = _get(state, "category", "General") or "General"
@@ -65,18 +350,17 @@ def retrieve(state: Any) -> Dict[str, Any]:
         escalated = bool(_get(state, "escalated", False))
         retries = int(_get(state, "retries", 0))
         
-        # Get base documents for the category
-        docs = MOCK_KB.get(category, [])
-        
         # Build search query from subject, description and reviewer feedback if available
         query = f"{subject} {description}"
+        feedback = ""
         if review_feedback and retries > 0:
-            # Incorporate feedback into retrieval for refinement
-            query += f" {review_feedback}"
+            # Incorporate feedback into retrieval for refinement; only its terms are re-scored
+            feedback = review_feedback
             
-        # Filter and rank documents based on query relevance
-        filtered_docs = _filter_docs_by_query(docs, query)
+        # Rank the category's cached corpus with its index (no file I/O per ticket)
+        # Only ids go into the state; draft resolves the texts when it needs them
+        context_ids, _ = _rank_docs(category, query, config.RETRIEVAL_TOP_K, feedback)
         
-        return {"context": filtered_docs, "escalated": escalated, "retries": retries}
+        return {"context_ids": context_ids, "escalated": escalated, "retries": retries}
     except Exception as e:
         return {"error": {"node": "retrieve", "message": str(e)}}
@@ -1,7 +1,11 @@
 from typing import Any, Dict
 
-SENSITIVE_PATTERNS = ["password", "ssn", "credit card"]
-FINANCIAL_KEY = "refund"
+from app.keywords import MATCHER, DEMAND, FINANCIAL, POLICY_PATTERNS, SENSITIVE, match_groups, ticket_match_text
+from app.llm import get_llm, parse_review
+from app.prompts import REVIEW_PROMPT
+from app.state import append_history
+
+SENSITIVE_PATTERNS = POLICY_PATTERNS[SENSITIVE]
 
 def _get(state: Any, key: str, default=None):
     try:
@@ -23,43 +27,64 @@ def review(state: Any) -> Dict[str, Any]:
     """
     try:
         # Get subject, description, and fallback to ticket_text
-        subject = (_get(state, "subject", "") or "").lower()
-        description = (_get(state, "description", "") or "").lower()
-        text = (_get(state, "ticket_text", "") or "").lower() if not description else description
-        
-        # Combined text for better policy evaluation
-        combined_text = f"{subject} {description}".lower()
+        subject = _get(state, "subject", "") or ""
+        description = _get(state, "description", "") or ""
+        if not description and _get(state, "ticket_text"):
+            description = _get(state, "ticket_text", "") or ""
         
-        draft = (_get(state, "draft_reply", "") or "").lower()
+        # Keyword groups for the ticket (same memoized scan classify ran); the draft is
+        # unique per pass, so it gets an unmemoized scan limited to the sensitive patterns
+        ticket_groups = match_groups(ticket_match_text(subject, description))
+        draft_groups = MATCHER.groups(_get(state, "draft_reply", "") or "", groups=(SENSITIVE,))
         retries = int(_get(state, "retries", 0))
         escalated = bool(_get(state, "escalated", False))
         category = _get(state, "category", "")
         
-        # Get existing lists for tracking
-        all_drafts = _get(state, "all_drafts", []) or []
+        # Existing feedback history; rejections return a new capped list with their feedback added
         all_feedback = _get(state, "all_feedback", []) or []
 
         # Default outputs
         out = {
             "escalated": escalated, 
             "retries": retries,
-            "all_drafts": all_drafts,
-            "all_feedback": all_feedback
         }
 
         # Block sensitive info
-        if any(p in draft for p in SENSITIVE_PATTERNS):
+        if SENSITIVE in draft_groups:
             feedback = "Remove any sensitive information from the reply."
             out.update({
                 "review_decision": "rejected",
                 "review_feedback": feedback,
                 "final_reply": None
             })
-            all_feedback.append(feedback)
+            out["all_feedback"] = append_history(all_feedback, feedback)
+            return out
+
+        # With a model backend its verdict decides; refine and escalate follow the usual routes.
+        # Monetary demands always go to a human (below), and an answer without a usable verdict
+        # falls back to the rules
+        demand = DEMAND in ticket_groups and (category == "Billing" or FINANCIAL in ticket_groups)
+        llm = get_llm() if not demand else None
+        verdict = parse_review(llm.generate(REVIEW_PROMPT, draft=_get(state, "draft_reply", "") or "")) \
+            if llm is not None else None
+        if verdict is not None:
+            if verdict["status"] == "approved":
+                out.update({
+                    "review_decision": "approved",
+                    "final_reply": verdict.get("final_reply") or _get(state, "draft_reply")
+                })
+                return out
+            feedback = verdict.get("feedback") or "Rejected by the reviewer."
+            out.update({
+                "review_decision": "rejected",
+                "review_feedback": feedback,
+                "final_reply": None
+            })
+            out["all_feedback"] = append_history(all_feedback, feedback)
             return out
 
         # Technical issues: approve
-        if category == "Technical" or any(p in combined_text for p in ["server", "error", "bug", "crash", "latency", "api"]):
+        if category == "Technical" or "Technical" in ticket_groups:
             out.update({
                 "review_decision": "approved",
                 "final_reply": _get(state, "draft_reply")
@@ -67,9 +92,9 @@ def review(state: Any) -> Dict[str, Any]:
             return out
         
         # Billing refund logic
-        if category == "Billing" or FINANCIAL_KEY in combined_text:
+        if category == "Billing" or FINANCIAL in ticket_groups:
             # extreme monetary demand escalate
-            if ("$" in combined_text) or ("demand" in combined_text):
+            if DEMAND in ticket_groups:
                 feedback = "Do not promise refunds; escalate this ticket to human support."
                 out.update({
                     "review_decision": "rejected",
@@ -77,7 +102,7 @@ def review(state: Any) -> Dict[str, Any]:
                     "escalated": True,
                     "final_reply": "Escalated to human agent"
                 })
-                all_feedback.append(feedback)
+                out["all_feedback"] = append_history(all_feedback, feedback)
                 return out
 
             # normal refund: reject first, approve on retry == 1
@@ -88,7 +113,7 @@ def review(state: Any) -> Dict[str, Any]:
                     "review_feedback": feedback,
                     "final_reply": None
                 })
-                all_feedback.append(feedback)
+                out["all_feedback"] = append_history(all_feedback, feedback)
                 return out
             elif retries == 1:
                 out.update({
@@ -104,7 +129,7 @@ def review(state: Any) -> Dict[str, Any]:
                     "review_feedback": feedback,
                     "escalated": True
                 })
-                all_feedback.append(feedback)
+                out["all_feedback"] = append_history(all_feedback, feedback)
                 return out
 
         # ✅ Default fallback: approve safely
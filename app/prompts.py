@@ -1,4 +1,6 @@
 # app/prompts.py
+# Rendered with str.format by the nodes when a model backend is configured (app/llm.py),
+# so literal braces are doubled
 
 CLASSIFIER_PROMPT = """
 Classify the following ticket into one of the categories:
@@ -20,6 +22,7 @@ You are an AI assistant. Generate a polite, helpful draft reply to the customer.
 Use the retrieved context if available.
 Ticket: {ticket_text}
 Context: {context}
+Feedback: {feedback}
 """
 
 REVIEW_PROMPT = """
@@ -34,5 +37,5 @@ Draft:
 {draft}
 
 Return JSON:
-{"status": "approved", "final_reply": "..."} OR {"status": "rejected", "feedback": "..."}
+{{"status": "approved", "final_reply": "..."}} OR {{"status": "rejected", "feedback": "..."}}
 """
@@ -0,0 +1,216 @@
+# app/result_cache.py
+"""
+Idempotent result cache for resubmitted tickets.
+
+Results are keyed on the ticket id plus a hash of the normalized subject and
+description, so a client retry (or a customer resubmitting the same ticket)
+returns the first run's result instead of running the graph again and
+appending a duplicate escalation row.
+
+Entries live in a bounded in-memory LRU with a TTL. When a SQLite path is
+configured they are also written through to disk and survive restarts; from
+the event loop use aget/aput, which touch only memory on the loop and run
+the SQLite reads and writes on a worker thread.
+Concurrent requests for the same key are coalesced: the first one runs the
+graph, the others await its result.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize(text: Optional[str]) -> str:
+    return _WS_RE.sub(" ", (text or "").strip().lower())
+
+
+def ticket_cache_key(ticket_id: Optional[str], subject: Optional[str], description: Optional[str]) -> str:
+    content = hashlib.sha256(f"{normalize(subject)}\n{normalize(description)}".encode("utf-8")).hexdigest()
+    return f"{ticket_id or ''}:{content}"
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # SQLite I/O runs under its own lock, so a slow disk never holds up a memory lookup on the event loop
+        self._db_lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self.open()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memory, then the SQLite tier. Blocks on disk I/O; on the event loop use aget."""
+        value = self._get_memory(key)
+        if value is None and self._db is not None:
+            return self._get_disk(key)
+        if value is None:
+            self.misses += 1
+        return value
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get for the event loop: a memory hit returns at once, the SQLite lookup runs on a worker thread."""
+        value = self._get_memory(key)
+        if value is None and self._db is not None:
+            return await asyncio.get_running_loop().run_in_executor(None, self._get_disk, key)
+        if value is None:
+            self.misses += 1
+        return value
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.expired += 1
+            return None
+
+    def _get_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM result_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value = json.loads(row[1])
+            self._store(key, row[0], value)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Memory and the SQLite tier. Blocks on disk I/O; on the event loop use aput."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, expires_at, value)
+        if self._db is not None:
+            self._put_disk(key, expires_at, value)
+
+    async def aput(self, key: str, value: Dict[str, Any]):
+        """put for the event loop: memory at once, the SQLite write on a worker thread."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._put_disk, key, expires_at, value)
+
+    def _put_disk(self, key: str, expires_at: float, value: Dict[str, Any]):
+        data = json.dumps(value, default=str)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, data),
+                )
+
+    def _store(self, key: str, expires_at: float, value: Dict[str, Any]):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        (result, cached). Identical keys in flight share one compute() call.
+        Results carrying an "error" are returned but not cached.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight), True
+
+        # Registered before the (possibly on-disk) lookup, so identical requests arriving meanwhile wait for it
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            cached = await self.aget(key)
+            if cached is not None:
+                future.set_result(cached)
+                return cached, True
+            result = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        else:
+            if result.get("error"):
+                future.set_result(result)
+                return result, False
+            # Waiters are released once the memory tier has it; the disk write follows off the loop
+            expires_at = time.time() + self.ttl_seconds
+            with self._lock:
+                self._store(key, expires_at, result)
+            future.set_result(result)
+            if self._db is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self._put_disk, key, expires_at, result)
+            return result, False
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM result_cache")
+
+    def open(self):
+        """Connect the SQLite tier (if configured); close() and open() again to restart with the app."""
+        with self._db_lock:
+            if self.db_path and self._db is None:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS result_cache (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+                )
+                self._db.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "hit_rate": (self.hits + self.coalesced) / (lookups + self.coalesced) if lookups + self.coalesced else 0.0,
+        }
@@ -1,18 +1,134 @@
 import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app import config
 
 BASE_PATH = os.path.join(os.path.dirname(__file__), "..", "data")
 
+
+class Document(NamedTuple):
+    doc_id: str  # path relative to the data folder, e.g. "billing_docs/refund_policy.txt"
+    text: str
+
+
+class _FileEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    doc: Document
+
+
+class _Folder:
+    __slots__ = ("files", "docs", "version", "checked_at")
+
+    def __init__(self):
+        self.files: Dict[str, _FileEntry] = {}
+        self.docs: List[Document] = []
+        self.version = 0
+        self.checked_at = float("-inf")  # never checked; monotonic() can be smaller than refresh_seconds
+
+
+class CorpusCache:
+    """
+    Process-wide cache of the on-disk knowledge base.
+
+    Each folder is revalidated at most once every `refresh_seconds`. A
+    revalidation stats the folder and re-reads only files whose
+    (path, mtime, size) changed; deleted files are dropped. `version` bumps
+    whenever a folder's document set changes so indexes know to rebuild.
+    """
+
+    def __init__(self, base_path: str = BASE_PATH, refresh_seconds: Optional[float] = None):
+        self.base_path = os.path.abspath(base_path)
+        self.refresh_seconds = config.CORPUS_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self._folders: Dict[str, _Folder] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.files_read = 0
+        self.reload_seconds = 0.0
+
+    def get(self, folder: str) -> Tuple[int, List[Document]]:
+        """Return (version, documents) for a folder, sorted by file name."""
+        entry = self._folders.get(folder)
+        if entry is not None and time.monotonic() - entry.checked_at < self.refresh_seconds:
+            self.hits += 1
+            return entry.version, entry.docs
+        with self._lock:
+            entry = self._folders.setdefault(folder, _Folder())
+            if time.monotonic() - entry.checked_at >= self.refresh_seconds:
+                self._refresh(folder, entry)
+            else:
+                self.hits += 1
+            return entry.version, entry.docs
+
+    def _refresh(self, folder: str, entry: _Folder):
+        start = time.perf_counter()
+        folder_path = os.path.join(self.base_path, folder)
+        seen: Dict[str, _FileEntry] = {}
+        changed = False
+        if os.path.isdir(folder_path):
+            with os.scandir(folder_path) as it:
+                for dirent in it:
+                    if not (dirent.name.endswith(".txt") and dirent.is_file()):
+                        continue
+                    st = dirent.stat()
+                    cached = entry.files.get(dirent.name)
+                    if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+                        seen[dirent.name] = cached
+                        continue
+                    with open(dirent.path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                    self.files_read += 1
+                    seen[dirent.name] = _FileEntry(st.st_mtime_ns, st.st_size, Document(f"{folder}/{dirent.name}", text))
+                    changed = True
+        if changed or len(seen) != len(entry.files):
+            entry.files = seen
+            entry.docs = [seen[name].doc for name in sorted(seen)]
+            entry.version += 1
+            self.misses += 1
+        else:
+            self.hits += 1
+        entry.checked_at = time.monotonic()
+        self.reload_seconds += time.perf_counter() - start
+
+    def invalidate(self, folder: Optional[str] = None):
+        """Force the next get() to revalidate one folder (or all of them)."""
+        with self._lock:
+            for name, entry in self._folders.items():
+                if folder is None or name == folder:
+                    entry.checked_at = float("-inf")
+
+    def stats(self) -> Dict[str, object]:
+        folders = dict(self._folders)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "files_read": self.files_read,
+            "reload_seconds": round(self.reload_seconds, 6),
+            "bytes_held": sum(f.size for entry in folders.values() for f in entry.files.values()),
+            "documents": {name: len(entry.docs) for name, entry in folders.items()},
+        }
+
+
+CORPUS = CorpusCache()
+
+
+def load_corpus(category: str) -> Tuple[int, List[Document]]:
+    """Cached (version, documents) for a category; empty for unknown categories."""
+    folder = CATEGORY_TO_FOLDER.get(category)
+    if folder is None:
+        return 0, []
+    return CORPUS.get(folder)
+
+
+def corpus_stats() -> Dict[str, object]:
+    return CORPUS.stats()
+
+
 def _load_docs_from_folder(folder: str):
-    docs = []
-    folder_path = os.path.abspath(os.path.join(BASE_PATH, folder))
-    if not os.path.exists(folder_path):
-        return docs
-    for fname in os.listdir(folder_path):
-        fpath = os.path.join(folder_path, fname)
-        if os.path.isfile(fpath) and fname.endswith(".txt"):
-            with open(fpath, "r", encoding="utf-8") as f:
-                docs.append(f.read())
-    return docs
+    return [doc.text for doc in CORPUS.get(folder)[1]]
 
 def get_billing_docs():
     return _load_docs_from_folder("billing_docs")
@@ -26,6 +142,13 @@ def get_security_docs():
 def get_general_docs():
     return _load_docs_from_folder("general_docs")
 
+CATEGORY_TO_FOLDER = {
+    "Billing": "billing_docs",
+    "Technical": "technical_docs",
+    "Security": "security_docs",
+    "General": "general_docs",
+}
+
 CATEGORY_TO_RETRIEVER = {
     "Billing": get_billing_docs,
     "Technical": get_technical_docs,
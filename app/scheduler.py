@@ -0,0 +1,185 @@
+# app/scheduler.py
+"""
+Priority-aware admission: which waiting ticket gets the next free slot.
+
+PriorityScheduler keeps the slot limit and shedding rules of
+AdmissionController (app/admission.py), with one queue per priority class
+instead of a single FIFO:
+
+- Weighted-fair dequeueing (stride scheduling). Each class has a weight
+  (urgent 8, high 4, normal 2, low 1). While several classes have tickets
+  waiting, each gets freed slots in proportion to its weight. Serving a
+  class advances its pass by 1 / weight, and the class whose next pass is
+  lowest goes first. A flood of normal tickets therefore delays an urgent
+  ticket by about one service time, not by the length of the flood. A
+  class that was idle earns no credit for it.
+- Aging. Every aging_seconds a class's oldest ticket waits, the class
+  competes with the weight of the class one rank higher. A backlog that has
+  waited long gets a larger share, even while busier classes keep their
+  queues full.
+- Bounded queue with per-class reserves. At most max_queue tickets wait in
+  total, across all classes. Part of that (reserved_fraction) is reserved
+  per class in proportion to weight, and the rest is shared. A class can
+  always queue within its reserve, but beyond it only while shared room is
+  left. A flood of one class therefore cannot get another class's tickets
+  shed for a full queue. An urgent ticket's expected wait only counts the
+  tickets that would be served before it.
+
+Queue waits, admissions and sheds are recorded per class for /admission/stats.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from app.admission import AdmissionController
+from app.keywords import category_for, match_groups, ticket_match_text
+
+# Highest priority first
+PRIORITY_WEIGHTS = {"urgent": 8, "high": 4, "normal": 2, "low": 1}
+DEFAULT_CLASS = "normal"
+
+# EnhancedTicketRequest.priority values, lowercased
+_PRIORITY_ALIASES = {
+    "urgent": "urgent", "critical": "urgent", "blocker": "urgent", "p0": "urgent", "p1": "urgent",
+    "high": "high", "p2": "high",
+    "normal": "normal", "medium": "normal", "p3": "normal",
+    "low": "low", "minor": "low", "p4": "low", "p5": "low",
+}
+
+
+def priority_class(priority: Optional[str] = None, tags: Optional[Iterable[str]] = None, subject: str = "",
+                   description: str = "") -> str:
+    """
+    The scheduling class of a ticket. The stated priority decides, but
+    Security tickets (by tag or by the same keyword scan classify runs) and
+    tickets tagged urgent are always urgent.
+    """
+    tags = {str(tag).strip().lower() for tag in tags or ()}
+    if "urgent" in tags or "security" in tags:
+        return "urgent"
+    if category_for(match_groups(ticket_match_text(subject or "", description or ""))) == "Security":
+        return "urgent"
+    return _PRIORITY_ALIASES.get(str(priority or "").strip().lower(), DEFAULT_CLASS)
+
+
+class _ClassStats:
+    __slots__ = ("admitted", "shed", "aged", "wait_seconds_total", "wait_seconds_max")
+
+    def __init__(self):
+        self.admitted = 0
+        self.shed = 0
+        self.aged = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+
+class PriorityScheduler(AdmissionController):
+    def __init__(self, max_inflight: int, max_queue: int, max_wait_seconds: float, aging_seconds: float = 0.1,
+                 weights: Optional[Dict[str, int]] = None, ewma_alpha: float = 0.2, on_wait=None,
+                 reserved_fraction: float = 0.5):
+        super().__init__(max_inflight, max_queue, max_wait_seconds, ewma_alpha)
+        self.weights = dict(weights or PRIORITY_WEIGHTS)
+        self.aging_seconds = aging_seconds
+        # Queue places held for each class, by weight; the rest of max_queue is shared by all classes
+        reserved = int(self.max_queue * min(1.0, max(0.0, reserved_fraction)))
+        total_weight = sum(self.weights.values())
+        self._reserved = {cls: reserved * weight // total_weight for cls, weight in self.weights.items()}
+        self._shared = self.max_queue - sum(self._reserved.values())
+        # Classes by rank: 0 is the lowest
+        self._ranks = {cls: rank for rank, cls in enumerate(sorted(self.weights, key=self.weights.get))}
+        self._rank_weights = sorted(self.weights.values())
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {cls: deque() for cls in self.weights}
+        # Stride scheduling: the class whose pass + 1 / weight is lowest is served next
+        self._pass = {cls: 0.0 for cls in self.weights}
+        self._vtime = 0.0
+        self._stats = {cls: _ClassStats() for cls in self.weights}
+        # Called with (class, seconds waited) for every admitted ticket, e.g. to feed a histogram
+        self.on_wait = on_wait
+
+    def _class(self, cls: Optional[str]) -> str:
+        return cls if cls in self.weights else DEFAULT_CLASS
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _queue_full(self, cls: Optional[str]) -> bool:
+        """Full for `cls` once its reserve is used and so is the shared room; all queues total <= max_queue."""
+        if len(self._queues[self._class(cls)]) < self._reserved[self._class(cls)]:
+            return False
+        shared_used = sum(max(0, len(queue) - self._reserved[name]) for name, queue in self._queues.items())
+        return shared_used >= self._shared
+
+    def _enqueue(self, waiter: asyncio.Future, cls: Optional[str]):
+        cls = self._class(cls)
+        queue = self._queues[cls]
+        if not queue:
+            # No credit for time spent idle
+            self._pass[cls] = max(self._pass[cls], self._vtime)
+        queue.append((waiter, time.monotonic()))
+
+    def _dequeue(self) -> Optional[asyncio.Future]:
+        now = time.monotonic()
+        best, best_key = None, None
+        for cls, queue in self._queues.items():
+            while queue and queue[0][0].done():
+                queue.popleft()
+            if not queue:
+                continue
+            waited = now - queue[0][1]
+            boost = int(waited / self.aging_seconds) if self.aging_seconds > 0 else 0
+            rank = min(self._ranks[cls] + boost, len(self._rank_weights) - 1)
+            # Ties go to the higher class
+            key = (self._pass[cls] + 1.0 / self._rank_weights[rank], -rank)
+            if best_key is None or key < best_key:
+                best, best_key = cls, key
+        if best is None:
+            return None
+        if -best_key[1] != self._ranks[best]:
+            self._stats[best].aged += 1
+        self._vtime = self._pass[best]
+        self._pass[best] = best_key[0]
+        return self._queues[best].popleft()[0]
+
+    def _discard(self, waiter: asyncio.Future, cls: Optional[str]):
+        queue = self._queues[self._class(cls)]
+        for i, (queued, _) in enumerate(queue):
+            if queued is waiter:
+                del queue[i]
+                return
+
+    def expected_wait(self, cls: Optional[str] = None) -> float:
+        # Tickets of this class and higher ones are (roughly) served first
+        rank = self._ranks[self._class(cls)]
+        ahead = sum(len(queue) for name, queue in self._queues.items() if self._ranks[name] >= rank)
+        return (ahead + 1) * self.service_seconds / self.max_inflight
+
+    def _record(self, cls: Optional[str], outcome: str, waited: float):
+        cls = self._class(cls)
+        stats = self._stats[cls]
+        if outcome != "admitted":
+            stats.shed += 1
+            return
+        stats.admitted += 1
+        stats.wait_seconds_total += waited
+        stats.wait_seconds_max = max(stats.wait_seconds_max, waited)
+        if self.on_wait is not None:
+            self.on_wait(cls, waited)
+
+    def class_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            cls: {
+                "weight": self.weights[cls],
+                "queued": len(self._queues[cls]),
+                "reserved": self._reserved[cls],
+                "admitted": stats.admitted,
+                "shed": stats.shed,
+                "aged": stats.aged,
+                "wait_ms_avg": round(stats.wait_seconds_total / stats.admitted * 1000, 3) if stats.admitted else 0.0,
+                "wait_ms_max": round(stats.wait_seconds_max * 1000, 3),
+            }
+            for cls, stats in self._stats.items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(super().stats(), aging_seconds=self.aging_seconds, classes=self.class_stats())
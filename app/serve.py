@@ -0,0 +1,81 @@
+# app/serve.py
+"""
+Multi-process serving with one shared, read-only knowledge index.
+
+The parent indexes the corpus once and writes a KB snapshot
+(app/kb_snapshot.py). It then starts uvicorn workers with KB_INDEX_PATH
+pointing at the snapshot. Workers mmap the snapshot instead of reading and
+indexing the corpus, so the index pages are shared and a new worker is
+ready as soon as its graph is warm.
+
+Usage:
+    python -m app.serve --workers 4 --port 8000
+
+Choosing --workers: the nodes are pure Python and hold the GIL, so a worker
+saturates about one core. Start with one worker per core (the default).
+Leave a core free if the machine also runs the escalation consumer or other
+services. Each worker adds its private memory (measured by
+`python -m benchmarks.bench_worker_rss`), so also keep
+workers * private RSS + snapshot size within the container limit.
+GRAPH_MAX_CONCURRENCY sets the threads per worker.
+
+With more than one worker each process logs to its own file, LOG_FILE with
+its pid inserted (support_agent.<pid>.log), because RotatingFileHandler is
+not safe across processes. LOG_FILE_PER_PROCESS=0 keeps the single file;
+only do that with LOG_MAX_BYTES=0 (no rotation) or LOG_FILE empty (stdout).
+
+The snapshot is fixed when the parent builds it. After ingesting new
+articles, restart so that the parent rebuilds it. If --index-path is a
+directory, the parent serves the per-category snapshots that
+`scripts/ingest.py bulk` keeps there (data/kb_index) and builds nothing.
+"""
+import argparse
+import logging
+import os
+import time
+
+from app import config
+
+logger = logging.getLogger("support-agent")
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "kb_index.bin")
+
+
+def default_workers() -> int:
+    return config.SERVE_WORKERS or os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the support agent from several worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: SERVE_WORKERS or one per CPU core)")
+    parser.add_argument("--index-path", default=config.KB_INDEX_PATH or os.path.abspath(DEFAULT_INDEX_PATH),
+                        help="Where to write the KB snapshot the workers map. A directory is used as is: "
+                             "per-category snapshots kept up to date by `scripts/ingest.py bulk`")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    from app.nodes.retrieve import build_snapshot
+
+    logging.basicConfig(level=config.LOG_LEVEL)
+    if os.path.isdir(args.index_path):
+        logger.info(f"Serving the ingested KB index in {args.index_path}")
+    else:
+        start = time.perf_counter()
+        build_id = build_snapshot(args.index_path)
+        logger.info(f"KB snapshot {build_id} written to {args.index_path} "
+                    f"({os.path.getsize(args.index_path)} bytes, {time.perf_counter() - start:.2f}s)")
+
+    # Workers read their settings from the environment they inherit
+    os.environ["KB_INDEX_PATH"] = args.index_path
+    if args.workers > 1:
+        # One rotating file per worker: rotation is not safe across processes
+        os.environ.setdefault("LOG_FILE_PER_PROCESS", "1")
+    uvicorn.run("app.server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,100 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-from app.graph import build_graph
+from app import config
+from app.admission import Overloaded
+from app.graph import build_graph, get_graph
 from app.state import GraphState
+from app.retrievers import corpus_stats
+from app.escalation_store import ESCALATION_FIELDS, EXPORT_BATCH_SIZE, record as escalation_record
+from app.escalation_writer import (
+    escalation_rows_written, escalation_writer_stats, get_escalation_store, shutdown_escalation_writer,
+)
+from app.llm import llm_stats, shutdown_llm
+from app.logging_setup import logging_stats, setup_logging, shutdown_logging
+from app.metrics import REGISTRY, Gauge, Histogram
+from app.result_cache import ResultCache, ticket_cache_key
+from app.scheduler import PriorityScheduler, priority_class
+from app.warmup import warm_up
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+import asyncio
+import csv
+import io
 import logging
-import sys
 import json
-import traceback
+import threading
+import time
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler("support_agent.log")],
-)
+# Configure logging: JSON lines written by a background listener (see app/logging_setup.py)
+setup_logging()
 logger = logging.getLogger("support-agent")
 
+def _graph_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=config.GRAPH_MAX_CONCURRENCY, thread_name_prefix="graph")
+
+
+# Graph execution is synchronous; it runs on this bounded pool so the event loop stays free.
+# lifespan replaces it with a fresh pool on every start, since shutdown drains and closes it
+graph_executor = _graph_executor()
+
+# Results of finished tickets, so client retries and resubmissions don't re-run the graph
+result_cache = ResultCache(
+    max_entries=config.RESULT_CACHE_SIZE,
+    ttl_seconds=config.RESULT_CACHE_TTL_SECONDS,
+    db_path=config.RESULT_CACHE_DB or None,
+)
+
+
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    "support_admission_queue_wait_seconds", "Time admitted tickets waited for a slot", ("priority",)))
+
+# Bounds tickets in flight and waiting; overflow is shed with a 429 instead of queueing without limit.
+# Waiting tickets are served by priority class with weighted-fair dequeueing and aging.
+admission = PriorityScheduler(
+    max_inflight=config.ADMISSION_MAX_INFLIGHT,
+    max_queue=config.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=config.ADMISSION_MAX_WAIT_SECONDS,
+    aging_seconds=config.SCHEDULER_AGING_SECONDS,
+    reserved_fraction=config.SCHEDULER_QUEUE_RESERVED_FRACTION,
+    on_wait=lambda cls, waited: QUEUE_WAIT.observe(waited, cls),
+)
+
+
+# Set once the graph is built and warm-up has finished; /health returns 503 until then
+ready = threading.Event()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global graph_executor
+    # A fresh pool and cache connection on every start, so the app can be started again after shutdown
+    # (the old pool finishes whatever it is running; after an earlier shutdown this is a no-op)
+    graph_executor.shutdown(wait=False)
+    graph_executor = _graph_executor()
+    result_cache.open()
+    # No-op on first start; re-attaches the queue when an app is started again after shutdown
+    setup_logging()
+    # Warm up in the background so /health can answer (503) while it runs
+    asyncio.get_running_loop().run_in_executor(graph_executor, _warm_up)
+    yield
+    graph_executor.shutdown(wait=True)
+    # Flush queued escalations before the worker exits
+    shutdown_escalation_writer()
+    result_cache.close()
+    shutdown_llm()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="LangGraph Support Agent API",
     description="API for processing support tickets using LangGraph",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -33,15 +106,119 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Build graph once
-try:
-    logger.info("Building LangGraph workflow")
-    graph = build_graph()
-    logger.info("Graph compiled successfully")
-except Exception as e:
-    logger.critical(f"Failed to build LangGraph workflow: {e}")
-    logger.critical(traceback.format_exc())
-    graph = None
+# ✅ Build graph once, on first use (warm-up or the first request), not at import
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """The executor that runs tickets (see GRAPH_EXECUTOR), or None if it failed to build."""
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            try:
+                if config.GRAPH_EXECUTOR == "fast":
+                    from app.fastpath import FastPipeline
+
+                    logger.info("Building fast-path pipeline")
+                    _pipeline = FastPipeline()
+                elif config.CHECKPOINT_ENABLED:
+                    from app.checkpoint import ResumableGraph, SQLiteCheckpointSaver
+
+                    logger.info(f"Building LangGraph workflow with checkpoints in {config.CHECKPOINT_DB}")
+                    saver = SQLiteCheckpointSaver(config.CHECKPOINT_DB, keep=config.CHECKPOINT_KEEP)
+                    _pipeline = ResumableGraph(build_graph(checkpointer=saver), saver,
+                                               ttl_seconds=config.CHECKPOINT_TTL_SECONDS,
+                                               durability=config.CHECKPOINT_DURABILITY)
+                else:
+                    logger.info("Building LangGraph workflow")
+                    _pipeline = get_graph()
+                logger.info("Graph compiled successfully")
+            except Exception as e:
+                logger.critical(f"Failed to build LangGraph workflow: {e}", exc_info=True)
+        return _pipeline
+
+
+def _warm_up():
+    start = time.perf_counter()
+    try:
+        graph = get_pipeline()
+        if graph is not None and config.WARMUP_ENABLED:
+            timings = warm_up(graph, config.GRAPH_RECURSION_LIMIT)
+            phases = ", ".join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in timings.items())
+            logger.info(f"Warm-up finished ({phases})", extra={"latency_ms": round((time.perf_counter() - start) * 1000, 3)})
+    except Exception:
+        # Serve anyway; the caches fill on the first real tickets instead
+        logger.exception("Warm-up failed")
+    finally:
+        ready.set()
+
+
+async def run_graph(state: Any) -> Any:
+    """Invoke the compiled graph on the executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        graph_executor,
+        partial(get_pipeline().invoke, state, config={"recursion_limit": config.GRAPH_RECURSION_LIMIT}),
+    )
+
+
+async def run_admitted(state: Any, priority: Optional[str] = None) -> Any:
+    """run_graph once the scheduler grants a slot to the ticket's priority class; raises Overloaded when shedding."""
+    if not config.ADMISSION_ENABLED:
+        return await run_graph(state)
+    async with admission.slot(priority):
+        return await run_graph(state)
+
+
+def _cache_key(state: GraphState) -> str:
+    return ticket_cache_key(state.ticket_id, state.subject, state.description or state.ticket_text)
+
+
+async def run_ticket(state: GraphState, priority: Optional[str] = None):
+    """
+    run_admitted through the result cache. Returns (result, cached); identical
+    tickets already in flight wait for the running one instead of starting another.
+    Cached results are returned without taking an admission slot.
+    """
+    if not config.RESULT_CACHE_ENABLED:
+        return await run_admitted(state, priority), False
+    return await result_cache.get_or_compute(_cache_key(state), partial(run_admitted, state, priority))
+
+
+def ticket_state_from_body(body: Dict[str, Any], default_id: Optional[str] = None):
+    """
+    Build the graph input from a loosely-shaped ticket payload.
+    Returns (ticket_id, GraphState) or (ticket_id, None) when no description field is present.
+    """
+    ticket_id = body.get("ticket_id", default_id or f"TICKET-{datetime.now().strftime('%Y%m%d%H%M%S')}")
+    subject = body.get("subject", "")
+    description = next((body.get(f) for f in ["description", "content", "text", "body", "message"] if body.get(f)), None)
+
+    if not description:
+        return ticket_id, None
+
+    if not subject:
+        subject = description.split("\n", 1)[0][:100]
+
+    return ticket_id, GraphState(
+        ticket_id=ticket_id,
+        subject=subject,
+        description=description,
+        ticket_text=description,
+    )
+
+
+def _log_ticket(ticket_id: str, result: Any, cached: bool, elapsed: float):
+    logger.info("Ticket processed", extra={
+        "ticket_id": ticket_id,
+        "category": get_result_attr(result, "category"),
+        "escalated": get_result_attr(result, "escalated", False),
+        "cached": cached,
+        "latency_ms": round(elapsed * 1000, 3),
+    })
 
 
 # Utility
@@ -61,19 +238,177 @@ async def root():
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
             "resolve_ticket": "/resolve_ticket",
+            "resolve_ticket_stream": "/resolve_ticket/stream",
             "process_ticket": "/api/process_ticket",
+            "process_tickets": "/api/process_tickets",
+            "enhanced_ticket": "/api/enhanced_ticket",
             "health": "/health",
+            "kb_stats": "/kb/stats",
+            "cache_stats": "/cache/stats",
+            "admission_stats": "/admission/stats",
+            "escalations": "/escalations",
+            "escalation_stats": "/escalations/stats",
+            "escalation_export": "/escalations/export",
+            "metrics": "/metrics",
         },
     }
 
 
 @app.get("/health")
 async def health_check():
-    if not graph:
-        return {"status": "error", "message": "LangGraph not initialized"}
+    """Readiness probe: 503 until the graph is built and warmed up."""
+    if not ready.is_set():
+        return JSONResponse(status_code=503, content={"status": "starting", "timestamp": datetime.now().isoformat()})
+    if _pipeline is None:
+        return JSONResponse(status_code=503, content={"status": "error", "message": "LangGraph not initialized"})
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
+KB_CACHE = REGISTRY.register(Gauge(
+    "support_kb_cache", "Knowledge-base corpus cache counters (hits, misses, files_read, bytes_held)", ("stat",)))
+ESCALATIONS_WRITTEN = REGISTRY.register(Gauge(
+    "support_escalation_rows_written", "Escalation rows flushed to disk by this process"))
+ESCALATION_WRITER = REGISTRY.register(Gauge(
+    "support_escalation_writer", "Escalation writer health (write_failures, rows_pending retry, rows_dropped)",
+    ("stat",)))
+LOG_RECORDS = REGISTRY.register(Gauge(
+    "support_log_records", "Log pipeline counters (queued, dropped when the queue was full, sampled_out)", ("stat",)))
+ADMISSION = REGISTRY.register(Gauge(
+    "support_admission", "Admission control (inflight, queued, admitted, shed_queue_full, shed_wait, shed_timeout)", ("stat",)))
+RESULT_CACHE = REGISTRY.register(Gauge(
+    "support_result_cache", "Ticket result cache counters (hits, misses, coalesced, evictions, entries)", ("stat",)))
+CHECKPOINT_RESUMED = REGISTRY.register(Gauge(
+    "support_checkpoint_runs_resumed", "Interrupted ticket runs resumed from their checkpoint by this process"))
+LLM_CALLS = REGISTRY.register(Gauge(
+    "support_llm", "Model backend counters (calls, prompts, errors, timeouts, pending)", ("stat",)))
+LLM_CACHE = REGISTRY.register(Gauge(
+    "support_llm_cache", "Prompt cache counters (hits_memory, hits_disk, misses, evictions, disk_evictions, "
+    "expired, entries, disk_bytes)", ("stat",)))
+
+
+def _collect_server_stats():
+    stats = corpus_stats()
+    for key in ("hits", "misses", "files_read", "bytes_held", "reload_seconds"):
+        KB_CACHE.set(key, value=stats[key])
+    ESCALATIONS_WRITTEN.set(value=escalation_rows_written())
+    stats = escalation_writer_stats()
+    for key in ("write_failures", "rows_pending", "rows_dropped"):
+        ESCALATION_WRITER.set(key, value=stats[key])
+    for key, value in logging_stats().items():
+        LOG_RECORDS.set(key, value=value)
+    stats = result_cache.stats()
+    for key in ("hits", "misses", "coalesced", "evictions", "expired", "entries"):
+        RESULT_CACHE.set(key, value=stats[key])
+    stats = admission.stats()
+    for key in ("inflight", "queued", "admitted", "shed_queue_full", "shed_wait", "shed_timeout"):
+        ADMISSION.set(key, value=stats[key])
+    CHECKPOINT_RESUMED.set(value=getattr(_pipeline, "resumed", 0))
+    stats = llm_stats()
+    if stats["enabled"]:
+        for key in ("calls", "prompts", "errors", "pending"):
+            LLM_CALLS.set(key, value=stats[key])
+    if "cache" in stats:
+        for key in ("hits_memory", "hits_disk", "misses", "evictions", "disk_evictions", "expired", "entries",
+                    "disk_bytes"):
+            LLM_CACHE.set(key, value=stats["cache"][key])
+
+
+REGISTRY.add_collector(_collect_server_stats)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of node latency histograms and counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/kb/stats")
+async def kb_stats():
+    return corpus_stats()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return dict(result_cache.stats(), enabled=config.RESULT_CACHE_ENABLED)
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    return dict(admission.stats(), enabled=config.ADMISSION_ENABLED)
+
+
+@app.get("/llm/stats")
+async def llm_backend_stats():
+    return llm_stats()
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed load: a fast 429 the client can retry after Retry-After seconds."""
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(exc), "status": "overloaded", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _escalation_store():
+    store = get_escalation_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Escalation store disabled (ESCALATION_BACKEND=csv)")
+    return store
+
+
+# Sync handlers: FastAPI runs them on its threadpool, so SQLite reads never block the event loop.
+# since/until take ISO timestamps or dates ("2025-09-01"); rows appear once the writer flushes.
+
+@app.get("/escalations")
+def list_escalations(category: Optional[str] = None, ticket_id: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, limit: int = 50, cursor: Optional[int] = None):
+    """Escalations newest first. Pass `next_cursor` back as `cursor` for the next page."""
+    limit = max(1, min(limit, config.ESCALATION_PAGE_MAX))
+    return _escalation_store().query(category, ticket_id, since, until, limit, before_id=cursor)
+
+
+@app.get("/escalations/stats")
+def escalation_stats(since: Optional[str] = None, until: Optional[str] = None):
+    by_category = _escalation_store().counts_by_category(since, until)
+    return {"total": sum(by_category.values()), "by_category": by_category, "since": since, "until": until}
+
+
+def _export_chunks(rows, fmt: str):
+    """Encode exported rows EXPORT_BATCH_SIZE at a time."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if fmt == "csv":
+        writer.writerow(["id"] + ESCALATION_FIELDS)
+    for n, row in enumerate(rows, 1):
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            buf.write(json.dumps(escalation_record(row)) + "\n")
+        if n % EXPORT_BATCH_SIZE == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+@app.get("/escalations/export")
+def export_escalations(format: str = "ndjson", category: Optional[str] = None, ticket_id: Optional[str] = None,
+                       since: Optional[str] = None, until: Optional[str] = None):
+    """Stream every matching escalation, oldest first, as NDJSON or CSV without loading the table."""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    rows = _escalation_store().iter_rows(category, ticket_id, since, until)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_chunks(rows, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="escalations.{format}"'},
+    )
+
+
 class TicketRequest(BaseModel):
     ticket_id: str
     subject: str
@@ -92,33 +427,42 @@ class EnhancedTicketRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
-@app.post("/resolve_ticket")
-async def resolve_ticket(request: TicketRequest):
-    if not graph:
-        raise HTTPException(status_code=500, detail="LangGraph not initialized")
-
-    state = GraphState(
+def _resolve_state(request: TicketRequest) -> GraphState:
+    return GraphState(
         ticket_id=request.ticket_id,
         subject=request.subject,
         description=request.description,
         ticket_text=request.text if request.text else request.description,
     )
 
+
+@app.post("/resolve_ticket")
+async def resolve_ticket(request: TicketRequest):
+    graph = get_pipeline()
+    if not graph:
+        raise HTTPException(status_code=500, detail="LangGraph not initialized")
+
+    state = _resolve_state(request)
+
     try:
         start = datetime.now()
-        result = graph.invoke(state, config={"recursion_limit": 50})
+        result, cached = await run_ticket(state)
         elapsed = (datetime.now() - start).total_seconds()
+        _log_ticket(request.ticket_id, result, cached, elapsed)
 
         return {
             "ticket_id": request.ticket_id,
             "output": get_result_attr(result, "final_reply", "No response generated"),
             "category": get_result_attr(result, "category", "Unknown"),
             "escalated": get_result_attr(result, "escalated", False),
+            "cached": cached,
             "timestamp": datetime.now().isoformat(),
             "processing_time": elapsed,
         }
+    except Overloaded:
+        raise
     except Exception as e:
-        logger.exception("Error processing ticket")
+        logger.exception("Error processing ticket", extra={"ticket_id": request.ticket_id})
         return {
             "ticket_id": request.ticket_id,
             "error": str(e),
@@ -129,45 +473,154 @@ async def resolve_ticket(request: TicketRequest):
         }
 
 
+# Fields pushed to the client when each node completes
+STREAM_FIELDS = {
+    "resume": ("category", "retries"),
+    "classify": ("category",),
+    "retrieve": ("context_ids",),
+    "draft": ("draft_reply",),
+    "review": ("review_decision", "review_feedback", "escalated"),
+    "refine": ("retries", "draft_reply", "escalated"),
+    "escalate": ("final_reply", "escalated"),
+}
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Streamed runs in flight; holds a reference so the event loop does not drop the tasks
+_stream_runs = set()
+
+
+@app.post("/resolve_ticket/stream")
+async def resolve_ticket_stream(request: TicketRequest):
+    """
+    Server-sent-events variant of /resolve_ticket.
+    Emits `accepted` immediately, one event per completed graph node (named after the node),
+    then `result` with the same fields as /resolve_ticket, or `error`. A ticket whose earlier
+    run was interrupted emits `resume` and continues after the last node that completed.
+    The run holds an admission slot until the graph stops; a shed ticket gets a 429 before
+    the stream starts.
+    """
+    graph = get_pipeline()
+    if not graph:
+        raise HTTPException(status_code=500, detail="LangGraph not initialized")
+
+    state = _resolve_state(request)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        # Runs on the graph executor; hands each node update to the event loop
+        try:
+            for chunk in graph.stream(
+                state, config={"recursion_limit": config.GRAPH_RECURSION_LIMIT}, stream_mode="updates"
+            ):
+                loop.call_soon_threadsafe(queue.put_nowait, ("update", chunk))
+                if stop.is_set():
+                    break
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+
+    # The graph starts once admitted, whether or not the client reads the stream yet, and keeps
+    # the slot until produce returns (finished, failed, or stopped after the client went away)
+    admitted = loop.create_future()
+
+    async def run_stream():
+        if not config.ADMISSION_ENABLED:
+            admitted.set_result(None)
+            return await loop.run_in_executor(graph_executor, produce)
+        async with admission.slot():
+            admitted.set_result(None)
+            await loop.run_in_executor(graph_executor, produce)
+
+    start = time.perf_counter()
+    runner = asyncio.create_task(run_stream())
+    _stream_runs.add(runner)
+    runner.add_done_callback(_stream_runs.discard)
+    await asyncio.wait((admitted, runner), return_when=asyncio.FIRST_COMPLETED)
+    if not admitted.done():
+        runner.result()  # raises Overloaded: answered 429 by overloaded_handler
+
+    async def events():
+        final: Dict[str, Any] = {}
+        failed = False
+        yield _sse("accepted", {"ticket_id": request.ticket_id, "timestamp": datetime.now().isoformat()})
+        try:
+            while True:
+                kind, payload = await queue.get()
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if kind == "done":
+                    break
+                if kind == "error":
+                    failed = True
+                    logger.error(f"Error streaming ticket: {payload}", extra={"ticket_id": request.ticket_id})
+                    yield _sse("error", {"ticket_id": request.ticket_id, "error": str(payload), "elapsed_ms": elapsed_ms})
+                    continue
+                for node, update in payload.items():
+                    update = update or {}
+                    final.update(update)
+                    data = {k: update[k] for k in STREAM_FIELDS.get(node, ()) if k in update}
+                    if update.get("error"):
+                        data["error"] = update["error"]
+                    yield _sse(node, dict(data, ticket_id=request.ticket_id, elapsed_ms=elapsed_ms))
+            if not failed:
+                yield _sse("result", {
+                    "ticket_id": request.ticket_id,
+                    "output": final.get("final_reply") or "No response generated",
+                    "category": final.get("category", "Unknown"),
+                    "escalated": final.get("escalated", False),
+                    "timestamp": datetime.now().isoformat(),
+                    "processing_time": time.perf_counter() - start,
+                })
+            # produce has returned; end the response once its slot is given back
+            await runner
+        finally:
+            # Client went away or stream finished: stop consuming graph steps
+            stop.set()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/process_ticket")
 async def process_ticket(request: Request):
+    body: Dict[str, Any] = {}
     try:
         body = await request.json()
-        if not graph:
+        if not get_pipeline():
             return {"error": "LangGraph not initialized", "status": "error"}
 
-        ticket_id = body.get("ticket_id", f"TICKET-{datetime.now().strftime('%Y%m%d%H%M%S')}")
-        subject = body.get("subject", "")
-        description = next((body.get(f) for f in ["description", "content", "text", "body", "message"] if body.get(f)), None)
-
-        if not description:
+        ticket_id, state = ticket_state_from_body(body)
+        if state is None:
             return {"error": "Missing ticket description", "status": "error", "ticket_id": ticket_id}
 
-        if not subject:
-            subject = description.split("\n", 1)[0][:100]
-
-        state = GraphState(
-            ticket_id=ticket_id,
-            subject=subject,
-            description=description,
-            ticket_text=description,
-        )
-
         start = datetime.now()
-        result = graph.invoke(state, config={"recursion_limit": 50})
+        result, cached = await run_ticket(state)
         elapsed = (datetime.now() - start).total_seconds()
+        _log_ticket(ticket_id, result, cached, elapsed)
 
         return {
             "ticket_id": ticket_id,
             "category": get_result_attr(result, "category", "Unknown"),
             "response": get_result_attr(result, "final_reply", "No response generated"),
             "escalated": get_result_attr(result, "escalated", False),
+            "cached": cached,
             "timestamp": datetime.now().isoformat(),
             "processing_time_seconds": elapsed,
         }
 
+    except Overloaded:
+        raise
     except Exception as e:
-        logger.exception("Top-level error")
+        logger.exception("Top-level error", extra={"ticket_id": body.get("ticket_id")})
         return {
             "error": str(e),
             "status": "error",
@@ -177,3 +630,137 @@ async def process_ticket(request: Request):
             "response": "We encountered an issue while processing your ticket.",
             "timestamp": datetime.now().isoformat(),
         }
+
+
+@app.post("/api/enhanced_ticket")
+async def enhanced_ticket(request: EnhancedTicketRequest):
+    """
+    Process one ticket with its priority, tags and customer details. Waiting tickets are
+    served by priority class (see app/scheduler.py): urgent and Security tickets keep low
+    latency while a flood of lower-priority tickets is queued.
+    """
+    if not get_pipeline():
+        return {"error": "LangGraph not initialized", "status": "error", "ticket_id": request.ticket_id}
+
+    state = GraphState(
+        ticket_id=request.ticket_id,
+        subject=request.subject,
+        description=request.description,
+        ticket_text=request.description,
+    )
+    priority = priority_class(request.priority, request.tags, request.subject, request.description)
+
+    try:
+        start = datetime.now()
+        result, cached = await run_ticket(state, priority)
+        elapsed = (datetime.now() - start).total_seconds()
+        _log_ticket(request.ticket_id, result, cached, elapsed)
+
+        return {
+            "ticket_id": request.ticket_id,
+            "category": get_result_attr(result, "category", "Unknown"),
+            "response": get_result_attr(result, "final_reply", "No response generated"),
+            "escalated": get_result_attr(result, "escalated", False),
+            "priority_class": priority,
+            "cached": cached,
+            "timestamp": datetime.now().isoformat(),
+            "processing_time_seconds": elapsed,
+        }
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.exception("Error processing ticket", extra={"ticket_id": request.ticket_id})
+        return {
+            "ticket_id": request.ticket_id,
+            "error": str(e),
+            "status": "error",
+            "category": "Unknown",
+            "escalated": False,
+            "priority_class": priority,
+            "response": "We encountered an issue while processing your ticket.",
+            "timestamp": datetime.now().isoformat(),
+        }
+
+
+@app.post("/api/process_tickets")
+async def process_tickets(request: Request):
+    """
+    Process a burst of tickets in one round trip.
+    Accepts a JSON array (or {"tickets": [...]}) of process_ticket payloads and runs them
+    up to BATCH_MAX_CONCURRENCY at a time; one failing ticket does not abort the others.
+    Each ticket goes through the result cache and is admitted in its own priority class;
+    a shed ticket is reported with its retry_after, and the call is answered 429 only
+    when every ticket was shed.
+    """
+    if not get_pipeline():
+        return {"error": "LangGraph not initialized", "status": "error"}
+    try:
+        body = await request.json()
+    except Exception:
+        return {"error": "Invalid JSON body", "status": "error"}
+
+    tickets = body.get("tickets") if isinstance(body, dict) else body
+    if not isinstance(tickets, list) or not tickets:
+        return {"error": "Expected a non-empty array of tickets", "status": "error"}
+    if len(tickets) > config.BATCH_MAX_TICKETS:
+        return {"error": f"Batch too large (max {config.BATCH_MAX_TICKETS} tickets)", "status": "error"}
+
+    batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    results: List[Optional[Dict[str, Any]]] = [None] * len(tickets)
+    pending = []  # (position, ticket_id, state)
+    for i, ticket in enumerate(tickets):
+        if not isinstance(ticket, dict):
+            results[i] = {"ticket_id": f"TICKET-{batch_id}-{i}", "status": "error", "error": "Ticket must be an object"}
+            continue
+        ticket_id, state = ticket_state_from_body(ticket, default_id=f"TICKET-{batch_id}-{i}")
+        if state is None:
+            results[i] = {"ticket_id": ticket_id, "status": "error", "error": "Missing ticket description"}
+        else:
+            pending.append((i, ticket_id, state))
+
+    start = datetime.now()
+    # Each ticket is admitted on its own, in its priority class, so urgent tickets and other requests
+    # get slots between batch tickets; at most BATCH_MAX_CONCURRENCY of the batch run at once
+    limit = asyncio.Semaphore(config.BATCH_MAX_CONCURRENCY)
+
+    async def run_one(ticket: Dict[str, Any], state: GraphState):
+        priority = priority_class(ticket.get("priority"), ticket.get("tags"), state.subject, state.description)
+        async with limit:
+            return await run_ticket(state, priority)
+
+    outcomes = await asyncio.gather(*(run_one(tickets[i], state) for i, _, state in pending), return_exceptions=True)
+    shed = []
+    ran = 0
+    for (i, ticket_id, _), outcome in zip(pending, outcomes):
+        if isinstance(outcome, Overloaded):
+            shed.append(outcome)
+            results[i] = {"ticket_id": ticket_id, "status": "error", "error": str(outcome),
+                          "retry_after": outcome.retry_after}
+        elif isinstance(outcome, Exception):
+            logger.error(f"Batch ticket failed: {outcome}", extra={"ticket_id": ticket_id})
+            results[i] = {"ticket_id": ticket_id, "status": "error", "error": str(outcome)}
+        else:
+            output, cached = outcome
+            ran += not cached
+            results[i] = {
+                "ticket_id": ticket_id,
+                "status": "ok",
+                "category": get_result_attr(output, "category", "Unknown"),
+                "response": get_result_attr(output, "final_reply", "No response generated"),
+                "escalated": get_result_attr(output, "escalated", False),
+                "cached": cached,
+            }
+    if shed and len(shed) == len(pending):
+        raise shed[0]  # nothing was admitted: answered 429 by overloaded_handler
+    elapsed = (datetime.now() - start).total_seconds()
+
+    failed = sum(1 for r in results if r["status"] == "error")
+    return {
+        "results": results,
+        "count": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "timestamp": datetime.now().isoformat(),
+        "processing_time_seconds": elapsed,
+        "avg_ticket_seconds": elapsed / ran if ran else 0.0,
+    }
@@ -1,7 +1,14 @@
 # app/state.py
+import json
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
-@dataclass
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+from app import config
+
+
+@dataclass(slots=True)
 class GraphState:
     # Input
     ticket_id: Optional[str] = None
@@ -11,10 +18,12 @@ class GraphState:
 
     # Pipeline state
     category: Optional[str] = None
-    context: List[str] = field(default_factory=list)   # retrieved docs / context snippets
+    # ids of the retrieved docs, best first; texts are looked up with retrieve.resolve_context
+    context_ids: List[str] = field(default_factory=list)
     draft_reply: Optional[str] = None
-    
-    # Track all drafts and feedback for logging
+
+    # Recent drafts and feedback for the escalation log, capped at STATE_HISTORY_LIMIT entries.
+    # Only the newest draft is stored in full; read drafts back with expand_drafts()
     all_drafts: List[str] = field(default_factory=list)
     all_feedback: List[str] = field(default_factory=list)
 
@@ -28,3 +37,87 @@ class GraphState:
 
     # ✅ Add this
     done: bool = False  # Marks workflow completion so graph exits cleanly
+
+
+def append_history(history: Optional[List[str]], item: str, limit: Optional[int] = None) -> List[str]:
+    """
+    New list with `item` appended, keeping the most recent `limit` entries.
+    The input list is never mutated: earlier checkpoints and cached results may share it.
+    """
+    limit = config.STATE_HISTORY_LIMIT if limit is None else limit
+    items = list(history or ())
+    items.append(item)
+    return items[-limit:] if limit > 0 else items
+
+
+# Older drafts are stored as line deltas against the draft that replaced them. Drafts embed
+# the retrieved articles, so consecutive drafts share almost every byte.
+_DELTA_PREFIX = "\x00delta:"
+
+
+def _line_delta(old: str, new: str) -> str:
+    """Encode `old` as ops over the lines of `new`: [start, end] copies a slice, a string is literal."""
+    new_lines = new.splitlines(keepends=True)
+    old_lines = old.splitlines(keepends=True)
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, new_lines, old_lines, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(old_lines[j1:j2]))
+    return _DELTA_PREFIX + json.dumps(ops)
+
+
+def _apply_delta(delta: str, new: str) -> str:
+    new_lines = new.splitlines(keepends=True)
+    out = []
+    for op in json.loads(delta[len(_DELTA_PREFIX):]):
+        out.append("".join(new_lines[op[0]:op[1]]) if isinstance(op, list) else op)
+    return "".join(out)
+
+
+def append_draft(history: Optional[List[str]], draft: str, limit: Optional[int] = None) -> List[str]:
+    """append_history for drafts: the previous newest draft is re-stored as a delta against `draft`."""
+    items = list(history or ())
+    if items and not items[-1].startswith(_DELTA_PREFIX):
+        items[-1] = _line_delta(items[-1], draft)
+    return append_history(items, draft, limit)
+
+
+def expand_drafts(history: Optional[List[str]]) -> List[str]:
+    """Full text of every draft in an all_drafts history, oldest first."""
+    items = list(history or ())
+    for i in range(len(items) - 2, -1, -1):
+        if items[i].startswith(_DELTA_PREFIX):
+            items[i] = _apply_delta(items[i], items[i + 1])
+    return items
+
+
+_MISSING = object()
+
+
+class StateView:
+    """
+    Read-only view of a node's input state with pending updates layered on top.
+    Lets a node feed another node's output to a third node without copying the state.
+    Supports both access styles nodes use: attribute access and .get().
+    """
+
+    __slots__ = ("_base", "_updates")
+
+    def __init__(self, base: Any, updates: Optional[Dict[str, Any]] = None):
+        self._base = base
+        self._updates = updates or {}
+
+    def get(self, key: str, default=None):
+        if key in self._updates:
+            return self._updates[key]
+        if isinstance(self._base, Mapping):
+            return self._base.get(key, default)
+        return getattr(self._base, key, default)
+
+    def __getattr__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(key)
+        return value
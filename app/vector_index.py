@@ -0,0 +1,116 @@
+# app/vector_index.py
+"""
+Vectorized retrieval modes (RETRIEVAL_MODE=tfidf | hashing).
+
+Both precompute a document matrix once per corpus and score a ticket with a
+single matrix-vector product followed by an argpartition top-k:
+
+- TfidfIndex keeps a sparse CSR matrix in plain NumPy arrays (no SciPy).
+- HashingIndex keeps a dense matrix of signed feature-hashed term weights,
+  a cheap local embedding with a fixed width.
+
+Rows are L2-normalized, so scores are cosine similarities.
+"""
+import math
+import zlib
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app import config
+from app.bm25 import tokenize
+
+
+def _top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Indices of the k best positive scores, best first; ties keep corpus order."""
+    if k <= 0 or scores.size == 0:
+        return []
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    order = sorted(candidates.tolist(), key=lambda i: (-scores[i], i))
+    return [(i, float(scores[i])) for i in order if scores[i] > 0]
+
+
+class TfidfIndex:
+    """Sublinear-tf TF-IDF over a CSR matrix: indptr/indices/data arrays."""
+
+    def __init__(self, docs: Sequence[str]):
+        self.size = len(docs)
+        self.vocab: Dict[str, int] = {}
+        counts: List[Counter] = [Counter(tokenize(doc)) for doc in docs]
+
+        doc_freq: Counter = Counter()
+        for tf in counts:
+            doc_freq.update(tf.keys())
+        for term in sorted(doc_freq):
+            self.vocab[term] = len(self.vocab)
+        self.idf = np.zeros(len(self.vocab), dtype=np.float32)
+        for term, df in doc_freq.items():
+            self.idf[self.vocab[term]] = math.log((1.0 + self.size) / (1.0 + df)) + 1.0
+
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for tf in counts:
+            cols = [self.vocab[t] for t in tf]
+            weights = np.array([1.0 + math.log(f) for f in tf.values()], dtype=np.float32)
+            weights *= self.idf[cols] if cols else 1.0
+            norm = float(np.linalg.norm(weights)) if cols else 0.0
+            indices.extend(cols)
+            data.extend((weights / norm).tolist() if norm else weights.tolist())
+            indptr.append(len(indices))
+
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+        # Row id of every stored value, so the mat-vec is one bincount
+        self.rows = np.repeat(np.arange(self.size, dtype=np.int32), np.diff(np.asarray(indptr)))
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        q = np.zeros(len(self.vocab), dtype=np.float32)
+        for term, freq in Counter(tokenize(query)).items():
+            col = self.vocab.get(term)
+            if col is not None:
+                q[col] = (1.0 + math.log(freq)) * self.idf[col]
+        norm = float(np.linalg.norm(q))
+        return q / norm if norm else q
+
+    def scores(self, query: str) -> np.ndarray:
+        q = self._query_vector(query)
+        return np.bincount(self.rows, weights=self.data * q[self.indices], minlength=self.size)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        return _top_k(self.scores(query), k)
+
+
+def _feature(term: str, dim: int) -> Tuple[int, float]:
+    # crc32 is stable across processes, unlike hash()
+    h = zlib.crc32(term.encode("utf-8"))
+    return h % dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+class HashingIndex:
+    """Dense signed feature-hashing embedding, `dim` columns wide."""
+
+    def __init__(self, docs: Sequence[str], dim: int = None):
+        self.dim = config.HASHING_DIM if dim is None else dim
+        self.size = len(docs)
+        self.matrix = np.zeros((self.size, self.dim), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            self.matrix[row] = self._embed(doc)
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for term, freq in Counter(tokenize(text)).items():
+            col, sign = _feature(term, self.dim)
+            vec[col] += sign * (1.0 + math.log(freq))
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def scores(self, query: str) -> np.ndarray:
+        return self.matrix @ self._embed(query)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        return _top_k(self.scores(query), k)
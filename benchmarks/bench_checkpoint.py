@@ -0,0 +1,115 @@
+# benchmarks/bench_checkpoint.py
+"""
+Per-node cost of checkpointing ticket runs.
+
+Runs the same tickets through the graph without a checkpointer, with
+LangGraph's InMemorySaver, with SQLiteCheckpointSaver writing only changed
+channels (what the server uses), and with a variant that rewrites every
+channel at each step. For each it reports the latency per ticket, the
+overhead per node run, the bytes serialized per ticket and the rows left in
+the database.
+
+Usage:
+    python -m benchmarks.bench_checkpoint --tickets 300
+    python -m benchmarks.bench_checkpoint --durability sync --keep 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# Escalations go to a throwaway file, written synchronously
+_TMP = tempfile.mkdtemp(prefix="bench-checkpoint-")
+os.environ.setdefault("ESCALATION_FILE", os.path.join(_TMP, "escalations.csv"))
+os.environ.setdefault("ESCALATION_DB", os.path.join(_TMP, "escalations.sqlite"))
+os.environ.setdefault("ESCALATION_ASYNC", "0")
+
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+from app.checkpoint import ResumableGraph, SQLiteCheckpointSaver  # noqa: E402
+from app.graph import build_graph  # noqa: E402
+
+# One approve, one refine-then-approve and one escalate (two refine passes) path
+TICKETS = [
+    {"subject": "Server Down Issue", "description": "The server is down with a 500 error"},
+    {"subject": "Refund Request", "description": "I need a refund for my last invoice"},
+    {"subject": "Urgent: Money Back", "description": "I demand a $1M refund immediately"},
+]
+
+
+class CountingSerde(JsonPlusSerializer):
+    """Counts the bytes a saver serializes."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    def dumps_typed(self, obj):
+        type_, data = super().dumps_typed(obj)
+        self.bytes += len(data)
+        return type_, data
+
+
+class FullStateSaver(SQLiteCheckpointSaver):
+    """Writes every channel at every step, as a checkpointer without deltas would."""
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return super().put(config, checkpoint, metadata, dict(checkpoint["channel_versions"]))
+
+
+def _inputs(tickets: int):
+    return [dict(TICKETS[i % len(TICKETS)], ticket_id=f"BENCH-{i}") for i in range(tickets)]
+
+
+def run(label: str, saver, tickets: int, durability: str, baseline_us: float = None) -> float:
+    graph = build_graph(instrument=False, checkpointer=saver)
+    nodes = 0
+    if saver is None:
+        invoke = lambda ticket: graph.invoke(ticket, {"recursion_limit": 50})  # noqa: E731
+    elif isinstance(saver, SQLiteCheckpointSaver):
+        resumable = ResumableGraph(graph, saver, durability=durability)
+        invoke = lambda ticket: resumable.invoke(ticket, {"recursion_limit": 50})  # noqa: E731
+    else:
+        invoke = lambda ticket: graph.invoke(  # noqa: E731
+            ticket, {"recursion_limit": 50, "configurable": {"thread_id": ticket["ticket_id"]}}, durability=durability)
+    for ticket in _inputs(len(TICKETS)):
+        invoke(dict(ticket, ticket_id="WARM-" + ticket["ticket_id"]))
+    serde = getattr(saver, "serde", None)
+    if isinstance(serde, CountingSerde):
+        serde.bytes = 0
+    inputs = _inputs(tickets)
+    start = time.perf_counter()
+    for ticket in inputs:
+        result = invoke(ticket)
+        nodes += 4 + 2 * int(result.get("retries", 0)) + (1 if result.get("escalated") else 0)
+    per_ticket = (time.perf_counter() - start) / tickets * 1e6
+    line = f"{label:<22} {per_ticket:9.1f} us/ticket"
+    if baseline_us is not None:
+        line += f"  {(per_ticket - baseline_us) * tickets / nodes:+8.1f} us/node"
+    if isinstance(serde, CountingSerde):
+        line += f"  {serde.bytes / tickets:9.0f} bytes/ticket"
+    if isinstance(saver, SQLiteCheckpointSaver):
+        line += f"  left in db: {saver.stats()}"
+    print(line)
+    return per_ticket
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--keep", type=int, default=2, help="Checkpoints kept per run (CHECKPOINT_KEEP)")
+    parser.add_argument("--durability", choices=("async", "sync", "exit"), default="async")
+    args = parser.parse_args()
+
+    print(f"{args.tickets} tickets, durability={args.durability}, keep={args.keep}, db in {_TMP}")
+    baseline = run("no checkpointer", None, args.tickets, args.durability)
+    run("InMemorySaver", InMemorySaver(serde=CountingSerde()), args.tickets, args.durability, baseline)
+    run("sqlite, deltas", SQLiteCheckpointSaver(os.path.join(_TMP, "deltas.sqlite"), keep=args.keep,
+                                                 serde=CountingSerde()), args.tickets, args.durability, baseline)
+    run("sqlite, full state", FullStateSaver(os.path.join(_TMP, "full.sqlite"), keep=args.keep,
+                                             serde=CountingSerde()), args.tickets, args.durability, baseline)
+
+
+if __name__ == "__main__":
+    main()
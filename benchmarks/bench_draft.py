@@ -0,0 +1,74 @@
+# benchmarks/bench_draft.py
+"""
+Draft size and downstream cost with and without a context budget.
+
+The knowledge base is generated as in bench_refine (Zipf vocabulary,
+--doc-words words per article), so the retrieved context runs to several
+kilobytes per ticket. Each ticket goes through retrieve, draft and review,
+and the same tickets are run once per budget. The report gives, per
+budget, the median draft size and the median time of draft and review.
+Review scans every draft, so a smaller draft is cheaper for review too.
+Budget 0 is unbounded: every retrieved document, in full.
+
+Usage:
+    python -m benchmarks.bench_draft --docs 2000 --doc-words 300 --tickets 200
+    python -m benchmarks.bench_draft --budgets 0 500 1500 4000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from app import config, retrievers
+from app.nodes import retrieve as retrieve_module
+from app.nodes.classify import classify
+from app.nodes.draft import draft
+from app.nodes.retrieve import retrieve
+from app.nodes.review import review
+from benchmarks.bench_refine import make_corpus
+
+
+def run(tickets: int, budget: int):
+    config.CONTEXT_BUDGET_CHARS = budget
+    retrieve_module._BLOCKS.clear()
+    sizes, draft_ms, review_ms = [], [], []
+    for i in range(tickets):
+        state = {"ticket_id": f"D-{i}", "subject": "Invoice question",
+                 "description": f"My invoice {i} shows a duplicate charge on the billing cycle"}
+        state.update(classify(state))
+        state.update(retrieve(state))
+        start = time.perf_counter()
+        state.update(draft(state))
+        draft_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        review(state)
+        review_ms.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(state["draft_reply"]))
+    return sizes, draft_ms, review_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000, help="Articles per category")
+    parser.add_argument("--doc-words", type=int, default=300, help="Words per article")
+    parser.add_argument("--tickets", type=int, default=200)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 4000, 1500, 500],
+                        help="CONTEXT_BUDGET_CHARS values (0 = unbounded)")
+    args = parser.parse_args()
+
+    kb = tempfile.mkdtemp(prefix="bench-draft-")
+    make_corpus(kb, args.docs, args.doc_words)
+    retrievers.CORPUS = retrievers.CorpusCache(base_path=kb, refresh_seconds=3600)
+    retrieve({"category": "Billing", "subject": "warm", "description": "index build"})
+    config.CONTEXT_BUDGET_TOKENS = 0
+
+    print(f"{args.docs} x {args.doc_words}-word articles, top {config.RETRIEVAL_TOP_K}, {args.tickets} tickets (medians)")
+    for budget in args.budgets:
+        sizes, draft_ms, review_ms = run(args.tickets, budget)
+        label = "unbounded" if budget == 0 else f"{budget} chars"
+        print(f"budget {label:<11} draft {statistics.median(sizes):7.0f} chars  "
+              f"draft {statistics.median(draft_ms):6.3f}ms  review {statistics.median(review_ms):6.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
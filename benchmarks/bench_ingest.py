@@ -0,0 +1,93 @@
+# benchmarks/bench_ingest.py
+"""
+Bulk ingestion: first run, unchanged re-run, and re-run after editing 1% of articles.
+
+Articles are Zipf-distributed word salad spread over the four categories.
+They are written either as a directory tree (<Category>/<id>.txt) or as one
+JSONL dump.
+
+Usage:
+    python -m benchmarks.bench_ingest --docs 50000 --source dir
+    python -m benchmarks.bench_ingest --docs 50000 --source jsonl --workers 4
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+
+from scripts.ingest import CATEGORY_DIRS, BulkIngest
+
+
+def _articles(docs: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(20000)]
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocab))))
+    categories = sorted(CATEGORY_DIRS)
+    for i in range(docs):
+        paragraphs = [" ".join(rng.choices(vocab, cum_weights=cum_weights, k=words // 4)) for _ in range(4)]
+        yield f"a{i:06d}", categories[i % len(categories)], "\n\n".join(paragraphs)
+
+
+def write_source(base: str, kind: str, docs: int, words: int) -> str:
+    if kind == "jsonl":
+        path = os.path.join(base, "dump.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for article_id, category, text in _articles(docs, words):
+                f.write(json.dumps({"id": article_id, "category": category, "title": article_id, "text": text}) + "\n")
+        return path
+    root = os.path.join(base, "articles")
+    for article_id, category, text in _articles(docs, words):
+        os.makedirs(os.path.join(root, category), exist_ok=True)
+        with open(os.path.join(root, category, f"{article_id}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+    return root
+
+
+def edit_source(source: str, kind: str, fraction: float):
+    if kind == "jsonl":
+        with open(source, encoding="utf-8") as f:
+            lines = f.readlines()
+        step = int(1 / fraction)
+        for i in range(0, len(lines), step):
+            record = json.loads(lines[i])
+            record["text"] += " edited"
+            lines[i] = json.dumps(record) + "\n"
+        with open(source, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        return
+    paths = sorted(os.path.join(d, n) for d, _, names in os.walk(source) for n in names)
+    for path in paths[::int(1 / fraction)]:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(" edited")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=200, help="Words per article")
+    parser.add_argument("--source", choices=("dir", "jsonl"), default="dir")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench-ingest-")
+    data = os.path.join(base, "data")
+    os.makedirs(data)
+    source = write_source(base, args.source, args.docs, args.words)
+
+    def run(label):
+        start = time.perf_counter()
+        stats = BulkIngest(data, workers=args.workers).run([source])
+        print(f"{label:<22} {time.perf_counter() - start:8.2f}s  {json.dumps(stats)}")
+
+    print(f"{args.docs} articles x {args.words} words ({args.source} source), data in {data}")
+    run("first ingest")
+    run("unchanged re-ingest")
+    edit_source(source, args.source, 0.01)
+    run("1% edited")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_keywords.py
+"""
+Keyword matching cost on long ticket bodies: the legacy per-node substring
+scans versus one compiled-regex pass shared by classify and review.
+
+Usage:
+    python -m benchmarks.bench_keywords --sizes 1000 10000 100000 --repeat 200
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+from app.keywords import MATCHER, SENSITIVE, category_for
+
+_LEGACY_BILLING = ["invoice", "refund", "payment", "bill", "billing"]
+_LEGACY_TECHNICAL = ["server", "error", "bug", "crash", "latency", "api"]
+_LEGACY_SECURITY = ["hack", "phish", "breach", "password", "2fa", "unauthorized"]
+_LEGACY_SENSITIVE = ["password", "ssn", "credit card"]
+
+_FILLER = (
+    "customer reports that the dashboard shows stale numbers after the nightly sync and "
+    "the export button sometimes does nothing until the page is reloaded twice "
+).split()
+
+
+def make_body(n_chars: int, keyword: str = None, seed: int = 3) -> str:
+    """Filler prose of about n_chars, with `keyword` near the end (the legacy worst case)."""
+    rng = random.Random(seed)
+    words: List[str] = []
+    size = 0
+    while size < n_chars:
+        w = rng.choice(_FILLER)
+        words.append(w)
+        size += len(w) + 1
+    if keyword:
+        words.insert(max(0, len(words) - 3), keyword)
+    return " ".join(words)
+
+
+def legacy(subject: str, description: str, draft: str) -> str:
+    # classify
+    combined = f"{subject.lower()} {description.lower()}".lower()
+    if any(w in combined for w in _LEGACY_BILLING):
+        category = "Billing"
+    elif any(w in combined for w in _LEGACY_TECHNICAL):
+        category = "Technical"
+    elif any(w in combined for w in _LEGACY_SECURITY):
+        category = "Security"
+    else:
+        category = "General"
+    # review
+    combined = f"{subject.lower()} {description.lower()}".lower()
+    draft = draft.lower()
+    any(p in draft for p in _LEGACY_SENSITIVE)
+    any(p in combined for p in _LEGACY_TECHNICAL)
+    "refund" in combined
+    ("$" in combined) or ("demand" in combined)
+    return category
+
+
+def compiled(subject: str, description: str, draft: str) -> str:
+    groups = MATCHER.groups(f"{subject} {description}")  # classify; review reuses the memoized result
+    MATCHER.groups(draft, groups=(SENSITIVE,))  # review: draft policy scan
+    return category_for(groups)
+
+
+def _time(fn, args, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict[str, float]]:
+    results = []
+    for size in sizes:
+        for keyword in (None, "latency"):
+            body = make_body(size, keyword)
+            args = ("Dashboard problem", body, "Hello! " + body)
+            assert legacy(*args) == compiled(*args)
+            results.append({
+                "chars": size,
+                "keyword": keyword or "none",
+                "legacy_us": _time(legacy, args, repeat),
+                "compiled_us": _time(compiled, args, repeat),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    for r in results:
+        print(
+            f"{r['chars']:>7} chars | keyword {r['keyword']:<7} | legacy {r['legacy_us']:9.1f}us | "
+            f"compiled {r['compiled_us']:9.1f}us"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
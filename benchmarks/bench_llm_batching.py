@@ -0,0 +1,88 @@
+# benchmarks/bench_llm_batching.py
+"""
+Tickets through the graph with a model backend: one call per prompt vs
+micro-batched calls.
+
+Every ticket makes three model calls (classify, draft, review) to a
+StubBackend that takes --model-ms per call, whatever its batch size, as a
+batched model server roughly does, and at most --model-concurrency calls
+run at once (LLM_BATCH_CONCURRENCY). --concurrency tickets run at once,
+like the server's graph executor. Each setting of (batch size, linger) is run
+over the same --tickets tickets; the report gives throughput, ticket
+latency (p50/p99), model calls per ticket and the average batch size.
+
+Usage:
+    python -m benchmarks.bench_llm_batching --tickets 400 --concurrency 8
+    python -m benchmarks.bench_llm_batching --model-ms 100 --model-concurrency 4 --settings 1:0 8:2 16:10
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Escalations go to a throwaway file
+_TMP = tempfile.mkdtemp(prefix="bench-llm-")
+os.environ.setdefault("ESCALATION_FILE", os.path.join(_TMP, "escalations.csv"))
+os.environ.setdefault("ESCALATION_DB", os.path.join(_TMP, "escalations.sqlite"))
+
+from app.graph import build_graph  # noqa: E402
+from app.llm import MicroBatcher, StubBackend, set_llm  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+TICKETS = [
+    {"subject": "App crash", "description": "The app shows an error on startup"},
+    {"subject": "Office Hours", "description": "Can you tell me your office hours?"},
+    {"subject": "Invoice", "description": "I was charged twice on my invoice this month"},
+    {"subject": "Login alert", "description": "I got a login alert from another country"},
+]
+CONFIG = {"recursion_limit": 50}
+
+
+def run_setting(graph, batch_size: int, linger_ms: float, model_seconds: float, model_concurrency: int,
+                tickets: int, concurrency: int):
+    batcher = MicroBatcher(StubBackend(model_seconds), max_batch_size=batch_size,
+                           linger_seconds=linger_ms / 1000, concurrency=model_concurrency)
+    previous = set_llm(batcher)
+    latencies = []
+
+    def one(i: int):
+        start = time.perf_counter()
+        graph.invoke(dict(TICKETS[i % len(TICKETS)], ticket_id=f"LLM-{i}"), CONFIG)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(tickets)))
+        elapsed = time.perf_counter() - start
+    finally:
+        set_llm(previous)
+        batcher.close()
+    return elapsed, latencies, batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8, help="Tickets in flight (GRAPH_MAX_CONCURRENCY)")
+    parser.add_argument("--model-ms", type=float, default=50.0, help="Simulated latency per model call")
+    parser.add_argument("--model-concurrency", type=int, default=2, help="Model calls in flight")
+    parser.add_argument("--settings", nargs="+", default=["1:0", "8:0", "8:2", "8:5", "8:20"],
+                        help="batch_size:linger_ms pairs (1:0 is one call per prompt)")
+    args = parser.parse_args()
+
+    graph = build_graph(instrument=False)
+    print(f"{args.tickets} tickets, {args.concurrency} in flight, {args.model_ms:.0f}ms per model call, "
+          f"{args.model_concurrency} calls at once")
+    for setting in args.settings:
+        batch_size, linger_ms = setting.split(":")
+        elapsed, latencies, stats = run_setting(graph, int(batch_size), float(linger_ms), args.model_ms / 1000,
+                                                args.model_concurrency, args.tickets, args.concurrency)
+        print(f"batch {int(batch_size):>3} linger {float(linger_ms):5.1f}ms  {args.tickets / elapsed:7.1f} tickets/s  "
+              f"p50 {percentile(latencies, 0.5):7.1f}ms p99 {percentile(latencies, 0.99):7.1f}ms  "
+              f"calls/ticket {stats['calls'] / args.tickets:5.2f}  batch avg {stats['batch_size_avg']:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_llm_cache.py
+"""
+Model calls and ticket latency with and without the prompt cache.
+
+--tickets tickets are drawn from --distinct distinct ones (Zipf-like, so a
+few recur often, like duplicate tickets and resubmissions). They run
+through the graph with a StubBackend that takes --model-ms per call,
+behind the usual MicroBatcher. Three runs over the same ticket stream:
+
+- no cache: every prompt goes to the model;
+- cold: memory and disk tiers start empty;
+- restart: a new process would start with an empty memory tier, but
+  the SQLite file from the cold run is still there.
+
+The report gives model calls per ticket, memory/disk hit counts, throughput
+and ticket latency (p50/p99).
+
+Usage:
+    python -m benchmarks.bench_llm_cache --tickets 400 --distinct 60
+    python -m benchmarks.bench_llm_cache --model-ms 200 --max-bytes 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Escalations go to a throwaway file
+_TMP = tempfile.mkdtemp(prefix="bench-llm-cache-")
+os.environ.setdefault("ESCALATION_FILE", os.path.join(_TMP, "escalations.csv"))
+os.environ.setdefault("ESCALATION_DB", os.path.join(_TMP, "escalations.sqlite"))
+
+from app.graph import build_graph  # noqa: E402
+from app.llm import MicroBatcher, StubBackend, set_llm  # noqa: E402
+from app.llm_cache import PromptCache  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+SUBJECTS = ["App crash", "Invoice", "Login alert", "Office Hours", "Refund", "Slow dashboard"]
+CONFIG = {"recursion_limit": 50}
+
+
+def ticket_stream(tickets: int, distinct: int, seed: int = 7):
+    rng = random.Random(seed)
+    pool = [{"subject": SUBJECTS[i % len(SUBJECTS)],
+             "description": f"{SUBJECTS[i % len(SUBJECTS)]} problem number {i}, please help"}
+            for i in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return [dict(ticket, ticket_id=f"CACHE-{i}") for i, ticket in enumerate(rng.choices(pool, weights, k=tickets))]
+
+
+def run(graph, stream, cache, model_seconds: float, concurrency: int):
+    batcher = MicroBatcher(StubBackend(model_seconds), max_batch_size=concurrency, linger_seconds=0.005,
+                           concurrency=2, cache=cache)
+    previous = set_llm(batcher)
+    latencies = []
+
+    def one(ticket):
+        start = time.perf_counter()
+        graph.invoke(ticket, CONFIG)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, stream))
+        elapsed = time.perf_counter() - start
+    finally:
+        set_llm(previous)
+        stats = batcher.stats()
+        batcher.close()
+    return elapsed, latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=400)
+    parser.add_argument("--distinct", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--model-ms", type=float, default=50.0, help="Simulated latency per model call")
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024, help="Disk tier size limit")
+    parser.add_argument("--memory-entries", type=int, default=4096)
+    args = parser.parse_args()
+
+    graph = build_graph(instrument=False)
+    stream = ticket_stream(args.tickets, args.distinct)
+    db_path = os.path.join(_TMP, "llm_cache.sqlite")
+
+    def cache():
+        return PromptCache(args.memory_entries, ttl_seconds=3600, db_path=db_path, max_bytes=args.max_bytes)
+
+    print(f"{args.tickets} tickets ({args.distinct} distinct), {args.model_ms:.0f}ms per model call")
+    for name, make in (("no cache", lambda: None), ("cold", cache), ("restart", cache)):
+        elapsed, latencies, stats = run(graph, stream, make(), args.model_ms / 1000, args.concurrency)
+        hits = stats.get("cache", {})
+        print(f"{name:<9} prompts/ticket {stats['prompts'] / args.tickets:5.2f}  "
+              f"calls/ticket {stats['calls'] / args.tickets:5.2f}  "
+              f"hits memory {hits.get('hits_memory', 0):>5} disk {hits.get('hits_disk', 0):>5}  "
+              f"disk evictions {hits.get('disk_evictions', 0):>4}  {args.tickets / elapsed:6.0f} tickets/s  "
+              f"p50 {percentile(latencies, 0.5):7.1f}ms p99 {percentile(latencies, 0.99):7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
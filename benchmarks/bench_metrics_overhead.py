@@ -0,0 +1,60 @@
+# benchmarks/bench_metrics_overhead.py
+"""
+Overhead of the per-node timing hook.
+
+Reports the added cost per wrapped node call, and per-ticket graph latency
+with instrumentation on and off.
+
+Usage:
+    python -m benchmarks.bench_metrics_overhead --calls 200000 --tickets 2000
+"""
+import argparse
+import time
+
+from app.graph import build_graph
+from app.metrics import instrument_node
+
+TICKET = {"ticket_id": "BENCH", "subject": "Server Down Issue", "description": "The server is down with a 500 error"}
+
+
+def _noop(state):
+    return {"category": "Technical"}
+
+
+def per_call_ns(calls: int) -> float:
+    wrapped = instrument_node("bench_noop", _noop)
+    state = {"category": "Technical"}
+    start = time.perf_counter()
+    for _ in range(calls):
+        _noop(state)
+    raw = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(calls):
+        wrapped(state)
+    hooked = time.perf_counter() - start
+    return (hooked - raw) / calls * 1e9
+
+
+def per_ticket_us(tickets: int, instrument: bool) -> float:
+    graph = build_graph(instrument=instrument)
+    graph.invoke(dict(TICKET))  # warm indexes
+    start = time.perf_counter()
+    for _ in range(tickets):
+        graph.invoke(dict(TICKET))
+    return (time.perf_counter() - start) / tickets * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--tickets", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"hook overhead per node call: {per_call_ns(args.calls):.0f} ns")
+    off = per_ticket_us(args.tickets, instrument=False)
+    on = per_ticket_us(args.tickets, instrument=True)
+    print(f"graph per ticket: {off:.1f} us uninstrumented, {on:.1f} us instrumented ({(on - off) / off * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
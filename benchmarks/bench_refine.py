@@ -0,0 +1,106 @@
+# benchmarks/bench_refine.py
+"""
+Latency of a refine pass relative to the first retrieve + draft pass.
+
+The knowledge base is generated with a Zipf-distributed vocabulary, with the
+support keywords at mid-range frequencies. Each ticket is unique, so its first
+pass scores the whole category corpus.
+The refine pass then reuses the cached base-query scores, the shared
+feedback-term scores and the rendered context block. The "cold caches" row
+clears those caches before refining.
+
+Usage:
+    python -m benchmarks.bench_refine --docs 5000 --doc-words 300 --tickets 200
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import retrievers
+from app.nodes import retrieve as retrieve_module
+from app.nodes.classify import classify
+from app.nodes.draft import draft
+from app.nodes.refine import refine
+from app.nodes.review import review
+from app.nodes.retrieve import retrieve
+
+_KEYWORDS = (
+    "refund invoice payment billing policy account subscription charge duplicate "
+    "check next step offer promise card plan cycle"
+).split()
+
+
+def make_corpus(base: str, docs: int, doc_words: int, vocab: int = 20000, seed: int = 7):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    for rank, keyword in zip(range(40, 40 + 40 * len(_KEYWORDS), 40), _KEYWORDS):
+        words[rank] = keyword
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(vocab)))
+    for folder in retrievers.CATEGORY_TO_FOLDER.values():
+        os.makedirs(os.path.join(base, folder), exist_ok=True)
+        for i in range(docs):
+            with open(os.path.join(base, folder, f"doc_{i:05d}.txt"), "w", encoding="utf-8") as f:
+                f.write(" ".join(rng.choices(words, cum_weights=cum_weights, k=doc_words)))
+
+
+def _ms(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return (time.perf_counter() - start) * 1000, out
+
+
+def run(tickets: int):
+    first, incremental, rerun = [], [], []
+    for i in range(tickets):
+        state = {"ticket_id": f"R-{i}", "subject": "Refund Request",
+                 "description": f"I need a refund for invoice {i} and the duplicate payment"}
+        state.update(classify(state))
+
+        def first_pass(s):
+            s.update(retrieve(s))
+            s.update(draft(s))
+            return s
+
+        ms, state = _ms(first_pass, state)
+        first.append(ms)
+        state.update(review(state))
+        assert state["review_decision"] == "rejected"
+
+        ms, _ = _ms(refine, state)
+        incremental.append(ms)
+
+        retrieve_module._SCORES.clear()
+        retrieve_module._FEEDBACK.clear()
+        retrieve_module._BLOCKS.clear()
+        ms, _ = _ms(refine, state)
+        rerun.append(ms)
+    return first, incremental, rerun
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000, help="Articles per category")
+    parser.add_argument("--doc-words", type=int, default=300, help="Words per article")
+    parser.add_argument("--tickets", type=int, default=200)
+    args = parser.parse_args()
+
+    kb = tempfile.mkdtemp(prefix="bench-refine-")
+    make_corpus(kb, args.docs, args.doc_words)
+    retrievers.CORPUS = retrievers.CorpusCache(base_path=kb, refresh_seconds=3600)
+    retrieve({"category": "Billing", "subject": "warm", "description": "index build"})
+
+    first, incremental, rerun = run(args.tickets)
+    base = statistics.median(first)
+    print(f"{args.docs} x {args.doc_words}-word Billing articles, {args.tickets} tickets (median ms)")
+    print(f"first retrieve + draft  {base:8.3f}")
+    for label, samples in (("refine, incremental", incremental), ("refine, cold caches", rerun)):
+        med = statistics.median(samples)
+        print(f"{label:<23} {med:8.3f}  ({med / base:.0%} of first pass)")
+
+
+if __name__ == "__main__":
+    main()
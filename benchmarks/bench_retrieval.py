@@ -0,0 +1,115 @@
+# benchmarks/bench_retrieval.py
+"""
+Compare the retrieval indexes against the legacy linear scorer.
+
+Each query is sampled from a known target document plus noise terms, so
+recall@k (target found in the top k) is reported next to latency.
+
+Usage:
+    python -m benchmarks.bench_retrieval --docs 10000 100000 --queries 50
+    python -m benchmarks.bench_retrieval --modes linear bm25 tfidf hashing
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.bm25 import BM25Index
+from app.nodes.retrieve import _filter_docs_by_query
+
+MODES = ("linear", "bm25", "tfidf", "hashing")
+
+
+def make_corpus(n_docs: int, vocab_size: int = 20000, doc_len: int = 60, seed: int = 7) -> List[str]:
+    """Synthetic articles with a Zipf-like word distribution."""
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+    cum, total = [], 0.0
+    for w in weights:
+        total += w
+        cum.append(total)
+    return [" ".join(rng.choices(vocab, cum_weights=cum, k=doc_len)) for _ in range(n_docs)]
+
+
+def make_queries(corpus: List[str], n_queries: int, vocab_size: int = 20000, seed: int = 11) -> List[Tuple[int, str]]:
+    """(target doc id, query) pairs: four terms from the target plus two random terms."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        target = rng.randrange(len(corpus))
+        words = rng.sample(corpus[target].split(), 4)
+        words += [f"w{rng.randrange(vocab_size)}" for _ in range(2)]
+        queries.append((target, " ".join(words)))
+    return queries
+
+
+def _measure(search: Callable[[str], List[int]], queries: List[Tuple[int, str]]) -> Dict[str, float]:
+    samples, found = [], 0
+    for target, q in queries:
+        start = time.perf_counter()
+        ids = search(q)
+        samples.append((time.perf_counter() - start) * 1000)
+        found += target in ids
+    samples.sort()
+    return {
+        "recall": found / len(queries),
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def _searcher(mode: str, corpus: List[str], k: int) -> Callable[[str], List[int]]:
+    if mode == "linear":
+        position = {id(doc): i for i, doc in enumerate(corpus)}
+        return lambda q: [position[id(doc)] for doc in _filter_docs_by_query(corpus, q)[:k]]
+    if mode == "bm25":
+        index = BM25Index(corpus)
+    else:
+        from app.vector_index import HashingIndex, TfidfIndex
+        index = TfidfIndex(corpus) if mode == "tfidf" else HashingIndex(corpus)
+    return lambda q: [doc_id for doc_id, _ in index.search(q, k)]
+
+
+def run(n_docs: int, n_queries: int, k: int, modes: List[str]) -> Dict[str, object]:
+    corpus = make_corpus(n_docs)
+    queries = make_queries(corpus, n_queries)
+    result: Dict[str, object] = {"docs": n_docs, "queries": n_queries, "k": k}
+    for mode in modes:
+        start = time.perf_counter()
+        search = _searcher(mode, corpus, k)
+        build_s = time.perf_counter() - start
+        result[mode] = dict(_measure(search, queries), build_s=build_s)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.docs:
+        r = run(n, args.queries, args.k, args.modes)
+        results.append(r)
+        for mode in args.modes:
+            m = r[mode]
+            print(
+                f"{n:>7} docs | {mode:<8} | build {m['build_s']:6.2f}s | recall@{args.k} {m['recall']:.2f} | "
+                f"p50 {m['p50_ms']:8.3f}ms p95 {m['p95_ms']:8.3f}ms"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/bench_scheduler.py
+"""
+Per-class latency under a flood of General tickets: FIFO admission vs the
+priority scheduler.
+
+Each ticket runs the compiled graph, then sleeps --service-ms with the GIL
+released, standing in for a model call. Capacity is therefore
+--inflight / (graph time + service time). Traffic is offered as a Poisson
+stream at --load times that capacity for --duration seconds. Most of it is
+normal-priority General tickets, with a trickle of urgent Security tickets
+and some low-priority ones. Tickets run on a thread pool of --inflight
+workers, each one holding an admission slot. The report gives, per class
+and policy, the served count, queue wait and end-to-end latency
+(p50/p99), and how many tickets were shed.
+
+Usage:
+    python -m benchmarks.bench_scheduler --load 2 --duration 10
+    python -m benchmarks.bench_scheduler --inflight 8 --service-ms 50 --urgent-share 0.1
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List
+
+# Escalations go to a throwaway file
+_TMP = tempfile.mkdtemp(prefix="bench-scheduler-")
+os.environ.setdefault("ESCALATION_FILE", os.path.join(_TMP, "escalations.csv"))
+os.environ.setdefault("ESCALATION_DB", os.path.join(_TMP, "escalations.sqlite"))
+
+from app.admission import AdmissionController, Overloaded  # noqa: E402
+from app.graph import build_graph  # noqa: E402
+from app.scheduler import PriorityScheduler, priority_class  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+TICKETS = {
+    "urgent": {"subject": "Account compromised", "description": "Someone hacked my account and changed the password"},
+    "normal": {"subject": "Office Hours", "description": "Can you tell me your office hours?"},
+    "low": {"subject": "Feedback", "description": "Thanks for the help last week", "priority": "low"},
+}
+CONFIG = {"recursion_limit": 50}
+
+
+def graph_seconds(graph, tickets: int = 200) -> float:
+    for cls in TICKETS:
+        graph.invoke(dict(TICKETS[cls], ticket_id=f"WARM-{cls}"), CONFIG)
+    start = time.perf_counter()
+    for i in range(tickets):
+        graph.invoke(dict(TICKETS["normal"], ticket_id=f"CAP-{i}"), CONFIG)
+    return (time.perf_counter() - start) / tickets
+
+
+def serve(graph, ticket: dict, service_seconds: float):
+    graph.invoke(ticket, CONFIG)
+    time.sleep(service_seconds)
+
+
+async def run_policy(controller, graph, inflight: int, rates: Dict[str, float], duration: float,
+                     service_seconds: float):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=inflight)
+    waits: Dict[str, List[float]] = defaultdict(list)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    shed: Dict[str, int] = defaultdict(int)
+    tasks = []
+
+    async def one(cls: str, i: int):
+        ticket = dict(TICKETS[cls], ticket_id=f"{cls}-{i}")
+        start = time.perf_counter()
+        try:
+            priority = priority_class(ticket.get("priority"), (), ticket["subject"], ticket["description"])
+            async with controller.slot(priority):
+                waits[cls].append((time.perf_counter() - start) * 1000)
+                await loop.run_in_executor(executor, partial(serve, graph, ticket, service_seconds))
+        except Overloaded:
+            shed[cls] += 1
+            return
+        latencies[cls].append((time.perf_counter() - start) * 1000)
+
+    async def arrivals(cls: str, rate: float):
+        rng = random.Random(cls)
+        start = time.perf_counter()
+        i = 0
+        while time.perf_counter() - start < duration:
+            tasks.append(asyncio.create_task(one(cls, i)))
+            i += 1
+            await asyncio.sleep(rng.expovariate(rate))
+
+    await asyncio.gather(*(arrivals(cls, rate) for cls, rate in rates.items() if rate > 0))
+    await asyncio.gather(*tasks)
+    executor.shutdown()
+    return waits, latencies, shed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--load", type=float, default=2.0, help="Offered load as a multiple of capacity")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--inflight", type=int, default=4, help="Admission slots (ADMISSION_MAX_INFLIGHT)")
+    parser.add_argument("--service-ms", type=float, default=20.0, help="Simulated model call per ticket")
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=0.25)
+    parser.add_argument("--aging", type=float, default=0.1)
+    parser.add_argument("--urgent-share", type=float, default=0.05)
+    parser.add_argument("--low-share", type=float, default=0.10)
+    args = parser.parse_args()
+
+    graph = build_graph(instrument=False)
+    service_seconds = args.service_ms / 1000
+    capacity = args.inflight / (graph_seconds(graph) + service_seconds)
+    total = capacity * args.load
+    rates = {
+        "urgent": total * args.urgent_share,
+        "low": total * args.low_share,
+        "normal": total * (1 - args.urgent_share - args.low_share),
+    }
+    print(f"capacity {capacity:.0f} tickets/s, offered {total:.0f}/s for {args.duration:.0f}s "
+          f"({', '.join(f'{cls} {rate:.0f}/s' for cls, rate in rates.items())})")
+
+    policies = {
+        "fifo": lambda: AdmissionController(args.inflight, args.max_queue, args.max_wait),
+        "priority": lambda: PriorityScheduler(args.inflight, args.max_queue, args.max_wait, aging_seconds=args.aging),
+    }
+    for name, make in policies.items():
+        waits, latencies, shed = asyncio.run(
+            run_policy(make(), graph, args.inflight, rates, args.duration, service_seconds))
+        for cls in rates:
+            print(f"{name:<9} {cls:<7} served {len(latencies[cls]):>5}  shed {shed[cls]:>5}  "
+                  f"wait p50 {percentile(waits[cls], 0.5):7.1f}ms p99 {percentile(waits[cls], 0.99):7.1f}ms  "
+                  f"latency p50 {percentile(latencies[cls], 0.5):7.1f}ms p99 {percentile(latencies[cls], 0.99):7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_state_memory.py
+"""
+Memory carried per ticket by the graph state, measured with tracemalloc.
+
+A temporary knowledge base of large articles is generated so drafts embed
+realistic amounts of context. For each graph path the script reports the
+peak traced memory during graph.invoke and the memory still held by the
+returned result (what the result cache keeps per entry).
+
+Usage:
+    python -m benchmarks.bench_state_memory --doc-kb 20 --docs 40 --tickets 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import tracemalloc
+
+# Escalations go to a throwaway file and are written synchronously, so the
+# writer queue does not hold rows between measurements
+_TMP = tempfile.mkdtemp(prefix="bench-state-")
+os.environ.setdefault("ESCALATION_FILE", os.path.join(_TMP, "escalations.csv"))
+os.environ.setdefault("ESCALATION_DB", os.path.join(_TMP, "escalations.sqlite"))
+os.environ.setdefault("ESCALATION_ASYNC", "0")
+
+from app import config, retrievers  # noqa: E402
+from app.graph import build_graph  # noqa: E402
+
+TICKETS = {
+    "approve": {"subject": "Server Down Issue", "description": "The server is down with a 500 error"},
+    "refine_approve": {"subject": "Refund Request", "description": "I need a refund for my last invoice"},
+    "escalate": {"subject": "Urgent: Money Back", "description": "I demand a $1M refund immediately"},
+}
+
+_WORDS = "server error refund invoice payment billing latency api crash policy account settings".split()
+
+
+def make_corpus(base: str, docs: int, doc_kb: int, seed: int = 11):
+    rng = random.Random(seed)
+    for folder in retrievers.CATEGORY_TO_FOLDER.values():
+        os.makedirs(os.path.join(base, folder), exist_ok=True)
+        for i in range(docs):
+            words, size = [], 0
+            while size < doc_kb * 1024:
+                w = rng.choice(_WORDS)
+                words.append(w)
+                size += len(w) + 1
+            with open(os.path.join(base, folder, f"doc_{i:04d}.txt"), "w", encoding="utf-8") as f:
+                f.write(" ".join(words))
+
+
+def measure(graph, ticket, n: int):
+    run_config = {"recursion_limit": config.GRAPH_RECURSION_LIMIT}
+    peaks, retained = [], []
+    for i in range(n):
+        state = dict(ticket, ticket_id=f"MEM-{i}")
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = graph.invoke(state, config=run_config)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(current - before)
+        del result
+    return sum(peaks) / n / 1024, sum(retained) / n / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=40, help="Articles per category")
+    parser.add_argument("--doc-kb", type=int, default=20, help="Approximate article size in KB")
+    parser.add_argument("--tickets", type=int, default=50, help="Tickets measured per path")
+    args = parser.parse_args()
+
+    kb = os.path.join(_TMP, "data")
+    make_corpus(kb, args.docs, args.doc_kb)
+    retrievers.CORPUS = retrievers.CorpusCache(base_path=kb, refresh_seconds=3600)
+
+    graph = build_graph(instrument=False)
+    for ticket in TICKETS.values():  # build indexes and warm caches outside the measurement
+        graph.invoke(dict(ticket), config={"recursion_limit": config.GRAPH_RECURSION_LIMIT})
+
+    tracemalloc.start()
+    print(f"top_k={config.RETRIEVAL_TOP_K}, {args.docs} x ~{args.doc_kb} KB articles per category")
+    for path, ticket in TICKETS.items():
+        peak_kb, retained_kb = measure(graph, ticket, args.tickets)
+        print(f"{path:<15} peak {peak_kb:9.1f} KB/ticket | result retains {retained_kb:9.1f} KB")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_worker_rss.py
+"""
+Memory and startup time per serving worker: in-process index vs shared KB snapshot.
+
+Starts N worker processes (spawned, like uvicorn workers). Each loads every
+category's index, answers a few queries and then reports its memory while all
+workers are alive:
+  - "in-process": every worker reads the corpus and builds its own BM25 index
+  - "snapshot":   the parent writes one KB snapshot; workers mmap it (KB_INDEX_PATH)
+
+RSS counts shared pages in full. PSS splits shared pages between the
+processes that map them, and USS is the memory only that worker holds.
+PSS/USS come from /proc/<pid>/smaps_rollup (Linux).
+
+Usage:
+    python -m benchmarks.bench_worker_rss --workers 4 --docs 5000 --doc-words 300
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.bench_refine import make_corpus
+
+QUERIES = ["refund for a duplicate payment", "invoice billing cycle", "card charge policy", "w1 w20 w300"]
+
+
+def _memory_kb() -> Dict[str, int]:
+    stats = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    stats[key] = int(value.split()[0])
+    except OSError:
+        import resource
+
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "pss": 0, "uss": 0}
+    return {"rss": stats["Rss"], "pss": stats["Pss"], "uss": stats["Private_Clean"] + stats["Private_Dirty"]}
+
+
+def _worker(kb: str, barrier, results):
+    start = time.perf_counter()
+    from app import retrievers
+    from app.nodes import retrieve as retrieve_module
+
+    retrievers.CORPUS = retrievers.CorpusCache(base_path=kb, refresh_seconds=3600)
+    baseline = _memory_kb()
+    for category in retrievers.CATEGORY_TO_FOLDER:
+        for query in QUERIES:
+            retrieve_module.retrieve({"category": category, "subject": "", "description": query})
+    ready = time.perf_counter() - start
+    barrier.wait()  # measure while every worker is alive, so shared pages are split between them
+    memory = _memory_kb()
+    results.put({"ready_s": ready, **memory, "index_rss": memory["rss"] - baseline["rss"]})
+    barrier.wait()
+
+
+def run(kb: str, workers: int, index_path: str = ""):
+    os.environ["KB_INDEX_PATH"] = index_path
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(kb, barrier, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    samples = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--docs", type=int, default=5000, help="Articles per category")
+    parser.add_argument("--doc-words", type=int, default=300, help="Words per article")
+    args = parser.parse_args()
+
+    kb = tempfile.mkdtemp(prefix="bench-rss-")
+    make_corpus(kb, args.docs, args.doc_words)
+
+    from app import retrievers
+    from app.nodes.retrieve import build_snapshot
+
+    retrievers.CORPUS = retrievers.CorpusCache(base_path=kb, refresh_seconds=3600)
+    index_path = os.path.join(kb, "kb_index.bin")
+    start = time.perf_counter()
+    build_snapshot(index_path)
+    build_s = time.perf_counter() - start
+
+    print(f"{args.workers} workers, 4 categories x {args.docs} x {args.doc_words}-word articles")
+    print(f"snapshot: {os.path.getsize(index_path) / 2**20:.1f} MiB, built in {build_s:.2f}s by the parent")
+    print(f"{'mode':<11} {'ready s':>8} {'RSS MiB':>8} {'PSS MiB':>8} {'USS MiB':>8} {'index RSS MiB':>14}")
+    for label, path in (("in-process", ""), ("snapshot", index_path)):
+        samples = run(kb, args.workers, path)
+        row = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+        print(f"{label:<11} {row['ready_s']:8.2f} {row['rss'] / 1024:8.1f} {row['pss'] / 1024:8.1f} "
+              f"{row['uss'] / 1024:8.1f} {row['index_rss'] / 1024:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
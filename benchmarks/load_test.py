@@ -0,0 +1,170 @@
+# benchmarks/load_test.py
+"""
+Concurrent-client load test for the ticket endpoints.
+
+Runs the FastAPI app in-process (or against --url) and, for each client
+count, reports throughput, request latency and how long a /health probe
+waits while tickets are in flight. A blocked event loop shows up as probe
+latency that tracks ticket latency.
+
+--overload then offers open-loop (Poisson) traffic at multiples of the
+throughput measured at the highest client count. It reports latency of the
+tickets that were served and how many got a 429. With admission control on,
+the p99 of served tickets should stay flat at 2x while the excess is shed.
+Point it at a separate server process (--url), so the load generator does
+not compete with the server for the same event loop.
+
+Usage:
+    python -m benchmarks.load_test --clients 1 2 4 8 16 --requests 200
+    python -m benchmarks.load_test --url http://localhost:8080
+    python -m benchmarks.load_test --url http://localhost:8080 --clients 8 --overload 1 2 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.stats import percentile
+
+TICKETS = [
+    {"subject": "Server Down Issue", "description": "The server is down with a 500 error"},
+    {"subject": "Office Hours", "description": "Can you tell me your office hours?"},
+    {"subject": "App crash", "description": "The mobile app crashes when I open settings"},
+    {"subject": "Slow dashboard", "description": "API latency is above 2 seconds since this morning"},
+    {"subject": "Refund Request", "description": "I need a refund for my last invoice"},
+]
+
+
+def _client(url: str = None) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=60)
+    from app.server import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+
+
+async def _run_level(client: httpx.AsyncClient, path: str, clients: int, total: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    probes: List[float] = []
+    counter = iter(range(total))
+    done = asyncio.Event()
+
+    async def worker():
+        for i in counter:
+            ticket = dict(TICKETS[i % len(TICKETS)], ticket_id=f"LOAD-{clients}-{i}")
+            start = time.perf_counter()
+            resp = await client.post(path, json=ticket)
+            resp.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def prober():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probes.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(prober())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    return {
+        "clients": clients,
+        "requests": total,
+        "throughput_rps": total / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": statistics.fmean(latencies),
+        "health_probe_p99_ms": percentile(probes, 0.99),
+    }
+
+
+async def _run_open_loop(client: httpx.AsyncClient, path: str, rate: float, duration: float) -> Dict[str, float]:
+    """Send Poisson arrivals at `rate` req/s for `duration` seconds, however fast the server answers."""
+    served: List[float] = []
+    shed: List[float] = []
+    rng = random.Random(int(rate * 1000))
+
+    async def one(i: int):
+        ticket = dict(TICKETS[i % len(TICKETS)], ticket_id=f"OPEN-{rate:.0f}-{i}")
+        start = time.perf_counter()
+        resp = await client.post(path, json=ticket)
+        elapsed = (time.perf_counter() - start) * 1000
+        if resp.status_code == 429:
+            shed.append(elapsed)
+        else:
+            resp.raise_for_status()
+            served.append(elapsed)
+
+    tasks = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        tasks.append(asyncio.create_task(one(len(tasks))))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "offered_rps": rate,
+        "sent": len(tasks),
+        "served": len(served),
+        "shed": len(shed),
+        "goodput_rps": len(served) / elapsed,
+        "p50_ms": percentile(served, 0.50),
+        "p99_ms": percentile(served, 0.99),
+        "shed_p99_ms": percentile(shed, 0.99),
+    }
+
+
+async def main_async(args) -> List[Dict[str, float]]:
+    results = []
+    async with _client(args.url) as client:
+        # Warm caches and indexes before measuring
+        await client.post(args.path, json=dict(TICKETS[0], ticket_id="WARMUP"))
+        for clients in args.clients:
+            r = await _run_level(client, args.path, clients, args.requests)
+            results.append(r)
+            print(
+                f"clients {clients:>3} | {r['throughput_rps']:8.1f} req/s | p50 {r['p50_ms']:7.2f}ms "
+                f"p99 {r['p99_ms']:7.2f}ms | /health p99 {r['health_probe_p99_ms']:7.2f}ms"
+            )
+        capacity = results[-1]["throughput_rps"] if results else 0.0
+        for multiple in args.overload:
+            r = await _run_open_loop(client, args.path, capacity * multiple, args.duration)
+            r["overload"] = multiple
+            results.append(r)
+            print(
+                f"{multiple:4.1f}x load {r['offered_rps']:8.1f} req/s | served {r['served']:>5} "
+                f"({r['goodput_rps']:7.1f} req/s) p50 {r['p50_ms']:7.2f}ms p99 {r['p99_ms']:7.2f}ms | "
+                f"429 {r['shed']:>5} (p99 {r['shed_p99_ms']:6.2f}ms)"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--path", default="/api/process_ticket")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client level")
+    parser.add_argument("--overload", type=float, nargs="*", default=[],
+                        help="Open-loop runs at these multiples of the measured throughput (e.g. 1 2)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per open-loop run")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# benchmarks/run_suite.py
+"""
+Replayable benchmark suite for the graph and the HTTP layer.
+
+Tickets are generated (a fixed-seed mix of approve, refine-then-approve and
+escalate tickets) or replayed from JSONL. Accepted line shapes:
+{"ticket_id", "subject", "description"} tickets, or requests.jsonl-style
+{"request_id", "title", "body"} records.
+
+The suite measures:
+  - graph: app.graph.app.invoke throughput and p50/p95/p99 per graph path
+  - http:  end-to-end /api/process_ticket latency through an in-process client
+
+Results are written as JSON. --compare checks them against an earlier run
+and exits non-zero when a p95 regresses by more than --threshold.
+
+Usage:
+    python -m benchmarks.run_suite --tickets 600 --out bench.json
+    python -m benchmarks.run_suite --replay requests.jsonl --out bench.json
+    python -m benchmarks.run_suite --out new.json --compare bench.json
+    python -m benchmarks.run_suite --executor fast --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+from benchmarks.stats import summarize
+
+PATH_TEMPLATES = {
+    "approve": [
+        ("Server Down Issue", "The server is down with a {n}00 error since {t}"),
+        ("Office Hours", "Can you tell me your office hours for {t}?"),
+        ("App crash", "The mobile app crashes when I open settings at {t}"),
+    ],
+    "refine_approve": [
+        ("Refund Request", "I need a refund for my last invoice from {t}"),
+        ("Billing question", "Please refund the duplicate payment made on {t}"),
+    ],
+    "escalate": [
+        ("Urgent: Money Back", "I demand a ${n}M refund immediately, charged {t}"),
+        ("Refund demand", "I demand my money back for invoice {n} now"),
+    ],
+}
+
+
+def generate(count: int, seed: int = 42) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    paths = list(PATH_TEMPLATES)
+    tickets = []
+    for i in range(count):
+        subject, description = rng.choice(PATH_TEMPLATES[paths[i % len(paths)]])
+        tickets.append({
+            "ticket_id": f"BENCH-{i}",
+            "subject": subject,
+            "description": description.format(n=rng.randint(1, 9), t=f"{rng.randint(1, 28)} March"),
+        })
+    return tickets
+
+
+def replay(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield {
+                "ticket_id": str(record.get("ticket_id") or record.get("request_id") or f"REPLAY-{i}"),
+                "subject": record.get("subject") or record.get("title") or "",
+                "description": record.get("description") or record.get("body") or record.get("text") or "",
+            }
+
+
+def graph_path(result: Dict[str, Any]) -> str:
+    if result.get("escalated"):
+        return "escalate"
+    if result.get("review_decision") == "approved":
+        return "refine_approve" if int(result.get("retries") or 0) > 0 else "approve"
+    return "other"
+
+
+def bench_graph(tickets: List[Dict[str, str]], warmup: int, executor: str = "langgraph") -> Dict[str, Any]:
+    from app import config
+
+    if executor == "fast":
+        from app.fastpath import FastPipeline
+        graph = FastPipeline()
+    else:
+        from app.graph import app as graph
+
+    run_config = {"recursion_limit": config.GRAPH_RECURSION_LIMIT}
+    for ticket in tickets[:warmup]:
+        graph.invoke(dict(ticket), config=run_config)
+
+    by_path: Dict[str, List[float]] = defaultdict(list)
+    paths: List[str] = []
+    errors = 0
+    start = time.perf_counter()
+    for ticket in tickets:
+        t0 = time.perf_counter()
+        try:
+            result = graph.invoke(dict(ticket), config=run_config)
+            path = graph_path(result)
+        except Exception:
+            errors += 1
+            path = "error"
+        by_path[path].append((time.perf_counter() - t0) * 1000)
+        paths.append(path)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "tickets": len(tickets),
+        "errors": errors,
+        "throughput_tps": len(tickets) / elapsed if elapsed else 0.0,
+        "all": summarize([ms for samples in by_path.values() for ms in samples]),
+        "paths": {path: summarize(samples) for path, samples in sorted(by_path.items())},
+        "_ticket_paths": paths,
+    }
+
+
+def bench_http(tickets: List[Dict[str, str]], paths: List[str], warmup: int) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+    from app.server import app
+
+    by_path: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    with TestClient(app) as client:
+        for ticket in tickets[:warmup]:
+            client.post("/api/process_ticket", json=ticket)
+        start = time.perf_counter()
+        for ticket, path in zip(tickets, paths):
+            t0 = time.perf_counter()
+            resp = client.post("/api/process_ticket", json=ticket)
+            ms = (time.perf_counter() - t0) * 1000
+            if resp.status_code != 200 or "error" in resp.json():
+                errors += 1
+            by_path[path].append(ms)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(tickets),
+        "errors": errors,
+        "throughput_rps": len(tickets) / elapsed if elapsed else 0.0,
+        "all": summarize([ms for samples in by_path.values() for ms in samples]),
+        "paths": {path: summarize(samples) for path, samples in sorted(by_path.items())},
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """p95 regressions larger than threshold (0.2 = 20%) for every section/path in both runs."""
+    regressions = []
+    for section in ("graph", "http"):
+        cur_paths = current.get(section, {}).get("paths", {})
+        base_paths = baseline.get(section, {}).get("paths", {})
+        for path, cur in cur_paths.items():
+            base = base_paths.get(path)
+            if not base or not base.get("p95_ms") or not cur.get("p95_ms"):
+                continue
+            change = cur["p95_ms"] / base["p95_ms"] - 1.0
+            line = f"{section}/{path}: p95 {base['p95_ms']:.3f}ms -> {cur['p95_ms']:.3f}ms ({change:+.1%})"
+            print(line)
+            if change > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=600, help="Generated tickets when not replaying")
+    parser.add_argument("--replay", help="JSONL file of tickets or requests.jsonl-style records")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--executor", choices=("langgraph", "fast"), default=os.getenv("GRAPH_EXECUTOR", "langgraph"),
+                        help="Graph executor; also sets GRAPH_EXECUTOR for the HTTP run")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p95 regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # Keep benchmark escalations and checkpoints out of the real data/ files
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("ESCALATION_FILE", os.path.join(scratch, "escalations.csv"))
+    os.environ.setdefault("ESCALATION_DB", os.path.join(scratch, "escalations.sqlite"))
+    os.environ.setdefault("CHECKPOINT_DB", os.path.join(scratch, "checkpoints.sqlite"))
+    os.environ["GRAPH_EXECUTOR"] = args.executor
+
+    tickets = list(replay(args.replay)) if args.replay else generate(args.tickets, args.seed)
+    graph_results = bench_graph(tickets, args.warmup, args.executor)
+    paths = graph_results.pop("_ticket_paths")
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "source": args.replay or f"generated:{args.tickets}:seed={args.seed}",
+            "executor": args.executor,
+        },
+        "graph": graph_results,
+    }
+    if not args.skip_http:
+        results["http"] = bench_http(tickets, paths, args.warmup)
+
+    for section in ("graph", "http"):
+        if section not in results:
+            continue
+        rate = results[section].get("throughput_tps") or results[section].get("throughput_rps")
+        print(f"[{section}] {rate:.1f}/s, errors {results[section]['errors']}")
+        for path, s in results[section]["paths"].items():
+            print(f"  {path:<15} n={s['count']:<5} p50 {s['p50_ms']:7.3f}ms  p95 {s['p95_ms']:7.3f}ms  p99 {s['p99_ms']:7.3f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} p95 regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,46 @@
+"""
+Knowledge-base ingestion.
+
+    python -m scripts.ingest bulk SRC [SRC ...]   # bulk, incremental ingestion
+
+A bulk source is either a directory or a .jsonl dump:
+  - directory: every .txt/.md file below it. The category comes from --category
+    or from the first path component (Billing/ or billing_docs/).
+  - .jsonl: one article per line, {"id", "category", "title", "text"}.
+    "body" or "content" may stand in for "text".
+
+Sources are streamed, so memory does not grow with the number of articles.
+A process pool reads, hashes, chunks and tokenizes them, keeping a bounded
+number of articles in flight. Long articles are split into chunks of about
+--chunk-words words at paragraph breaks. Each chunk becomes one
+data/<folder>/*.txt file, which the serving corpus reads as a document.
+
+The manifest (data/ingest_manifest.sqlite) keeps, per source article, its
+content hash, file size/mtime and the chunk files it produced. It also caches
+the term counts of every chunk. Articles whose stat or hash is unchanged are
+skipped without being chunked or written. Only categories with changes are
+re-indexed, from the cached term counts, into data/kb_index/<Category>.bin
+(see app/kb_snapshot.py). Point KB_INDEX_PATH at data/kb_index to serve from
+it.
+"""
+import argparse
+import hashlib
+import json
 import os
+import re
 import shutil
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.bm25 import BM25Index, tokenize  # noqa: E402
+from app.kb_snapshot import KBSnapshotDir, write_snapshot  # noqa: E402
+from app.retrievers import CorpusCache  # noqa: E402
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 CATEGORY_DIRS = {
@@ -19,14 +60,345 @@ def ingest_file(src_path: str, category: str):
     shutil.copy(src_path, dest_path)
     print(f"Ingested {src_path} → {dest_path}")
 
-def ingest_demo():
-    """Demo: create a few mock docs."""
-    for category, folder in CATEGORY_DIRS.items():
-        path = os.path.join(DATA_DIR, folder)
-        os.makedirs(path, exist_ok=True)
-        with open(os.path.join(path, f"{category.lower()}_example.txt"), "w", encoding="utf-8") as f:
-            f.write(f"This is a {category} example document for retrieval.")
+
+# === Bulk ingestion ===
+
+MANIFEST_NAME = "ingest_manifest.sqlite"
+INDEX_DIR_NAME = "kb_index"
+DEFAULT_CHUNK_WORDS = 300
+SOURCE_SUFFIXES = (".txt", ".md")
+# Articles queued per pool worker; bounds memory while keeping workers busy
+IN_FLIGHT_PER_WORKER = 16
+COMMIT_EVERY = 1000
+
+_CATEGORY_BY_NAME = {
+    **{category.lower(): category for category in CATEGORY_DIRS},
+    **{folder: category for category, folder in CATEGORY_DIRS.items()},
+}
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+def chunk_text(text: str, max_words: int) -> List[str]:
+    """Split text into chunks of at most max_words words, breaking at paragraphs where possible."""
+    chunks: List[str] = []
+    current: List[str] = []
+    count = 0
+    for paragraph in _PARAGRAPH_RE.split(text.strip()):
+        words = paragraph.split()
+        if not words:
+            continue
+        if count and count + len(words) > max_words:
+            chunks.append("\n\n".join(current))
+            current, count = [], 0
+        if len(words) > max_words:
+            # A paragraph longer than a chunk is split by words; its tail starts the next chunk
+            while len(words) > max_words:
+                chunks.append(" ".join(words[:max_words]))
+                words = words[max_words:]
+            current, count = [" ".join(words)], len(words)
+            continue
+        current.append(paragraph.strip())
+        count += len(words)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _chunk_name(key: str, part: int) -> str:
+    slug = _SLUG_RE.sub("_", os.path.splitext(key.rsplit("/", 1)[-1].rsplit("#", 1)[-1])[0]).strip("_")[:60]
+    return f"{slug or 'article'}_{_hash(key)[:8]}_{part:03d}.txt"
+
+
+class Manifest:
+    """SQLite record of ingested articles and cached chunk term counts."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources (key TEXT PRIMARY KEY, category TEXT, hash TEXT, "
+            "size INTEGER, mtime_ns INTEGER, chunks TEXT)"
+        )
+        # Term counts by chunk text hash, so re-indexing a category does not re-tokenize it
+        self.conn.execute("CREATE TABLE IF NOT EXISTS terms (hash TEXT PRIMARY KEY, counts TEXT)")
+
+    def get(self, key: str) -> Optional[Tuple[str, str, int, int, List[str]]]:
+        row = self.conn.execute(
+            "SELECT category, hash, size, mtime_ns, chunks FROM sources WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], row[3], json.loads(row[4])
+
+    def put(self, key: str, category: str, content_hash: str, size: int, mtime_ns: int, chunks: List[str]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+            (key, category, content_hash, size, mtime_ns, json.dumps(chunks)),
+        )
+
+    def delete(self, key: str):
+        self.conn.execute("DELETE FROM sources WHERE key = ?", (key,))
+
+    def keys_under(self, prefix: str) -> Iterator[str]:
+        for (key,) in self.conn.execute("SELECT key FROM sources WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff")):
+            yield key
+
+    def term_counts(self, text_hash: str) -> Optional[Dict[str, int]]:
+        row = self.conn.execute("SELECT counts FROM terms WHERE hash = ?", (text_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_term_counts(self, text_hash: str, counts: Dict[str, int]):
+        self.conn.execute("INSERT OR IGNORE INTO terms VALUES (?, ?)", (text_hash, json.dumps(counts)))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def _category_from_path(rel_path: str) -> Optional[str]:
+    return _CATEGORY_BY_NAME.get(rel_path.replace(os.sep, "/").split("/", 1)[0].lower())
+
+
+def _prepare(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pool worker: read, hash, chunk and tokenize one article.
+    Returns {"unchanged": True} when the content hash matches the manifest.
+    """
+    text = item.get("text")
+    if text is None:
+        with open(item["path"], "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    title = item.get("title") or ""
+    content_hash = _hash(item["category"], title, text)
+    if content_hash == item.get("known_hash"):
+        return dict(item, text=None, hash=content_hash, unchanged=True)
+    chunks = []
+    for body in chunk_text(text, item["chunk_words"]):
+        chunk = f"{title}\n\n{body}" if title else body
+        chunks.append((chunk, _hash(chunk), dict(Counter(tokenize(chunk)))))
+    return dict(item, text=None, hash=content_hash, unchanged=False, chunks=chunks)
+
+
+class BulkIngest:
+    def __init__(self, data_dir: str = DATA_DIR, chunk_words: int = DEFAULT_CHUNK_WORDS,
+                 workers: int = None, category: Optional[str] = None, prune: bool = False):
+        self.data_dir = os.path.abspath(data_dir)
+        self.chunk_words = chunk_words
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.category = category
+        self.prune = prune
+        self.manifest = Manifest(os.path.join(self.data_dir, MANIFEST_NAME))
+        self.dirty: Set[str] = set()
+        self.stats = Counter()
+
+    # -- sources --
+
+    def _items(self, sources: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for source in sources:
+            source = os.path.abspath(source)
+            if os.path.isdir(source):
+                yield from self._directory_items(source)
+            elif source.endswith(".jsonl"):
+                yield from self._jsonl_items(source)
+            else:
+                raise ValueError(f"Unsupported source (expected a directory or .jsonl file): {source}")
+
+    def _directory_items(self, root: str) -> Iterator[Dict[str, Any]]:
+        seen: Set[str] = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if not name.endswith(SOURCE_SUFFIXES):
+                    continue
+                path = os.path.join(dirpath, name)
+                category = self.category or _category_from_path(os.path.relpath(path, root))
+                if category not in CATEGORY_DIRS:
+                    self.stats["skipped"] += 1
+                    continue
+                key = path.replace(os.sep, "/")
+                seen.add(key)
+                st = os.stat(path)
+                known = self.manifest.get(key)
+                if known and known[0] == category and known[2] == st.st_size and known[3] == st.st_mtime_ns:
+                    self.stats["unchanged"] += 1
+                    continue
+                yield {"key": key, "category": category, "path": path, "size": st.st_size,
+                       "mtime_ns": st.st_mtime_ns, "known_hash": known[1] if known and known[0] == category else None}
+        if self.prune:
+            for key in list(self.manifest.keys_under(root.replace(os.sep, "/") + "/")):
+                if key not in seen:
+                    self._remove(key)
+
+    def _jsonl_items(self, path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                category = self.category or _CATEGORY_BY_NAME.get(str(record.get("category", "")).lower())
+                text = next((record[f] for f in ("text", "body", "content") if record.get(f)), None)
+                if category not in CATEGORY_DIRS or not text:
+                    self.stats["skipped"] += 1
+                    continue
+                key = f"jsonl:{record.get('id', f'{os.path.basename(path)}:{line_no}')}"
+                title = record.get("title") or ""
+                known = self.manifest.get(key)
+                if known and known[1] == _hash(category, title, text):
+                    self.stats["unchanged"] += 1
+                    continue
+                yield {"key": key, "category": category, "text": text, "title": title, "size": 0, "mtime_ns": 0,
+                       "known_hash": None}
+
+    # -- applying results --
+
+    def _folder(self, category: str) -> str:
+        folder = os.path.join(self.data_dir, CATEGORY_DIRS[category])
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def _remove_chunks(self, category: str, names: Iterable[str]):
+        folder = os.path.join(self.data_dir, CATEGORY_DIRS[category])
+        for name in names:
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+        self.dirty.add(category)
+
+    def _remove(self, key: str):
+        known = self.manifest.get(key)
+        if known:
+            self._remove_chunks(known[0], known[4])
+            self.manifest.delete(key)
+            self.stats["removed"] += 1
+
+    def _apply(self, result: Dict[str, Any]):
+        key, category = result["key"], result["category"]
+        if result["unchanged"]:
+            # Touched but identical: remember the new stat so the next run skips it without reading
+            known = self.manifest.get(key)
+            self.manifest.put(key, category, result["hash"], result["size"], result["mtime_ns"], known[4])
+            self.stats["unchanged"] += 1
+            return
+        known = self.manifest.get(key)
+        if known and known[0] != category:
+            self._remove_chunks(known[0], known[4])
+        folder = self._folder(category)
+        names = []
+        for part, (chunk, chunk_hash, counts) in enumerate(result["chunks"]):
+            name = _chunk_name(key, part)
+            tmp_path = os.path.join(folder, f".{name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(chunk)
+            os.replace(tmp_path, os.path.join(folder, name))
+            self.manifest.put_term_counts(chunk_hash, counts)
+            names.append(name)
+        if known and known[0] == category:
+            self._remove_chunks(category, set(known[4]) - set(names))
+        self.manifest.put(key, category, result["hash"], result["size"], result["mtime_ns"], names)
+        self.dirty.add(category)
+        self.stats["updated" if known else "added"] += 1
+        self.stats["chunks_written"] += len(names)
+
+    def _run_items(self, items: Iterator[Dict[str, Any]]):
+        applied = 0
+        if self.workers <= 1:
+            for item in items:
+                self._apply(_prepare(dict(item, chunk_words=self.chunk_words)))
+                applied += 1
+                if applied % COMMIT_EVERY == 0:
+                    self.manifest.commit()
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            for item in items:
+                pending.add(pool.submit(_prepare, dict(item, chunk_words=self.chunk_words)))
+                if len(pending) >= self.workers * IN_FLIGHT_PER_WORKER:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._apply(future.result())
+                        applied += 1
+                        if applied % COMMIT_EVERY == 0:
+                            self.manifest.commit()
+            for future in pending:
+                self._apply(future.result())
+
+    # -- indexing --
+
+    def index_category(self, category: str) -> Optional[str]:
+        """Rebuild data/kb_index/<Category>.bin from the category folder; cached term counts skip tokenizing."""
+        folder = CATEGORY_DIRS[category]
+        index_dir = os.path.join(self.data_dir, INDEX_DIR_NAME)
+        os.makedirs(index_dir, exist_ok=True)
+        path = os.path.join(index_dir, f"{category}{KBSnapshotDir.SUFFIX}")
+        # Same document set and order as the serving corpus
+        _, documents = CorpusCache(base_path=self.data_dir, refresh_seconds=0).get(folder)
+        if not documents:
+            # Nothing on disk: let retrieve fall back to its built-in articles
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+        term_freqs = []
+        for doc in documents:
+            text_hash = _hash(doc.text)
+            counts = self.manifest.term_counts(text_hash)
+            if counts is None:
+                counts = dict(Counter(tokenize(doc.text)))
+                self.manifest.put_term_counts(text_hash, counts)
+            term_freqs.append(counts)
+        ids = [doc.doc_id for doc in documents]
+        texts = [doc.text for doc in documents]
+        return write_snapshot(path, {category: (ids, texts, BM25Index.from_term_counts(term_freqs))})
+
+    def run(self, sources: Iterable[str], reindex: bool = False) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            self._run_items(self._items(sources))
+            self.manifest.commit()
+            index_dir = os.path.join(self.data_dir, INDEX_DIR_NAME)
+            categories = set(CATEGORY_DIRS) if reindex else set(self.dirty)
+            # Categories never indexed before get their first snapshot too
+            categories |= {c for c in CATEGORY_DIRS
+                           if not os.path.exists(os.path.join(index_dir, f"{c}{KBSnapshotDir.SUFFIX}"))
+                           and os.path.isdir(os.path.join(self.data_dir, CATEGORY_DIRS[c]))}
+            for category in sorted(categories):
+                self.index_category(category)
+                self.stats["indexed_categories"] += 1
+        finally:
+            self.manifest.close()
+        return dict(self.stats, seconds=round(time.perf_counter() - start, 3))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Knowledge-base ingestion")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bulk = commands.add_parser("bulk", help="Incrementally ingest directories and .jsonl dumps")
+    bulk.add_argument("sources", nargs="+", help="Directories or .jsonl files")
+    bulk.add_argument("--category", choices=sorted(CATEGORY_DIRS), help="Category for every article")
+    bulk.add_argument("--data-dir", default=DATA_DIR)
+    bulk.add_argument("--chunk-words", type=int, default=DEFAULT_CHUNK_WORDS)
+    bulk.add_argument("--workers", type=int, default=None, help="Pool processes (default: one per core)")
+    bulk.add_argument("--prune", action="store_true", help="Remove articles that disappeared from a source directory")
+    bulk.add_argument("--reindex", action="store_true", help="Rebuild every category index")
+    args = parser.parse_args(argv)
+
+    stats = BulkIngest(args.data_dir, args.chunk_words, args.workers, args.category, args.prune).run(
+        args.sources, reindex=args.reindex)
+    print(json.dumps(stats))
+
 
 if __name__ == "__main__":
-    ingest_demo()
-    print("✅ Demo ingestion complete. Check data/ folders.")
+    main()
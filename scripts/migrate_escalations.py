@@ -0,0 +1,44 @@
+"""
+Import escalations CSV files into the SQLite escalation store.
+
+    python -m scripts.migrate_escalations                   # ESCALATION_FILE and its rotated siblings
+    python -m scripts.migrate_escalations old.csv --db data/escalations.sqlite
+
+Safe to re-run: files already imported are skipped, and a CSV that kept
+growing only contributes its new rows (see EscalationStore.import_csv).
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import config  # noqa: E402
+from app.escalation_store import EscalationStore  # noqa: E402
+
+
+def default_sources(path: str):
+    """The live CSV plus the files it was rotated into (escalations-YYYYmmdd-HHMMSS*.csv), oldest first."""
+    root, ext = os.path.splitext(path)
+    rotated = sorted(glob.glob(f"{glob.escape(root)}-*{ext}"))
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import escalation CSVs into the SQLite store")
+    parser.add_argument("csv", nargs="*", help=f"CSV files (default: {config.ESCALATION_FILE} and rotated copies)")
+    parser.add_argument("--db", default=config.ESCALATION_DB)
+    args = parser.parse_args(argv)
+
+    store = EscalationStore(args.db)
+    try:
+        for path in args.csv or default_sources(config.ESCALATION_FILE):
+            print(f"{path}: imported {store.import_csv(path)} rows")
+        print(f"{args.db}: {store.count()} escalations")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
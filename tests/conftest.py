@@ -0,0 +1,28 @@
+# tests/conftest.py
+"""
+Keeps the suite off the real databases under data/.
+
+Every test gets its own escalation, checkpoint and LLM cache databases in
+tmp_path, and the escalation writer and store singletons are dropped around
+it so neither holds on to a previous test's (or the real) path.
+"""
+import pytest
+
+from app import config, escalation_writer
+
+
+def _reset_escalation_singletons():
+    escalation_writer.shutdown_escalation_writer()
+    escalation_writer._writer = None
+    escalation_writer._store = None
+
+
+@pytest.fixture(autouse=True)
+def isolated_databases(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ESCALATION_DB", str(tmp_path / "escalations.sqlite"))
+    monkeypatch.setattr(config, "ESCALATION_FILE", str(tmp_path / "escalations.csv"))
+    monkeypatch.setattr(config, "CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(config, "LLM_CACHE_DB", str(tmp_path / "llm_cache.sqlite"))
+    _reset_escalation_singletons()
+    yield
+    _reset_escalation_singletons()
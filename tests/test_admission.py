@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.server as server
+from app.admission import AdmissionController, Overloaded
+from app.scheduler import PriorityScheduler
+
+
+def test_queue_is_bounded_and_served_in_order():
+    async def scenario():
+        admission = AdmissionController(max_inflight=1, max_queue=1, max_wait_seconds=5)
+        await admission.acquire()
+        waiting = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.stats()["queued"] == 1
+
+        with pytest.raises(Overloaded) as shed:
+            await admission.acquire()
+        assert shed.value.reason == "queue full" and shed.value.retry_after >= 1
+
+        admission.release()
+        await waiting
+        assert admission.stats()["inflight"] == 1 and admission.stats()["queued"] == 0
+        admission.release()
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["inflight"] == 0 and stats["admitted"] == 2 and stats["shed_queue_full"] == 1
+
+
+def test_queued_ticket_is_shed_after_max_wait():
+    async def scenario():
+        admission = AdmissionController(max_inflight=1, max_queue=4, max_wait_seconds=0.01)
+        await admission.acquire()
+        with pytest.raises(Overloaded) as shed:
+            await admission.acquire()
+        admission.release()
+        return shed.value, admission.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.reason == "queue timeout"
+    assert stats["shed_timeout"] == 1 and stats["queued"] == 0 and stats["inflight"] == 0
+
+
+def test_overflow_gets_429_with_retry_after(monkeypatch):
+    full = AdmissionController(max_inflight=1, max_queue=0, max_wait_seconds=1)
+    full.inflight = 1  # every slot taken
+    monkeypatch.setattr(server, "admission", full)
+    client = TestClient(server.app)
+
+    resp = client.post("/api/process_ticket", json={"ticket_id": "OVER-1", "description": "The server is down"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert resp.json()["status"] == "overloaded"
+    assert client.get("/admission/stats").json()["shed_queue_full"] == 1
+
+
+def test_stream_and_batch_endpoints_are_admitted(monkeypatch):
+    full = AdmissionController(max_inflight=1, max_queue=0, max_wait_seconds=1)
+    full.inflight = 1
+    monkeypatch.setattr(server, "admission", full)
+    monkeypatch.setattr(server.config, "RESULT_CACHE_ENABLED", False)
+    client = TestClient(server.app)
+
+    resp = client.post("/resolve_ticket/stream", json={"ticket_id": "OVER-2", "subject": "Down", "description": "The server is down"})
+    assert resp.status_code == 429 and int(resp.headers["Retry-After"]) >= 1
+    resp = client.post("/api/process_tickets", json=[{"description": "The server is down"}] * 3)
+    assert resp.status_code == 429
+    assert full.stats()["shed_queue_full"] == 4  # the stream, then each batch ticket
+
+    # With room, every batch ticket takes and gives back its own slot
+    roomy = AdmissionController(max_inflight=1, max_queue=4, max_wait_seconds=5)
+    monkeypatch.setattr(server, "admission", roomy)
+    tickets = [{"ticket_id": f"B-{i}", "description": f"The server is down ({i})"} for i in range(3)]
+    assert client.post("/api/process_tickets", json=tickets).json()["succeeded"] == 3
+    events = client.post("/resolve_ticket/stream", json={"ticket_id": "S-1", "subject": "Down", "description": "The server is down"})
+    assert "event: result" in events.text
+    stats = roomy.stats()
+    assert stats["admitted"] == 4 and stats["inflight"] == 0
+
+
+def test_urgent_ticket_is_admitted_between_batch_tickets(monkeypatch):
+    scheduler = PriorityScheduler(max_inflight=1, max_queue=20, max_wait_seconds=5)
+    monkeypatch.setattr(server, "admission", scheduler)
+    monkeypatch.setattr(server.config, "RESULT_CACHE_ENABLED", False)
+    server.get_pipeline()
+    order = []
+
+    async def fake_run_graph(state):
+        order.append(state.ticket_id)
+        await asyncio.sleep(0.02)
+        return {"category": "Billing", "final_reply": "ok", "escalated": False}
+
+    monkeypatch.setattr(server, "run_graph", fake_run_graph)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tickets = [{"ticket_id": f"N-{i}", "description": f"Where is my invoice ({i})"} for i in range(4)]
+            batch = asyncio.create_task(client.post("/api/process_tickets", json=tickets))
+            await asyncio.sleep(0.01)
+            urgent = await client.post("/api/enhanced_ticket", json={
+                "ticket_id": "U-1", "subject": "Outage", "description": "Everything is down", "priority": "urgent"})
+            return (await batch).json(), urgent.json()
+
+    batch, urgent = asyncio.run(scenario())
+    assert batch["succeeded"] == 4 and urgent["priority_class"] == "urgent"
+    # The urgent ticket ran right after the batch ticket holding the slot, not after the whole batch
+    assert order == ["N-0", "U-1", "N-1", "N-2", "N-3"]
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+import app.graph
+from app.checkpoint import ResumableGraph, SQLiteCheckpointSaver
+from app.graph import build_graph
+
+# classify, retrieve, draft, review, then two refine/review passes and escalate
+TICKET = {"ticket_id": "CKPT-1", "subject": "Urgent: Money Back", "description": "I demand a $1M refund immediately"}
+CONFIG = {"recursion_limit": 50}
+
+
+class _Rows:
+    def __init__(self):
+        self.rows = []
+
+    def submit(self, row):
+        self.rows.append(row[:-1])  # drop the timestamp
+
+    def flush(self, timeout=None):
+        return True
+
+
+def test_interrupted_ticket_resumes_after_last_completed_node(tmp_path, monkeypatch):
+    rows = _Rows()
+    monkeypatch.setattr("app.nodes.escalate.get_escalation_writer", lambda: rows)
+    expected = build_graph(instrument=False).invoke(dict(TICKET), config=CONFIG)
+    rows.rows = []
+
+    calls = []
+    crash = {"refine": True}
+
+    def counted(name, fn):
+        def node(state):
+            calls.append(name)
+            if crash.pop(name, False):
+                raise RuntimeError("worker died")
+            return fn(state)
+        return node
+
+    monkeypatch.setattr(app.graph, "NODES", tuple((name, counted(name, fn)) for name, fn in app.graph.NODES))
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = ResumableGraph(build_graph(instrument=False, checkpointer=saver), saver, durability="sync")
+
+    with pytest.raises(RuntimeError):
+        graph.invoke(dict(TICKET), config=CONFIG)
+    assert calls == ["classify", "retrieve", "draft", "review", "refine"]
+    assert saver.stats()["threads"] == 1
+
+    calls.clear()
+    # A fresh process resubmitting the ticket picks up the same thread from disk
+    saver = SQLiteCheckpointSaver(saver.path)
+    graph = ResumableGraph(build_graph(instrument=False, checkpointer=saver), saver, durability="sync")
+    assert graph.invoke(dict(TICKET), config=CONFIG) == expected
+    assert calls == ["refine", "review", "refine", "escalate"]
+    assert graph.resumed == 1
+    assert len(rows.rows) == 1
+    # Finished runs are deleted; the result cache answers them from now on
+    assert saver.stats() == {"checkpoints": 0, "blobs": 0, "writes": 0, "threads": 0}
+
+
+def test_checkpoints_are_compacted_as_the_run_goes(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.nodes.escalate.get_escalation_writer", _Rows)
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), keep=2)
+    graph = ResumableGraph(build_graph(instrument=False, checkpointer=saver), saver, durability="sync")
+
+    stream = graph.stream(dict(TICKET), config=CONFIG)
+    seen = [next(iter(next(stream))) for _ in range(7)]
+    stream.close()
+    assert seen == ["classify", "retrieve", "draft", "review", "refine", "review", "refine"]
+    stats = saver.stats()
+    assert stats["threads"] == 1 and stats["checkpoints"] <= 2 * saver.keep
+
+    resumed = list(graph.stream(dict(TICKET), config=CONFIG))
+    assert [next(iter(update)) for update in resumed] == ["resume", "escalate"]
+    assert resumed[0]["resume"]["retries"] == 2
+    assert resumed[-1]["escalate"]["escalated"] is True
+
+
+def test_batch_runs_overlap_up_to_max_concurrency(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.nodes.escalate.get_escalation_writer", _Rows)
+    barrier = threading.Barrier(2, timeout=5)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+    threads = set()
+
+    def overlapping(name, fn):
+        def node(state):
+            if name != "classify":
+                return fn(state)
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            try:
+                barrier.wait()  # only returns once two runs are inside classify together
+            except threading.BrokenBarrierError:
+                pass
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+            return fn(state)
+        return node
+
+    monkeypatch.setattr(app.graph, "NODES", tuple((name, overlapping(name, fn)) for name, fn in app.graph.NODES))
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    put = saver.put
+    monkeypatch.setattr(saver, "put", lambda config, *args: threads.add(config["configurable"]["thread_id"]) or
+                        put(config, *args))
+    graph = ResumableGraph(build_graph(instrument=False, checkpointer=saver), saver, durability="sync")
+
+    # Identical tickets, as with RESULT_CACHE_ENABLED=0: each run still gets its own thread
+    tickets = [dict(TICKET) for _ in range(4)]
+    outputs = graph.batch(tickets, config={**CONFIG, "max_concurrency": 2})
+    assert not barrier.broken and running["peak"] == 2
+    assert all(output["escalated"] for output in outputs)
+    assert len(threads) == 4
+    assert saver.stats()["threads"] == 0
+
+
+def test_live_run_is_not_claimed_by_an_identical_ticket(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.nodes.escalate.get_escalation_writer", _Rows)
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = ResumableGraph(build_graph(instrument=False, checkpointer=saver), saver, durability="sync")
+
+    first = graph.stream(dict(TICKET), config=CONFIG)
+    assert next(iter(next(first))) == "classify"
+    # The first run is still going, so this one starts fresh on a thread of its own
+    second = [next(iter(update)) for update in graph.stream(dict(TICKET), config=CONFIG)]
+    assert second[0] == "classify" and graph.resumed == 0
+    assert saver.stats()["threads"] == 1
+    assert [next(iter(update)) for update in first][-1] == "escalate"
+    assert saver.stats()["threads"] == 0
@@ -0,0 +1,139 @@
+import csv
+import io
+
+from app.escalation_writer import ESCALATION_HEADER, EscalationWriter
+
+
+def _row(i):
+    return [f"subject {i}", "desc", "Billing", "", "[]", "[]", "2", "2025-01-01T00:00:00"]
+
+
+def test_writer_batches_rows_behind_a_single_header(tmp_path):
+    path = tmp_path / "escalations.csv"
+    writer = EscalationWriter(str(path), batch_size=3, flush_seconds=60, max_bytes=0, rotate_daily=False)
+    for i in range(5):
+        writer.submit(_row(i))
+    assert writer.flush()
+    writer.close()
+
+    rows = list(csv.reader(path.open(encoding="utf-8")))
+    assert rows[0] == ESCALATION_HEADER
+    assert [r[0] for r in rows[1:]] == [f"subject {i}" for i in range(5)]
+    assert writer.batches_written == 2  # one size-triggered batch, one flushed remainder
+
+
+def test_writer_rotates_by_size(tmp_path):
+    path = tmp_path / "escalations.csv"
+    writer = EscalationWriter(str(path), batch_size=1, flush_seconds=60, max_bytes=10, rotate_daily=False)
+    writer.submit(_row(0))
+    writer.flush()
+    writer.submit(_row(1))
+    writer.close()
+
+    rotated = [p for p in tmp_path.iterdir() if p.name.startswith("escalations-")]
+    assert len(rotated) == 1 and writer.rotations == 1
+    rows = list(csv.reader(path.open(encoding="utf-8")))
+    assert rows[0] == ESCALATION_HEADER and rows[1][0] == "subject 1"
+
+
+def test_failed_batch_is_kept_and_retried(tmp_path, caplog):
+    class FlakyWriter(EscalationWriter):
+        failures = 2
+
+        def _append(self, rows):
+            if self.failures:
+                self.failures -= 1
+                raise OSError("disk full")
+            super()._append(rows)
+
+    path = tmp_path / "escalations.csv"
+    writer = FlakyWriter(str(path), batch_size=2, flush_seconds=0.01, max_bytes=0, rotate_daily=False)
+    for i in range(3):
+        writer.submit(_row(i))
+    assert not writer.flush()  # first attempt fails, the rows stay queued
+    assert writer.stats()["rows_pending"] == 3
+    writer.submit(_row(3))
+    writer.close()
+
+    rows = list(csv.reader(path.open(encoding="utf-8")))
+    assert [r[0] for r in rows[1:]] == [f"subject {i}" for i in range(4)]
+    stats = writer.stats()
+    assert stats["write_failures"] == 2 and stats["rows_written"] == 4 and stats["rows_dropped"] == 0
+    assert "failed to write" in caplog.text
+
+
+def _record(i, category="Billing"):
+    return [f"T-{i}", f"subject {i}", "desc", category, "billing_docs/a.txt", '["draft"]', '["feedback"]', "2",
+            f"2025-01-0{1 + i % 3}T00:00:00"]
+
+
+def test_sqlite_writer_pages_and_counts(tmp_path):
+    from app.escalation_store import EscalationStore
+    from app.escalation_writer import SQLiteEscalationWriter
+
+    store = EscalationStore(str(tmp_path / "escalations.sqlite"))
+    writer = SQLiteEscalationWriter(store, batch_size=4, flush_seconds=60)
+    for i in range(10):
+        writer.submit(_record(i, "Billing" if i % 2 else "Security"))
+    writer.close()
+
+    first = store.query(limit=4)
+    assert [r["ticket_id"] for r in first["items"]] == ["T-9", "T-8", "T-7", "T-6"]
+    second = store.query(limit=4, before_id=first["next_cursor"])
+    last = store.query(limit=4, before_id=second["next_cursor"])
+    assert len(second["items"]) == 4 and len(last["items"]) == 2 and last["next_cursor"] is None
+    assert first["items"][0]["all_drafts"] == ["draft"]
+
+    assert store.count(category="Billing", since="2025-01-02", until="2025-01-03") == 2  # T-1, T-7
+    assert store.counts_by_category() == {"Billing": 5, "Security": 5}
+    assert [r[1] for r in store.iter_rows(ticket_id="T-3")] == ["T-3"]
+
+
+def test_csv_migration_handles_every_layout_and_reruns(tmp_path):
+    from app.escalation_store import EscalationStore
+
+    path = tmp_path / "escalations.csv"
+    with path.open("w", newline="", encoding="utf-8") as f:
+        rows = csv.writer(f)
+        rows.writerow(["refund please", "Billing", "[]", "Hello!\nBest regards", "Do not promise refunds.", "2"])
+        rows.writerow(["URGENT", "I demand $1M", "Billing", "", '["d1", "d2"]', '["f1"]', "2", "2025-09-01T13:58:38"])
+        rows.writerow(ESCALATION_HEADER)
+        rows.writerow(_record(0))
+    store = EscalationStore(str(tmp_path / "escalations.sqlite"))
+
+    assert store.import_csv(str(path)) == 3
+    assert store.import_csv(str(path)) == 0
+    oldest, middle, newest = reversed(store.query()["items"])
+    assert oldest["description"] == "refund please" and oldest["all_drafts"] == ["Hello!\nBest regards"]
+    assert middle["subject"] == "URGENT" and middle["all_drafts"] == ["d1", "d2"] and middle["retries"] == 2
+    assert newest["ticket_id"] == "T-0"
+
+    with path.open("a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(_record(1))
+    assert store.import_csv(str(path)) == 1
+    assert store.count() == 4
+
+
+def test_escalation_endpoints_page_and_stream(tmp_path, monkeypatch):
+    import json
+
+    from fastapi.testclient import TestClient
+
+    from app import server
+    from app.escalation_store import EscalationStore
+
+    store = EscalationStore(str(tmp_path / "escalations.sqlite"))
+    store.insert_many([_record(i) for i in range(5)])
+    monkeypatch.setattr(server, "get_escalation_store", lambda: store)
+    client = TestClient(server.app)
+
+    page = client.get("/escalations", params={"limit": 3}).json()
+    assert len(page["items"]) == 3
+    rest = client.get("/escalations", params={"limit": 3, "cursor": page["next_cursor"]}).json()
+    assert len(rest["items"]) == 2 and rest["next_cursor"] is None
+    assert client.get("/escalations/stats").json()["by_category"] == {"Billing": 5}
+
+    lines = client.get("/escalations/export").text.splitlines()
+    assert [json.loads(line)["ticket_id"] for line in lines] == [f"T-{i}" for i in range(5)]
+    exported = list(csv.reader(io.StringIO(client.get("/escalations/export", params={"format": "csv"}).text)))
+    assert exported[0][:2] == ["id", "ticket_id"] and len(exported) == 6
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+from langgraph.errors import GraphRecursionError
+
+from app.fastpath import FastPipeline
+from app.graph import build_graph
+from app.state import GraphState
+
+SUBJECTS = ["Refund Request", "Server Down", "Password reset", "Office Hours", "Invoice question", "", "Urgent"]
+PHRASES = [
+    "I need a refund for my last invoice", "the server returns a 500 error", "I demand $500 back",
+    "someone may have hacked my account", "what are your office hours", "the api is slow", "my password leaked",
+    "please check my payment", "the app crashes on launch", "thanks for the help", "unauthorized login via 2fa",
+]
+
+
+def generate_tickets(n, seed=1):
+    rng = random.Random(seed)
+    tickets = []
+    for i in range(n):
+        ticket = {"ticket_id": f"DIFF-{i}", "subject": rng.choice(SUBJECTS),
+                  "description": " and ".join(rng.sample(PHRASES, rng.randint(1, 3)))}
+        if i % 7 == 0:
+            ticket["ticket_text"], ticket["description"] = ticket["description"], ""
+        if i % 11 == 0:
+            ticket["retries"] = 1
+        if i % 13 == 0:
+            ticket = GraphState(**ticket)
+        tickets.append(ticket)
+    return tickets
+
+
+class _Rows:
+    def __init__(self):
+        self.rows = []
+
+    def submit(self, row):
+        self.rows.append(row[:-1])  # drop the timestamp
+
+    def flush(self, timeout=None):
+        return True
+
+
+def test_fast_path_matches_langgraph(monkeypatch):
+    rows = _Rows()
+    monkeypatch.setattr("app.nodes.escalate.get_escalation_writer", lambda: rows)
+    graph, fast = build_graph(instrument=False), FastPipeline(instrument=False)
+    config = {"recursion_limit": 50}
+
+    for ticket in generate_tickets(300):
+        expected = graph.invoke(ticket, config=config)
+        expected_rows, rows.rows = rows.rows, []
+        assert fast.invoke(ticket, config=config) == expected
+        assert rows.rows == expected_rows
+        rows.rows = []
+
+    ticket = {"subject": "Refund Request", "description": "I need a refund for my last invoice"}
+    assert [list(u) for u in fast.stream(ticket)] == [list(u) for u in graph.stream(ticket, stream_mode="updates")]
+
+
+def test_fast_path_keeps_the_recursion_limit():
+    ticket = {"subject": "Server", "description": "server error"}  # four nodes
+    fast = FastPipeline(instrument=False)
+    assert fast.invoke(ticket, config={"recursion_limit": 5})["category"] == "Technical"
+    with pytest.raises(GraphRecursionError):
+        fast.invoke(ticket, config={"recursion_limit": 4})
@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+import scripts.ingest
+from app.bm25 import BM25Index
+from app.kb_snapshot import open_snapshot
+from app.retrievers import CorpusCache
+from scripts.ingest import BulkIngest, chunk_text
+
+
+def _ingest(data_dir, *sources, **kwargs):
+    return BulkIngest(str(data_dir), chunk_words=50, workers=1, **kwargs).run([str(s) for s in sources])
+
+
+def test_chunks_break_at_paragraphs_and_split_long_ones():
+    text = "a b c\n\nd e f g h i j\n\nk l\n\n" + " ".join(f"w{i}" for i in range(12))
+    assert chunk_text(text, 5) == ["a b c", "d e f g h", "i j\n\nk l", "w0 w1 w2 w3 w4", "w5 w6 w7 w8 w9", "w10 w11"]
+
+
+def test_bulk_ingest_is_incremental(tmp_path):
+    src, data = tmp_path / "src", tmp_path / "data"
+    (src / "Billing").mkdir(parents=True)
+    data.mkdir()
+    (src / "Billing" / "refunds.txt").write_text("\n\n".join(["refund policy " * 20] * 4), encoding="utf-8")
+    (src / "Billing" / "invoices.md").write_text("invoice copies and payment receipts", encoding="utf-8")
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text(json.dumps({"id": "kb-1", "category": "security", "title": "2FA",
+                                "text": "enable two factor auth"}) + "\n", encoding="utf-8")
+
+    stats = _ingest(data, src, dump)
+    assert stats["added"] == 3 and stats["chunks_written"] == 6  # the 160-word article is split in 4
+    assert len(os.listdir(data / "billing_docs")) == 5
+
+    stats = _ingest(data, src, dump)
+    assert stats["unchanged"] == 3 and "added" not in stats and "indexed_categories" not in stats
+
+    (src / "Billing" / "invoices.md").write_text("invoice copies, now with VAT numbers", encoding="utf-8")
+    (src / "Billing" / "refunds.txt").unlink()
+    stats = _ingest(data, src, dump, prune=True)
+    assert stats["updated"] == 1 and stats["removed"] == 1 and stats["indexed_categories"] == 1
+    assert len(os.listdir(data / "billing_docs")) == 1
+
+    # The persisted index is the one the serving process would build from the folder
+    _, docs = CorpusCache(base_path=str(data), refresh_seconds=0).get("billing_docs")
+    ids, texts, index, _ = open_snapshot(str(data / "kb_index")).category("Billing")
+    assert list(ids) == [d.doc_id for d in docs]
+    assert index.search("invoice vat", 3) == BM25Index([d.text for d in docs]).search("invoice vat", 3)
+
+
+def test_ingest_without_a_command_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(scripts.ingest, "DATA_DIR", str(tmp_path))
+    with pytest.raises(SystemExit) as exit_info:
+        scripts.ingest.main([])
+    assert exit_info.value.code == 2
+    assert list(tmp_path.iterdir()) == []
+    # The serving corpus holds no placeholder documents
+    corpus = CorpusCache(refresh_seconds=0)
+    texts = [doc.text for folder in scripts.ingest.CATEGORY_DIRS.values() for doc in corpus.get(folder)[1]]
+    assert texts and not [text for text in texts if "example document" in text]
@@ -0,0 +1,38 @@
+import random
+
+from app import config
+from app.bm25 import BM25Index
+from app.kb_snapshot import KBSnapshot, write_snapshot
+from app.nodes import retrieve as retrieve_module
+from app.nodes.retrieve import build_snapshot, resolve_context, retrieve
+
+
+def test_snapshot_index_scores_match_in_process_index(tmp_path):
+    rng = random.Random(3)
+    vocab = [f"w{i}" for i in range(100)] + ["refund", "invoice", "password"]
+    texts = [" ".join(rng.choices(vocab, k=30)) for _ in range(200)]
+    ids = [f"billing_docs/doc_{i:03d}.txt" for i in range(200)]
+    index = BM25Index(texts)
+    path = str(tmp_path / "kb.bin")
+    write_snapshot(path, {"Billing": (ids, texts, index)})
+
+    snap_ids, snap_texts, snap_index, by_id = KBSnapshot(path).category("Billing")
+    for query in ("refund invoice w1", "w7 w42 missing", "password"):
+        assert snap_index.search(query, 10) == index.search(query, 10)
+    assert list(snap_ids) == ids and snap_texts[5] == texts[5]
+    assert by_id.get(ids[150]) == texts[150] and by_id.get("billing_docs/nope.txt") is None
+
+
+def test_retrieve_reads_from_the_snapshot(tmp_path, monkeypatch):
+    ticket = {"category": "Technical", "subject": "Server down", "description": "500 errors"}
+    expected = retrieve(ticket)["context_ids"]
+
+    path = str(tmp_path / "kb.bin")
+    build_snapshot(path)
+    monkeypatch.setattr(config, "KB_INDEX_PATH", path)
+    monkeypatch.setattr(retrieve_module, "_SNAPSHOT", None)
+    monkeypatch.setattr(retrieve_module, "_INDEXES", {})
+    monkeypatch.setattr(retrieve_module, "load_corpus", lambda category: (_ for _ in ()).throw(AssertionError))
+
+    assert retrieve(ticket)["context_ids"] == expected
+    assert resolve_context(expected)[0] == "Technical guide: troubleshooting server 500 errors."
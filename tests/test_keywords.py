@@ -0,0 +1,52 @@
+from app.keywords import CATEGORY_KEYWORDS, MATCHER, POLICY_PATTERNS, SENSITIVE, category_for, match_groups
+from app.nodes.classify import classify
+
+
+def test_scan_reports_every_hit_with_its_groups():
+    hits = MATCHER.scan("Billing ERRORS on the api; my password is 1234")
+    assert [(h.keyword, h.groups) for h in hits] == [
+        ("billing", ("Billing",)),
+        ("error", ("Technical",)),
+        ("api", ("Technical",)),
+        ("password", ("Security", "sensitive")),
+    ]
+
+
+def _baseline_groups(text):
+    """The per-node `word in text` checks the matcher replaced."""
+    low = text.lower()
+    return frozenset(
+        group
+        for group, words in {**CATEGORY_KEYWORDS, **POLICY_PATTERNS}.items()
+        if any(word in low for word in words)
+    )
+
+
+def test_matching_keeps_baseline_substring_semantics():
+    assert match_groups("a rapid terror, debug it") == {"Technical"}
+    assert "demand" in match_groups("pay me $100")
+    for text in [
+        "a rapid terror, debug it",
+        "Rebilling after the hackathon",
+        "Invoices and REFUNDS; my SSN and credit card",
+        "unauthorized 2fa reset, PAYMENTS via the API",
+        "billing bill bil",
+        "pay me $100 or else, I demand it",
+        "crashack",
+        "nothing to see here",
+        "",
+    ]:
+        assert match_groups(text) == _baseline_groups(text), text
+        assert category_for(match_groups(text)) == category_for(_baseline_groups(text)), text
+
+
+def test_overlapping_keywords_are_all_reported():
+    hits = MATCHER.scan("crashack")
+    assert [(h.keyword, h.start) for h in hits] == [("crash", 0), ("hack", 4)]
+    assert category_for(match_groups("crashack")) == category_for(_baseline_groups("crashack")) == "Technical"
+
+
+def test_group_restricted_scan_and_category_priority():
+    assert MATCHER.groups("server password leak", groups=(SENSITIVE,)) == {"Security", "sensitive"}
+    assert category_for(match_groups("refund for the server crash")) == "Billing"
+    assert classify({"subject": "Phishing attempt", "description": "someone asked for my 2FA code"})["category"] == "Security"
@@ -0,0 +1,143 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.graph import build_graph
+from app.llm import LLMBackend, MicroBatcher, StubBackend, parse_review, set_llm
+from app.llm_cache import PromptCache, prompt_cache_key
+from app.prompts import REVIEW_PROMPT
+
+
+class RecordingBackend(LLMBackend):
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def complete(self, prompts):
+        with self.lock:
+            self.batches.append(list(prompts))
+        return [prompt.upper() for prompt in prompts]
+
+
+def test_backend_must_implement_complete():
+    class Incomplete(LLMBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert StubBackend().params() == {"backend": "stub"}
+
+
+def test_concurrent_prompts_share_one_call():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=8, linger_seconds=0.2, concurrency=1)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(batcher.complete, [f"p{i}" for i in range(8)]))
+    batcher.close()
+
+    # Each caller gets the completion of its own prompt back
+    assert answers == [f"P{i}" for i in range(8)]
+    # A full batch goes out without waiting for the linger to run out
+    assert len(backend.batches) == 1 and sorted(backend.batches[0]) == [f"p{i}" for i in range(8)]
+    assert batcher.stats()["batch_size_avg"] == 8
+
+
+def test_backend_error_reaches_every_caller():
+    class Failing(LLMBackend):
+        def complete(self, prompts):
+            raise ConnectionError("model down")
+
+    batcher = MicroBatcher(Failing(), max_batch_size=4, linger_seconds=0.0, concurrency=1)
+    with pytest.raises(ConnectionError):
+        batcher.complete("p")
+    batcher.close()
+    assert batcher.stats()["errors"] == 1
+
+
+def test_short_backend_reply_fails_every_caller():
+    class Short(LLMBackend):
+        def complete(self, prompts):
+            return [prompt.upper() for prompt in prompts][:-1]
+
+    batcher = MicroBatcher(Short(), max_batch_size=3, linger_seconds=0.2, concurrency=1, result_timeout=5)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.complete, f"p{i}") for i in range(3)]
+        errors = [future.exception() for future in futures]
+    batcher.close()
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert batcher.stats()["errors"] == 1
+
+
+def test_caller_gives_up_after_result_timeout():
+    release = threading.Event()
+
+    class Stuck(LLMBackend):
+        def complete(self, prompts):
+            release.wait(5)
+            return list(prompts)
+
+    batcher = MicroBatcher(Stuck(), max_batch_size=1, linger_seconds=0.0, concurrency=1, result_timeout=0.05)
+    with pytest.raises(TimeoutError):
+        batcher.complete("sent")
+    # The only call slot is busy, so this one is dropped from the queue unsent
+    with pytest.raises(TimeoutError):
+        batcher.complete("queued")
+    release.set()
+    batcher.close()
+    stats = batcher.stats()
+    assert stats["timeouts"] == 2 and stats["prompts"] == 1
+
+
+def test_nodes_use_the_stub_backend():
+    # The review prompt renders despite the JSON example in it
+    assert json.loads(StubBackend().complete([REVIEW_PROMPT.format(draft="Hello")])[0])["status"] == "approved"
+    assert parse_review('Sure: {"status": "rejected", "feedback": "too vague"}')["feedback"] == "too vague"
+    assert parse_review("looks fine") is None
+
+    batcher = MicroBatcher(StubBackend(), max_batch_size=4, linger_seconds=0.0)
+    previous = set_llm(batcher)
+    try:
+        result = build_graph(instrument=False).invoke(
+            {"ticket_id": "LLM-1", "subject": "App crash", "description": "The app shows an error on startup"},
+            {"recursion_limit": 50},
+        )
+    finally:
+        set_llm(previous)
+        batcher.close()
+    assert result["category"] == "Technical" and result["review_decision"] == "approved"
+    assert "App crash" in result["final_reply"]
+    # classify, draft and review each made one call
+    assert batcher.stats()["prompts"] == 3
+
+
+def test_prompt_cache_tiers_and_disk_eviction(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    key = prompt_cache_key(REVIEW_PROMPT, {"draft": "Hello"}, {"backend": "stub"})
+    # Template, variables and model parameters are all part of the key
+    assert key != prompt_cache_key(REVIEW_PROMPT, {"draft": "Hello"}, {"backend": "http", "model": "m"})
+    assert key != prompt_cache_key(REVIEW_PROMPT, {"draft": "Hi"}, {"backend": "stub"})
+
+    first = PromptCache(max_entries=1, ttl_seconds=60, db_path=path, max_bytes=250)
+    first.put(key, "a" * 100)
+    first.put("other", "b" * 100)  # pushes key out of memory, not off disk
+    assert first.get(key) == "a" * 100 and first.stats()["hits_disk"] == 1
+    first.put("third", "c" * 100)  # over max_bytes: "other" is the least recently used row
+    assert first.stats()["disk_evictions"] == 1 and first.stats()["disk_bytes"] <= 225
+    first.close()
+
+    # A restarted process finds the surviving entries on disk
+    second = PromptCache(max_entries=10, ttl_seconds=60, db_path=path, max_bytes=250)
+    assert second.get(key) == "a" * 100 and second.get("other") is None
+    second.close()
+
+
+def test_batcher_answers_repeated_prompts_from_cache():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=4, linger_seconds=0.0,
+                           cache=PromptCache(max_entries=10, ttl_seconds=60))
+    answers = [batcher.generate("Ticket: {ticket_text}", ticket_text="crash") for _ in range(3)]
+    batcher.close()
+    assert answers == ["TICKET: CRASH"] * 3
+    assert len(backend.batches) == 1 and batcher.stats()["cache"]["hits_memory"] == 2
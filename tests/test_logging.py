@@ -0,0 +1,80 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+from app import config
+from app.logging_setup import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    log_file_path,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+def _record(level=logging.INFO, msg="Ticket processed", **extra):
+    record = logging.LogRecord("support-agent", level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_carry_structured_fields_and_one_line_tracebacks():
+    line = JsonFormatter().format(_record(ticket_id="T-1", node="review", latency_ms=1.5))
+    entry = json.loads(line)
+    assert entry["msg"] == "Ticket processed" and entry["ticket_id"] == "T-1"
+    assert entry["node"] == "review" and entry["latency_ms"] == 1.5
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        import sys
+        record = logging.LogRecord("support-agent", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+    line = JsonFormatter().format(record)
+    assert "\n" not in line and "ValueError: boom" in json.loads(line)["exc"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 2 and handler.dropped == 3
+
+
+def test_sampling_keeps_warnings():
+    sampler = SamplingFilter(rate=0.0)
+    assert not sampler.filter(_record(logging.INFO))
+    assert sampler.filter(_record(logging.WARNING))
+    assert sampler.sampled_out == 1
+
+
+def test_logging_can_be_set_up_again_after_shutdown(tmp_path, monkeypatch):
+    shutdown_logging()
+    monkeypatch.setattr(config, "LOG_FILE", str(tmp_path / "agent.log"))
+    monkeypatch.setattr(config, "LOG_FORMAT", "json")
+    root = logging.getLogger()
+    try:
+        first = setup_logging()
+        shutdown_logging()
+        assert first not in root.handlers
+
+        second = setup_logging()
+        assert second is not first and root.handlers.count(second) == 1
+        logging.getLogger("support-agent").warning("after restart")
+        shutdown_logging()
+        messages = [json.loads(line)["msg"] for line in (tmp_path / "agent.log").read_text().splitlines()]
+        assert messages == ["after restart"]
+    finally:
+        shutdown_logging()
+        monkeypatch.undo()
+        setup_logging()
+
+
+def test_per_process_log_file_carries_the_pid(monkeypatch):
+    monkeypatch.setattr(config, "LOG_FILE", "logs/agent.log")
+    monkeypatch.setattr(config, "LOG_FILE_PER_PROCESS", False)
+    assert log_file_path() == "logs/agent.log"
+    monkeypatch.setattr(config, "LOG_FILE_PER_PROCESS", True)
+    assert log_file_path() == f"logs/agent.{os.getpid()}.log"
@@ -0,0 +1,64 @@
+import pytest
+
+from app.metrics import NODE_CALLS, NODE_ERRORS, NODE_LATENCY, RETRY_LOOPS, REGISTRY, Histogram, Registry, instrument_node
+
+
+def test_instrumented_node_records_latency_calls_and_errors():
+    ok = instrument_node("test_ok", lambda state: {"category": "Billing"})
+    failing = instrument_node("test_fail", lambda state: {"error": {"node": "test_fail", "message": "boom"}})
+
+    ok({})
+    ok({})
+    failing({"category": "General"})
+
+    assert NODE_LATENCY.count("test_ok", "Billing") == 2
+    assert NODE_CALLS.value("test_ok", "Billing") == 2
+    assert NODE_ERRORS.value("test_fail", "General") == 1
+
+
+def test_raised_errors_are_counted_and_reraised():
+    def boom(state):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        instrument_node("test_raise", boom)({"category": "Security"})
+    assert NODE_ERRORS.value("test_raise", "Security") == 1
+
+
+def test_refine_counts_as_retry_loop():
+    before = RETRY_LOOPS.value("Billing")
+    instrument_node("refine", lambda state: {"retries": 1})({"category": "Billing"})
+    assert RETRY_LOOPS.value("Billing") == before + 1
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("t_seconds", "test", ("node",), buckets=(0.1, 1.0))
+    h.observe(0.05, "a")
+    h.observe(0.5, "a")
+    h.observe(5.0, "a")
+    assert h.render()[2:] == [
+        't_seconds_bucket{node="a",le="0.1"} 1',
+        't_seconds_bucket{node="a",le="1"} 2',
+        't_seconds_bucket{node="a",le="+Inf"} 3',
+        't_seconds_sum{node="a"} 5.55',
+        't_seconds_count{node="a"} 3',
+    ]
+    assert "support_node_latency_seconds" in REGISTRY.render()
+
+
+def test_failing_collector_is_logged_and_counted(caplog):
+    registry = Registry()
+    seen = []
+
+    def broken_stats():
+        raise RuntimeError("stats unavailable")
+
+    registry.add_collector(broken_stats)
+    registry.add_collector(lambda: seen.append(True))
+    with caplog.at_level("ERROR", logger="support-agent"):
+        text = registry.render()
+        registry.render()
+    assert registry.collector_errors.value("broken_stats") == 2
+    assert 'support_metrics_collector_errors_total{collector="broken_stats"} 1' in text
+    assert seen == [True, True]  # the other collectors still run
+    assert "broken_stats failed" in caplog.text and "stats unavailable" in caplog.text
@@ -0,0 +1,55 @@
+from app.graph import build_graph
+from app.nodes import refine as refine_module
+from app.nodes.refine import MAX_RETRIES, refine
+
+REFUND = {"ticket_id": "REF-1", "subject": "Refund Request", "description": "I need a refund for my last invoice"}
+DEMAND = {"ticket_id": "REF-2", "subject": "Urgent: Money Back", "description": "I demand a $1M refund immediately"}
+
+
+class _Rows:
+    def __init__(self):
+        self.rows = []
+
+    def submit(self, row):
+        self.rows.append(row)
+
+    def flush(self, timeout=None):
+        return True
+
+
+def _run(ticket, monkeypatch, recursion_limit):
+    """(node path, final state); the limit is just above the path length, so a refine loop fails the run."""
+    for node in ("classify", "draft", "review"):
+        monkeypatch.setattr(f"app.nodes.{node}.get_llm", lambda: None)
+    rows = _Rows()
+    monkeypatch.setattr("app.nodes.escalate.get_escalation_writer", lambda: rows)
+    graph = build_graph(instrument=False)
+    path = [node for update in graph.stream(dict(ticket), config={"recursion_limit": recursion_limit},
+                                            stream_mode="updates") for node in update]
+    return path, graph.invoke(dict(ticket), config={"recursion_limit": recursion_limit}), rows.rows
+
+
+def test_refund_is_redrafted_once_then_approved(monkeypatch):
+    path, result, escalations = _run(REFUND, monkeypatch, recursion_limit=7)
+    assert path == ["classify", "retrieve", "draft", "review", "refine", "review"]
+    assert result["retries"] == 1
+    assert result["review_decision"] == "approved"
+    assert not result["escalated"]
+    assert result["final_reply"] == result["draft_reply"]
+    assert escalations == []
+
+
+def test_rejected_redraft_escalates_at_max_retries(monkeypatch):
+    path, result, escalations = _run(DEMAND, monkeypatch, recursion_limit=9)
+    assert path == ["classify", "retrieve", "draft", "review", "refine", "review", "refine", "escalate"]
+    assert result["retries"] == MAX_RETRIES
+    assert result["escalated"]
+    assert len(escalations) == 2  # stream + invoke
+
+
+def test_refine_keeps_its_retry_count_over_echoed_updates(monkeypatch):
+    monkeypatch.setattr(refine_module, "retrieve", lambda state: {"context_ids": [], "retries": 0})
+    monkeypatch.setattr(refine_module, "generate_draft", lambda state: {"draft_reply": "again", "retries": 0})
+    update = refine({"subject": "Refund Request", "description": "refund", "category": "Billing", "retries": 0})
+    assert update["retries"] == 1
+    assert update["draft_reply"] == "again"
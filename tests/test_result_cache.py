@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.result_cache import ResultCache, ticket_cache_key
+from app.server import app, result_cache
+
+
+def test_key_ignores_case_and_whitespace_but_not_ticket_id():
+    key = ticket_cache_key("T1", "Refund Request", "I need  a refund\n")
+    assert key == ticket_cache_key("T1", "refund request", "i need a refund")
+    assert key != ticket_cache_key("T2", "Refund Request", "I need a refund")
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") == {"n": 1}
+
+    short = ResultCache(max_entries=2, ttl_seconds=0.01)
+    short.put("a", {"n": 1})
+    time.sleep(0.02)
+    assert short.get("a") is None and short.stats()["expired"] == 1
+
+
+def test_sqlite_backing_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResultCache(max_entries=10, ttl_seconds=60, db_path=path)
+    first.put("k", {"category": "Billing"})
+    first.close()
+    assert ResultCache(max_entries=10, ttl_seconds=60, db_path=path).get("k") == {"category": "Billing"}
+
+
+
+def test_sqlite_tier_runs_off_the_event_loop(tmp_path):
+    disk_threads = []
+
+    class RecordingCache(ResultCache):
+        def _get_disk(self, key):
+            disk_threads.append(threading.get_ident())
+            return super()._get_disk(key)
+
+        def _put_disk(self, key, expires_at, value):
+            disk_threads.append(threading.get_ident())
+            super()._put_disk(key, expires_at, value)
+
+    path = str(tmp_path / "cache.db")
+    ResultCache(max_entries=10, ttl_seconds=60, db_path=path).put("warm", {"category": "Billing"})
+    cache = RecordingCache(max_entries=10, ttl_seconds=60, db_path=path)
+
+    async def compute():
+        return {"category": "Technical"}
+
+    async def main():
+        warm = await cache.aget("warm")
+        result, cached = await cache.get_or_compute("cold", compute)
+        return threading.get_ident(), warm, result, cached
+
+    loop_thread, warm, result, cached = asyncio.run(main())
+    assert warm == {"category": "Billing"}
+    assert result == {"category": "Technical"} and cached is False
+    assert len(disk_threads) == 3 and loop_thread not in disk_threads
+    assert ResultCache(max_entries=10, ttl_seconds=60, db_path=path).get("cold") == {"category": "Technical"}
+
+
+def test_concurrent_identical_requests_run_once():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"category": "Technical"}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [cached for _, cached in results].count(False) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_resubmitted_ticket_is_served_from_cache():
+    result_cache.clear()
+    client = TestClient(app)
+    payload = {"ticket_id": "RC-1", "subject": "Server Down Issue", "description": "The server is down with a 500 error"}
+    first = client.post("/api/process_ticket", json=payload).json()
+    retry = client.post("/api/process_ticket", json=dict(payload, description="the server is DOWN with a 500 error ")).json()
+    assert first["cached"] is False and retry["cached"] is True
+    assert retry["response"] == first["response"]
+    assert client.get("/cache/stats").json()["hits"] >= 1
@@ -0,0 +1,113 @@
+from app.bm25 import BM25Index, tokenize
+from app.graph import build_graph
+from app.nodes.draft import draft
+from app.nodes.retrieve import fit_context, resolve_context, retrieve
+from app.retrievers import CorpusCache
+
+
+def test_tokenize_folds_plurals():
+    assert tokenize("Server ERRORS, invoices & 2FA") == ["server", "error", "invoice", "2fa"]
+
+
+def test_bm25_ranks_rare_terms_higher():
+    docs = ["refund policy", "billing guide", "refund refund invoice", "payment method"]
+    index = BM25Index(docs)
+    hits = index.search("refund invoice", 2)
+    assert [doc_id for doc_id, _ in hits] == [2, 0]
+    assert index.search("nothing matches", 3) == []
+
+
+def test_retrieve_returns_top_docs_first():
+    result = retrieve({"category": "Technical", "subject": "Server down", "description": "500 errors"})
+    assert "context" not in result  # the state carries ids only
+    assert resolve_context(result["context_ids"])[0] == "Technical guide: troubleshooting server 500 errors."
+    assert result["escalated"] is False
+
+
+def test_incremental_feedback_ranking_matches_full_rescore():
+    import random
+
+    from app.nodes.retrieve import _bm25_top_k
+
+    rng = random.Random(5)
+    vocab = [f"w{i}" for i in range(60)] + ["refund", "billing", "policy", "invoice"]
+    docs = [" ".join(rng.choices(vocab, k=30)) for _ in range(300)]
+    index = BM25Index(docs)
+    feedback = "Do not promise refunds. Offer to check billing policy and next steps."
+    for i in range(20):
+        query = f"refund invoice w{i} w{i + 7}"
+        expected = [doc_id for doc_id, _ in index.search(f"{query} {feedback}", 5)]
+        assert [doc_id for doc_id, _ in _bm25_top_k("test", i, index, query, "", 5)] == \
+            [doc_id for doc_id, _ in index.search(query, 5)]
+        assert [doc_id for doc_id, _ in _bm25_top_k("test", i, index, query, feedback, 5)] == expected
+
+
+def test_corpus_cache_rereads_only_changed_files(tmp_path):
+    folder = tmp_path / "billing_docs"
+    folder.mkdir()
+    (folder / "a.txt").write_text("refund policy", encoding="utf-8")
+    (folder / "b.txt").write_text("invoice guide", encoding="utf-8")
+    cache = CorpusCache(base_path=str(tmp_path), refresh_seconds=0)
+
+    version, docs = cache.get("billing_docs")
+    assert [d.doc_id for d in docs] == ["billing_docs/a.txt", "billing_docs/b.txt"]
+    assert cache.files_read == 2
+
+    assert cache.get("billing_docs")[0] == version  # unchanged: stat only, no reads
+    assert cache.files_read == 2
+
+    (folder / "b.txt").write_text("invoice guide, updated", encoding="utf-8")
+    (folder / "a.txt").unlink()
+    new_version, docs = cache.get("billing_docs")
+    assert new_version != version
+    assert [d.text for d in docs] == ["invoice guide, updated"]
+    assert cache.files_read == 3
+    assert cache.stats()["bytes_held"] == len("invoice guide, updated")
+
+
+def test_vector_modes_agree_on_obvious_match():
+    from app.vector_index import HashingIndex, TfidfIndex
+
+    docs = ["refund policy and processing times", "update payment method", "office hours"]
+    for index in (TfidfIndex(docs), HashingIndex(docs, dim=256)):
+        hits = index.search("refund processing", 2)
+        assert hits[0][0] == 0
+
+
+def test_context_is_fitted_to_the_budget_best_ranked_first():
+    texts = ["Refund policy and processing times.", "Invoices are sent on the first day of each billing cycle.",
+             "Payment methods"]
+    assert fit_context(texts, 0) == texts
+    # The second text is cut at a word boundary; the third never makes it in
+    fitted = fit_context(texts, 80)
+    assert fitted[0] == texts[0] and fitted[1] == "Invoices are sent on the first day of each…" and len(fitted) == 2
+    assert len("\n".join(fitted)) <= 80
+    # Too little room left for a useful fragment: drop it rather than cut it
+    assert fit_context(texts, 50) == texts[:1]
+
+
+def test_draft_renders_the_category_template_within_budget():
+    state = {"subject": "Refund", "description": "I need a refund", "category": "Billing", "retries": 0,
+             "context_ids": retrieve({"category": "Billing", "subject": "Refund", "description": "refund"})["context_ids"]}
+    reply = draft(state)["draft_reply"]
+    assert reply.startswith("Hello! Thank you for contacting our support team about: 'Refund'.")
+    assert "Regarding your billing inquiry" in reply and reply.endswith("Best regards,\nSupport Team")
+
+    redraft = draft(dict(state, retries=1, review_feedback="Do not promise refunds.", category="Unknown"))["draft_reply"]
+    assert "I've reviewed your issue further: 'I need a refund'." in redraft
+    assert "Here's some information that may help:" in redraft
+
+
+def test_replies_never_include_placeholder_documents():
+    tickets = [
+        {"ticket_id": "T1", "subject": "Server Down Issue", "description": "The server is down with a 500 error"},
+        {"ticket_id": "T3", "subject": "Billing Refund Request", "description": "I need a refund for my last invoice"},
+        {"ticket_id": "T5", "subject": "Office Hours", "description": "Can you tell me your office hours?"},
+        {"ticket_id": "T6", "subject": "Payment Issue", "description": "My invoice was charged twice"},
+        {"ticket_id": "T7", "subject": "Account security", "description": "How do I enable 2FA on my account?"},
+    ]
+    graph = build_graph(instrument=False)
+    for ticket in tickets:
+        result = graph.invoke(ticket, {"recursion_limit": 50})
+        for reply in [result.get("final_reply") or "", result.get("draft_reply") or ""]:
+            assert "example document" not in reply, ticket["ticket_id"]
@@ -0,0 +1,98 @@
+import asyncio
+
+from app.admission import Overloaded
+from app.scheduler import PriorityScheduler, priority_class
+
+
+async def _serve_order(scheduler, queued, wait_before=0.0):
+    """Hold the only slot, queue (class, name) tickets, then release slots one at a time."""
+    await scheduler.acquire("normal")
+    order = []
+
+    async def ticket(cls, name):
+        await scheduler.acquire(cls)
+        order.append(name)
+
+    tasks = []
+    for cls, name in queued:
+        tasks.append(asyncio.create_task(ticket(cls, name)))
+        await asyncio.sleep(0)
+        if name == queued[0][1] and wait_before:
+            await asyncio.sleep(wait_before)
+    for _ in queued:
+        scheduler.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_classes_share_slots_by_weight():
+    scheduler = PriorityScheduler(max_inflight=1, max_queue=100, max_wait_seconds=10, aging_seconds=60)
+    queued = [("normal", f"n{i}") for i in range(20)] + [("urgent", f"u{i}") for i in range(4)] + \
+             [("low", f"l{i}") for i in range(20)]
+    order = asyncio.run(_serve_order(scheduler, queued))
+
+    # The urgent tickets go first despite queueing behind a flood of normal ones
+    assert order[:4] == ["u0", "u1", "u2", "u3"]
+    # Then normal and low alternate 2:1, each in arrival order
+    rest = order[4:34]
+    assert sum(name.startswith("n") for name in rest) == 20 and sum(name.startswith("l") for name in rest) == 10
+    assert [name for name in order if name.startswith("l")] == [f"l{i}" for i in range(20)]
+    stats = scheduler.stats()["classes"]
+    assert stats["urgent"]["admitted"] == 4 and stats["normal"]["admitted"] == 21
+
+
+def test_aging_lifts_a_waiting_low_ticket():
+    queued = [("low", "old")] + [("normal", f"n{i}") for i in range(4)]
+    patient = PriorityScheduler(max_inflight=1, max_queue=50, max_wait_seconds=10, aging_seconds=60)
+    assert asyncio.run(_serve_order(patient, queued, wait_before=0.05))[0] == "n0"
+
+    aging = PriorityScheduler(max_inflight=1, max_queue=50, max_wait_seconds=10, aging_seconds=0.01)
+    assert asyncio.run(_serve_order(aging, queued, wait_before=0.05))[0] == "old"
+    assert aging.stats()["classes"]["low"]["aged"] == 1
+
+
+def test_queue_is_bounded_across_classes_with_a_reserve_per_class():
+    async def fill():
+        scheduler = PriorityScheduler(max_inflight=1, max_queue=30, max_wait_seconds=10, aging_seconds=60)
+        await scheduler.acquire("normal")
+        outcomes = {}
+
+        async def ticket(cls):
+            try:
+                await scheduler.acquire(cls)
+            except Overloaded:
+                outcomes[cls] = outcomes.get(cls, 0) + 1
+                return
+            scheduler.release()
+
+        # Floods of normal and low tickets, then urgent and high ones
+        flood = ["normal"] * 40 + ["low"] * 40 + ["urgent"] * 20 + ["high"] * 20
+        tasks = [asyncio.create_task(ticket(cls)) for cls in flood]
+        await asyncio.sleep(0)
+        queued = scheduler.queued()
+        stats = scheduler.stats()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return queued, stats, outcomes
+
+    queued, stats, shed = asyncio.run(fill())
+    classes = stats["classes"]
+    assert queued == 30 and stats["shed_queue_full"] == 120 - 30
+    assert sum(class_stats["queued"] for class_stats in classes.values()) == 30
+    # Normal takes the shared room, low keeps only its reserve; urgent and high still get theirs
+    reserved = {cls: class_stats["reserved"] for cls, class_stats in classes.items()}
+    assert reserved == {"urgent": 8, "high": 4, "normal": 2, "low": 1}
+    assert classes["normal"]["queued"] == 2 + (30 - 15)
+    assert classes["low"]["queued"] == 1
+    assert classes["urgent"]["queued"] == 8 and classes["high"]["queued"] == 4
+    assert sum(shed.values()) == 120 - 30
+
+
+def test_priority_class_from_request_fields():
+    assert priority_class("P1") == "urgent"
+    assert priority_class("low", tags=["billing"]) == "low"
+    assert priority_class(None) == "normal"
+    assert priority_class("low", tags=["Security"]) == "urgent"
+    assert priority_class("low", subject="Login alert", description="someone hacked my account") == "urgent"
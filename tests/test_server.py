@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+from app.server import app
+
+client = TestClient(app)
+
+
+def test_batch_reports_per_ticket_results_and_errors():
+    tickets = [
+        {"ticket_id": "B1", "subject": "Server Down Issue", "description": "The server is down with a 500 error"},
+        {"ticket_id": "B2", "subject": "No description"},
+        {"ticket_id": "B3", "message": "Can you tell me your office hours?"},
+    ]
+    body = client.post("/api/process_tickets", json=tickets).json()
+
+    assert body["count"] == 3 and body["succeeded"] == 2 and body["failed"] == 1
+    by_id = {r["ticket_id"]: r for r in body["results"]}
+    assert by_id["B1"]["category"] == "Technical"
+    assert by_id["B2"] == {"ticket_id": "B2", "status": "error", "error": "Missing ticket description"}
+    assert by_id["B3"]["category"] == "General"
+    assert body["processing_time_seconds"] >= 0
+
+
+def test_batch_rejects_empty_payload():
+    assert client.post("/api/process_tickets", json=[]).json()["status"] == "error"
+
+
+def test_stream_emits_one_event_per_node():
+    payload = {"ticket_id": "S1", "subject": "Server Down Issue", "description": "The server is down with a 500 error"}
+    with client.stream("POST", "/resolve_ticket/stream", json=payload) as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = [line[len("event: "):] for line in resp.iter_lines() if line.startswith("event: ")]
+    assert events == ["accepted", "classify", "retrieve", "draft", "review", "result"]
+
+
+def test_enhanced_ticket_reports_its_priority_class():
+    payload = {"ticket_id": "E1", "subject": "Login alert", "description": "Someone hacked my account",
+               "priority": "low", "tags": ["account"], "customer_email": "a@example.com"}
+    body = client.post("/api/enhanced_ticket", json=payload).json()
+    assert body["priority_class"] == "urgent"
+    assert body["category"] == "Security"
+    assert client.get("/admission/stats").json()["classes"]["urgent"]["admitted"] >= 1
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app import server
+
+# Cumulative `python -X importtime` budget for `import app.server` (~0.35s on a dev laptop)
+IMPORT_BUDGET_US = 1_000_000
+
+
+def _import_times(module: str):
+    env = dict(os.environ, LOG_FILE="")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}; import app.graph; assert app.graph._graph is None"],
+        capture_output=True, text=True, env=env, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_server_import_does_not_build_the_graph_and_stays_in_budget():
+    times = _import_times("app.server")
+    assert "langgraph.graph" not in times  # StateGraph is imported when the graph is first built
+    assert times["app.server"] < IMPORT_BUDGET_US, times["app.server"]
+
+
+def test_health_is_503_until_warm_up_finishes():
+    client = TestClient(server.app)
+    server.ready.clear()
+    response = client.get("/health")
+    assert response.status_code == 503 and response.json()["status"] == "starting"
+
+    server._warm_up()
+    response = client.get("/health")
+    assert response.status_code == 200 and response.json()["status"] == "healthy"
+
+
+def test_app_can_be_started_again_after_shutdown(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "result_cache", server.ResultCache(16, 60, db_path=str(tmp_path / "results.sqlite")))
+    for run in range(2):
+        with TestClient(server.app) as client:
+            response = client.post("/api/process_ticket", json={"ticket_id": f"RESTART-{run}",
+                                                                "description": "The server is down"})
+            assert response.status_code == 200 and response.json()["category"] == "Technical"
+            assert server.result_cache.stats()["persistent"]
+        assert server.result_cache.stats()["entries"] == run + 1
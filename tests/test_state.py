@@ -0,0 +1,31 @@
+from app.state import GraphState, StateView, append_draft, append_history, expand_drafts
+
+
+def test_graph_state_is_slotted():
+    assert not hasattr(GraphState(), "__dict__")
+
+
+def test_history_is_capped_and_copy_on_write():
+    history = ["a", "b"]
+    assert append_history(history, "c", limit=2) == ["b", "c"]
+    assert history == ["a", "b"]
+
+
+def test_older_drafts_are_stored_as_deltas_and_expand_back():
+    context = "Refund policy and processing times.\n" + "x" * 5000 + "\n"
+    first = "Hello!\nI understand your concern.\n" + context + "Best regards"
+    second = "Hello!\nI've reviewed your issue further.\n" + context + "Best regards"
+    third = "This ticket has been escalated to a human agent."
+
+    history = append_draft(append_draft(append_draft([], first), second), third, limit=3)
+    assert history[-1] == third
+    assert len(history[0]) < 200  # first draft shares the context lines with the second
+    assert expand_drafts(history) == [first, second, third]
+
+
+def test_state_view_layers_updates_without_copying():
+    base = GraphState(subject="Refund", context_ids=["billing_docs/a.txt"])
+    view = StateView(base, {"context_ids": ["billing_docs/b.txt"]})
+    assert view.subject == "Refund" and view.context_ids == ["billing_docs/b.txt"]
+    assert view.get("missing", 1) == 1
+    assert StateView({"subject": "x"}).subject == "x"